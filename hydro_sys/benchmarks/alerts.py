@@ -0,0 +1,91 @@
+"""
+Cost of evaluating alert rules on ingest: AlertEngine.evaluate on batches of
+new measurements, next to the bulk insert of the same batches.
+
+    python -m benchmarks.alerts --systems 100 --rules 3 --batch 1000
+"""
+
+import argparse
+from datetime import timedelta
+
+from benchmarks.base import seed, setup, summary, test_database, timeit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--systems", type=int, default=100)
+    parser.add_argument("--rules", type=int, default=3, help="rules per system")
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+
+    from django.db import transaction
+    from django.utils import timezone
+    from systems.alerts import AlertEngine
+    from systems.models import AlertRule, HydroponicSystem, Measurement
+
+    kinds = [
+        {"metric": "ph", "kind": "band", "min_value": 5.5, "max_value": 7.5},
+        {"metric": "tds", "kind": "rate", "max_rate": 50},
+        {"metric": "temperature", "kind": "sustained", "max_value": 24, "duration": 5},
+    ]
+
+    with test_database():
+        seed(users=1, systems=args.systems, measurements=0)
+        systems = list(HydroponicSystem.objects.all())
+        system_ids = {system.pk for system in systems}
+
+        without_rules = AlertEngine(reload_interval=float("inf"))
+        without_rules.load(system_ids)
+
+        AlertRule.objects.bulk_create(
+            AlertRule(system=system, **kinds[i % len(kinds)])
+            for system in systems
+            for i in range(args.rules)
+        )
+
+        start = timezone.now()
+        calls = iter(range(10**9))
+
+        def batch():
+            # every call gets newer readings, older ones would be skipped
+            call = next(calls)
+            return [
+                Measurement(
+                    system=systems[i % len(systems)],
+                    ph=6 + (i % 20) / 10,
+                    temperature=18 + (i % 80) / 10,
+                    tds=400 + i % 200,
+                    timestamp=start + timedelta(seconds=call * args.batch + i),
+                )
+                for i in range(args.batch)
+            ]
+
+        with_rules = AlertEngine(reload_interval=float("inf"))
+        with_rules.load(system_ids)
+
+        def insert():
+            with transaction.atomic():
+                Measurement.objects.bulk_create(batch())
+                transaction.set_rollback(True)
+
+        cases = {
+            "evaluate, no rules": lambda: without_rules.evaluate(batch()),
+            f"evaluate, {args.rules} rules": lambda: with_rules.evaluate(batch()),
+            "build batch only": batch,
+            "bulk insert": insert,
+        }
+
+        print(f"{'case':<20} {'median (ms)':>12} {'p95 (ms)':>9} {'readings/s':>11}")
+        for name, case in cases.items():
+            result = summary(timeit(case, repeat=args.repeat))
+            print(
+                f"{name:<20} {result['median_ms']:>12.2f} {result['p95_ms']:>9.2f} "
+                f"{args.batch * 1000 / result['median_ms']:>11.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Time of the statistics and anomaly detection of one system: loading the
+measurements, the rolling z-score and EWMA in numpy (against a Python loop),
+the whole statistics, and the same anomalies found with window functions.
+
+    python -m benchmarks.anomalies --measurements 60480 --window 60
+"""
+
+import argparse
+from datetime import timedelta
+
+from benchmarks.base import setup, summary, test_database, timeit
+
+
+def ewma_loop(values, window):
+    alpha = 2 / (window + 1)
+    mean, variance, result = values[0], 0.0, []
+
+    for value in values:
+        result.append((mean, variance))
+        delta = value - mean
+        mean += alpha * delta
+        variance = (1 - alpha) * (variance + alpha * delta * delta)
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--database", choices=("postgresql", "sqlite"), default="postgresql"
+    )
+    parser.add_argument(
+        "--measurements", type=int, default=60480, help="a week every 10 seconds"
+    )
+    parser.add_argument("--window", type=int, default=60)
+    parser.add_argument("--threshold", type=float, default=3)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    setup(args.database)
+
+    from systems.anomalies import anomalous, describe, scores
+    from systems.downsampling import load
+    from systems.models import Measurement
+    from systems.synthetic import generate
+
+    with test_database():
+        generate(
+            users=1,
+            systems=1,
+            measurements=args.measurements,
+            interval=timedelta(seconds=10),
+        )
+        queryset = Measurement.objects.all()
+        data = load(queryset)
+        values = data["ph"].tolist()
+
+        cases = {
+            "load": lambda: load(queryset, ids=True),
+            "zscore (3 metrics)": lambda: [
+                scores(data[metric], args.window, "zscore")
+                for metric in ("ph", "temperature", "tds")
+            ],
+            "ewma (3 metrics)": lambda: [
+                scores(data[metric], args.window, "ewma")
+                for metric in ("ph", "temperature", "tds")
+            ],
+            "ewma loop (3 metrics)": lambda: [
+                ewma_loop(values, args.window) for _ in range(3)
+            ],
+            "statistics zscore": lambda: describe(
+                queryset, args.window, args.threshold
+            ),
+            "statistics ewma": lambda: describe(
+                queryset, args.window, args.threshold, "ewma"
+            ),
+            "window functions": lambda: anomalous(
+                queryset, args.window, args.threshold
+            ).count(),
+        }
+
+        anomalies = describe(queryset, args.window, args.threshold)["anomaly_count"]
+        print(f"{args.measurements} measurements, {anomalies} anomalies\n")
+        print(f"{'case':<22} {'median (ms)':>12} {'p95 (ms)':>9}")
+        for name, case in cases.items():
+            result = summary(timeit(case, repeat=args.repeat))
+            print(f"{name:<22} {result['median_ms']:>12.1f} {result['p95_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
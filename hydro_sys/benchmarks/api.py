@@ -0,0 +1,270 @@
+"""
+Latency, throughput and query counts of the systems API endpoints on a
+synthetic fleet of users x systems x measurements, on PostgreSQL or SQLite.
+Results can be saved as JSON and compared with an earlier run.
+
+    python -m benchmarks.api --users 5 --systems 10 --measurements 10000
+    python -m benchmarks.api --database sqlite --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import time
+from datetime import timedelta
+from pathlib import Path
+from urllib.parse import urlencode
+
+from benchmarks.base import seed, setup, summary, test_database
+
+
+def scenarios(owner, rng):
+    from django.urls import reverse
+    from django.utils import timezone
+    from systems.models import Measurement
+
+    systems = list(owner.systems.order_by("id"))
+    system = systems[0]
+    measurement = Measurement.objects.filter(system=system).first()
+    since = (timezone.now() - timedelta(days=1)).isoformat()
+
+    def reading():
+        return {
+            "system": rng.choice(systems).name,
+            "ph": round(rng.uniform(5.5, 7.5), 2),
+            "temperature": round(rng.uniform(18, 26), 1),
+            "tds": rng.randint(300, 900),
+        }
+
+    measurements = reverse("measurement-list")
+
+    return {
+        "systems list": ("get", reverse("hydroponic-list"), None),
+        "system detail": (
+            "get",
+            reverse("hydroponic-detail", args=[system.pk]),
+            None,
+        ),
+        "system summary": (
+            "get",
+            reverse("hydroponic-detail", args=[system.pk]) + "?summary=hour",
+            None,
+        ),
+        "system series": (
+            "get",
+            reverse("hydroponic-series", args=[system.pk]) + "?points=500",
+            None,
+        ),
+        "systems compare": (
+            "get",
+            f"{reverse('hydroponic-compare')}?"
+            + urlencode({"ids": ",".join(str(system.pk) for system in systems)}),
+            None,
+        ),
+        "measurements list": ("get", measurements, None),
+        "measurements filter": (
+            "get",
+            f"{measurements}?"
+            + urlencode({"system": system.name, "ph_min": 6, "datetime_from": since}),
+            None,
+        ),
+        "measurements page 50": ("get", f"{measurements}?page=50", None),
+        "measurement detail": (
+            "get",
+            reverse("measurement-detail", args=[measurement.pk]),
+            None,
+        ),
+        "aggregate hour": (
+            "get",
+            f"{reverse('measurement-aggregate')}?"
+            + urlencode({"bucket": "hour", "system": system.name}),
+            None,
+        ),
+        "ingest single": ("post", measurements, reading),
+        "ingest bulk 100": (
+            "post",
+            reverse("measurement-bulk"),
+            lambda: [reading() for _ in range(100)],
+        ),
+    }
+
+
+def run(client, method, url, payload, repeat, warmup):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    def request():
+        data = payload() if payload else None
+        response = getattr(client, method)(url, data, format="json")
+        if response.status_code >= 400:
+            raise SystemExit(f"{method.upper()} {url}: {response.status_code}")
+        return response
+
+    for _ in range(warmup):
+        request()
+
+    timings = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        request()
+        timings.append((time.perf_counter() - start) * 1000)
+    elapsed = time.perf_counter() - started
+
+    with CaptureQueriesContext(connection) as context:
+        status = request().status_code
+
+    return {
+        "requests_per_second": round(repeat / elapsed, 1),
+        **summary(timings),
+        "queries": len(context.captured_queries),
+        "status": status,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """
+    Prints the change of the median latency and of the query count against
+    ``baseline`` and returns the scenarios that got slower than
+    ``threshold`` or run more queries.
+    """
+    regressions = []
+
+    print(
+        f"\n{'scenario':<22} {'median before':>14} {'after':>9} {'change':>8} queries"
+    )
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+
+        change = result["median_ms"] / before["median_ms"] - 1
+        queries = f"{before['queries']} -> {result['queries']}"
+        regressed = change > threshold or result["queries"] > before["queries"]
+        if regressed:
+            regressions.append(name)
+
+        print(
+            f"{name:<22} {before['median_ms']:>14.2f} {result['median_ms']:>9.2f} "
+            f"{change:>+8.0%} {queries}{'  REGRESSION' if regressed else ''}"
+        )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--database", choices=("postgresql", "sqlite"), default="postgresql"
+    )
+    parser.add_argument("--users", type=int, default=2)
+    parser.add_argument("--systems", type=int, default=5, help="per user")
+    parser.add_argument(
+        "--measurements", type=int, default=5000, help="per system, one a minute"
+    )
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0, help="of the synthetic data")
+    parser.add_argument(
+        "--scenarios", nargs="+", help="only these scenarios (default: all)"
+    )
+    parser.add_argument(
+        "--cache", action="store_true", help="keep the response cache on"
+    )
+    parser.add_argument("--output", type=Path, help="save the results as JSON")
+    parser.add_argument("--compare", type=Path, help="results of an earlier run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="slowdown of the median reported as a regression",
+    )
+    args = parser.parse_args()
+
+    setup(args.database)
+
+    import django
+    from django.db import connection
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    rng = random.Random(args.seed)
+    overrides = {} if args.cache else {"SYSTEMS_CACHE_TIMEOUT": 0}
+    results = {}
+
+    with test_database(), override_settings(**overrides):
+        seed_start = time.perf_counter()
+        owner = seed(
+            users=args.users,
+            systems=args.systems,
+            measurements=args.measurements,
+            rng=rng,
+        )[0]
+        print(
+            f"seeded {args.users} x {args.systems} x {args.measurements} on "
+            f"{connection.vendor} in {time.perf_counter() - seed_start:.1f} s\n"
+        )
+
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(owner).access_token}"
+        )
+
+        print(
+            f"{'scenario':<22} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} "
+            f"{'p99 (ms)':>9} {'queries':>8}"
+        )
+        for name, (method, url, payload) in scenarios(owner, rng).items():
+            if args.scenarios and name not in args.scenarios:
+                continue
+
+            result = run(client, method, url, payload, args.repeat, args.warmup)
+            results[name] = result
+            print(
+                f"{name:<22} {result['requests_per_second']:>8.1f} "
+                f"{result['median_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                f"{result['p99_ms']:>9.2f} {result['queries']:>8}"
+            )
+
+        meta = {
+            "commit": git_commit(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "args": {
+                key: str(value) if isinstance(value, Path) else value
+                for key, value in vars(args).items()
+            },
+        }
+
+    if args.output:
+        args.output.write_text(
+            json.dumps({"meta": meta, "results": results}, indent=2) + "\n"
+        )
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            raise SystemExit(f"\nRegressions: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
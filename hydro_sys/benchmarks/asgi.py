@@ -0,0 +1,186 @@
+"""
+Throughput and latency of the measurement list under concurrent clients:
+the sync viewset behind gunicorn (WSGI) and uvicorn (ASGI), and the async
+view behind uvicorn. Needs PostgreSQL, the servers run as separate processes.
+
+    python -m benchmarks.asgi --concurrency 1 16 64 --duration 10
+"""
+
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.base import seed, setup, test_database
+
+SERVERS = {
+    "wsgi": [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "hydro_sys.wsgi:application",
+        "--worker-class",
+        "gthread",
+        "--workers",
+        "{workers}",
+        "--threads",
+        "{threads}",
+        "--bind",
+        "127.0.0.1:{port}",
+    ],
+    "asgi": [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "hydro_sys.asgi:application",
+        "--workers",
+        "{workers}",
+        "--port",
+        "{port}",
+        "--lifespan",
+        "off",
+    ],
+}
+SCENARIOS = {
+    "wsgi sync view": ("wsgi", "/systems/measurements/"),
+    "asgi sync view": ("asgi", "/systems/measurements/"),
+    "asgi async view": ("asgi", "/systems/async/measurements/"),
+}
+
+
+def start_server(kind, port, args, env):
+    command = [
+        part.format(port=port, workers=args.workers, threads=args.threads)
+        for part in SERVERS[kind]
+    ]
+    server = subprocess.Popen(
+        command,
+        cwd=Path(__file__).resolve().parent.parent,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            http.client.HTTPConnection("127.0.0.1", port, timeout=1).connect()
+            return server
+        except OSError:
+            time.sleep(0.2)
+
+    server.kill()
+    raise SystemExit(f"The {kind} server did not start.")
+
+
+def run_load(port, path, token, concurrency, duration):
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def client():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        local_latencies, local_errors = [], 0
+
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    local_errors += 1
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                continue
+            local_latencies.append((time.perf_counter() - start) * 1000)
+
+        with lock:
+            latencies.extend(local_latencies)
+            errors.append(local_errors)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[int(p * (len(latencies) - 1))] if latencies else 0
+
+    return {
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(0.5),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "errors": sum(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn threads")
+    parser.add_argument("--measurements", type=int, default=10000)
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    setup()
+
+    from django.db import connection
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    if connection.vendor != "postgresql":
+        raise SystemExit("The servers need a database they can share: PostgreSQL.")
+
+    with test_database() as connection:
+        owner = seed(users=1, systems=5, measurements=args.measurements)[0]
+        token = str(RefreshToken.for_user(owner).access_token)
+
+        env = dict(
+            os.environ,
+            POSTGRES_DB=connection.settings_dict["NAME"],
+            # every request has to reach the views
+            SYSTEMS_CACHE_TIMEOUT="0",
+        )
+
+        print(
+            f"{'scenario':<17} {'clients':>7} {'req/s':>8} {'p50 (ms)':>9} "
+            f"{'p95 (ms)':>9} {'p99 (ms)':>9} {'errors':>7}"
+        )
+        for port, (name, (kind, path)) in enumerate(SCENARIOS.items(), args.port):
+            server = start_server(kind, port, args, env)
+            try:
+                run_load(port, path, token, 1, 1)  # warm up
+
+                for concurrency in args.concurrency:
+                    result = run_load(port, path, token, concurrency, args.duration)
+                    print(
+                        f"{name:<17} {concurrency:>7} "
+                        f"{result['requests_per_second']:>8.1f} "
+                        f"{result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} "
+                        f"{result['p99_ms']:>9.1f} {result['errors']:>7}"
+                    )
+            finally:
+                server.terminate()
+                server.wait()
+
+        # the servers' connections must be gone before the database is dropped
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
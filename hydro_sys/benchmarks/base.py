@@ -0,0 +1,145 @@
+import os
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+import django
+
+
+def setup(database="postgresql"):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hydro_sys.settings")
+
+    if database == "sqlite":
+        from django.conf import settings
+
+        # the test database of SQLite lives in memory
+        settings.DATABASES = {
+            "default": {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": settings.BASE_DIR / "benchmark.sqlite3",
+            }
+        }
+
+    django.setup()
+
+
+@contextmanager
+def test_database(keepdb=False):
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
+
+
+def timeit(func, repeat=20, warmup=2):
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return timings
+
+
+def summary(timings):
+    timings = sorted(timings)
+
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[int(0.95 * (len(timings) - 1))], 3),
+        "p99_ms": round(timings[int(0.99 * (len(timings) - 1))], 3),
+        "mean_ms": round(statistics.mean(timings), 3),
+        "min_ms": round(timings[0], 3),
+    }
+
+
+def readings(count, rng=None):
+    """
+    pH, temperature and TDS of ``count`` readings: a sawtooth without ``rng``,
+    otherwise a random walk around typical set points.
+    """
+    if rng is None:
+        for i in range(count):
+            yield 6 + (i % 20) / 10, 18 + (i % 80) / 10, 400 + i % 200
+        return
+
+    ph, temperature, tds = 6.0, 21.0, 500.0
+    for _ in range(count):
+        ph = min(max(ph + rng.gauss(0, 0.02), 4), 9)
+        temperature = min(max(temperature + rng.gauss(0, 0.05), 10), 35)
+        tds = min(max(tds + rng.gauss(0, 2), 100), 1500)
+        yield round(ph, 2), round(temperature, 1), round(tds)
+
+
+def seed(
+    users=2,
+    systems=5,
+    measurements=1000,
+    interval=timedelta(minutes=1),
+    rng=None,
+    rollups=True,
+):
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.utils import timezone
+    from systems.models import HydroponicSystem, Measurement
+    from systems.rollups import rebuild
+
+    User = get_user_model()
+    now = timezone.now()
+    types = [value for value, _ in HydroponicSystem.types]
+    owners, system_ids = [], []
+
+    for u in range(users):
+        owner = User.objects.create_user(
+            username=f"bench_user_{u}",
+            email=f"bench_user_{u}@email.com",
+            password="bench_pass",
+            phone_number=f"{u:09d}",
+        )
+        owners.append(owner)
+
+        for s in range(systems):
+            system = HydroponicSystem.objects.create(
+                name=f"Bench System {u}-{s}",
+                owner=owner,
+                type=types[s % len(types)] if rng else "NFT",
+            )
+            system_ids.append(system.pk)
+            Measurement.objects.bulk_create(
+                (
+                    Measurement(
+                        system=system,
+                        ph=ph,
+                        temperature=temperature,
+                        tds=tds,
+                        timestamp=now - i * interval,
+                    )
+                    for i, (ph, temperature, tds) in enumerate(
+                        readings(measurements, rng)
+                    )
+                ),
+                batch_size=5000,
+            )
+
+    # bulk_create sends no signal, the aggregates read the rollups
+    if rollups:
+        rebuild(system_ids=system_ids)
+
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    return owners
@@ -0,0 +1,72 @@
+"""
+CPU cost against bytes saved when rendering and compressing measurement pages:
+the stdlib and the orjson JSON renderers, then every available coding at the
+level the compression middleware uses.
+
+    python -m benchmarks.compression --rows 10 100 1000
+"""
+
+import argparse
+
+from benchmarks.base import seed, setup, summary, test_database, timeit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+
+    from rest_framework.renderers import JSONRenderer
+    from hydro_sys.compression import available_codecs
+    from systems.models import Measurement
+    from systems.renderers import FastJSONRenderer, orjson
+    from systems.serializers import MeasurementRowSerializer
+
+    renderers = {"json": JSONRenderer()}
+    if orjson is not None:
+        renderers["orjson"] = FastJSONRenderer()
+    codecs = [codec() for codec in available_codecs().values()]
+
+    with test_database():
+        seed(users=1, systems=1, measurements=max(args.rows))
+        queryset = MeasurementRowSerializer.values(
+            Measurement.objects.order_by("-timestamp")
+        )
+
+        print(
+            f"{'rows':>6} {'case':<16} {'median (ms)':>12} {'size (B)':>10} "
+            f"{'saved (B)':>10} {'us per kB saved':>16}"
+        )
+        for rows in args.rows:
+            data = {
+                "count": rows,
+                "next": None,
+                "previous": None,
+                "results": MeasurementRowSerializer(list(queryset[:rows])).data,
+            }
+            for name, renderer in renderers.items():
+                result = summary(
+                    timeit(lambda: renderer.render(data), repeat=args.repeat)
+                )
+                size = len(renderer.render(data))
+                print(f"{rows:>6} {name:<16} {result['median_ms']:>12.3f} {size:>10}")
+
+            content = renderers["json"].render(data)
+            for codec in codecs:
+                result = summary(
+                    timeit(lambda: codec.compress(content), repeat=args.repeat)
+                )
+                saved = len(content) - len(codec.compress(content))
+                cost = result["median_ms"] * 1000 / (saved / 1024) if saved > 0 else 0
+                print(
+                    f"{rows:>6} {codec.encoding + ' ' + str(codec.level):<16} "
+                    f"{result['median_ms']:>12.3f} {len(content) - saved:>10} "
+                    f"{saved:>10} {cost:>16.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
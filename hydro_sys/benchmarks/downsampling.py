@@ -0,0 +1,76 @@
+"""
+Time and response size of the downsampled series of one system: loading the
+measurements, LTTB and the min/max envelope, against the full series.
+
+    python -m benchmarks.downsampling --measurements 60480 --points 1000
+"""
+
+import argparse
+from datetime import timedelta
+
+from benchmarks.base import seed, setup, summary, test_database, timeit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--measurements", type=int, default=60480, help="a week every 10 seconds"
+    )
+    parser.add_argument("--points", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    setup()
+
+    from rest_framework.renderers import JSONRenderer
+    from systems.downsampling import downsample, lttb, load, minmax
+    from systems.models import Measurement
+    from systems.serializers import MeasurementRowSerializer
+
+    renderer = JSONRenderer()
+
+    with test_database():
+        seed(
+            users=1,
+            systems=1,
+            measurements=args.measurements,
+            interval=timedelta(seconds=10),
+        )
+        queryset = Measurement.objects.all()
+        data = load(queryset)
+
+        def full():
+            rows = MeasurementRowSerializer.values(queryset.order_by("timestamp"))
+            return renderer.render(MeasurementRowSerializer(rows).data)
+
+        def downsampled(method):
+            return renderer.render(downsample(queryset, args.points, method)[1])
+
+        cases = {
+            "load": lambda: load(queryset),
+            "lttb (3 metrics)": lambda: [
+                lttb(data["timestamp"], data[metric], args.points)
+                for metric in ("ph", "temperature", "tds")
+            ],
+            "minmax (3 metrics)": lambda: [
+                minmax(data[metric], args.points)
+                for metric in ("ph", "temperature", "tds")
+            ],
+            "lttb response": lambda: downsampled("lttb"),
+            "minmax response": lambda: downsampled("minmax"),
+            "full response": full,
+        }
+
+        print(f"{'case':<20} {'median (ms)':>12} {'p95 (ms)':>9} {'size (kB)':>10}")
+        for name, case in cases.items():
+            result = summary(timeit(case, repeat=args.repeat))
+            output = case()
+            size = f"{len(output) / 1024:>10.0f}" if isinstance(output, bytes) else ""
+            print(
+                f"{name:<20} {result['median_ms']:>12.1f} "
+                f"{result['p95_ms']:>9.1f} {size:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Query plans and latency of the measurement list paths with the indexes
+declared on Measurement.Meta ("after") and with only the foreign key index
+Measurement.system used to have ("before").
+
+    python -m benchmarks.indexes --users 5 --systems 20 --measurements 20000
+"""
+
+import argparse
+from datetime import timedelta
+
+from benchmarks.base import seed, setup, summary, test_database, timeit
+
+
+def queries(owner):
+    from django.utils import timezone
+    from systems.models import Measurement
+
+    system = owner.systems.first()
+    end = timezone.now() - timedelta(hours=1)
+    start = end - timedelta(hours=6)
+    owned = Measurement.objects.filter(system__owner=owner)
+
+    return {
+        "owner list page": owned.order_by("-timestamp")[:10],
+        "owner time range": owned.filter(
+            timestamp__gte=start, timestamp__lte=end
+        ).order_by("-timestamp")[:10],
+        "system time range": Measurement.objects.filter(
+            system=system, timestamp__gte=start, timestamp__lte=end
+        ).order_by("-timestamp")[:10],
+        "system latest": Measurement.objects.filter(system=system).order_by(
+            "-timestamp"
+        )[:1],
+    }
+
+
+def explain(queryset, connection):
+    if connection.vendor == "postgresql":
+        return queryset.explain(analyze=True, buffers=True)
+
+    return queryset.explain()
+
+
+def measure(owner, connection, repeat):
+    results = {}
+
+    for name, queryset in queries(owner).items():
+        results[name] = {
+            "plan": explain(queryset, connection),
+            **summary(timeit(lambda: list(queryset.all()), repeat=repeat)),
+        }
+
+    return results
+
+
+def with_old_indexes(connection, callback):
+    """
+    Runs ``callback`` with the indexes of Measurement.Meta replaced by the
+    single-column index of the foreign key, as before migration 0007, and
+    rolls the change back.
+    """
+    from django.db import transaction
+    from systems.models import Measurement
+
+    class Rollback(Exception):
+        pass
+
+    quote = connection.ops.quote_name
+    table = Measurement._meta.db_table
+    column = Measurement._meta.get_field("system").column
+    result = {}
+
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for index in Measurement._meta.indexes:
+                    cursor.execute(f"DROP INDEX {quote(index.name)}")
+
+                cursor.execute(
+                    f"CREATE INDEX {quote(f'{table}_{column}_before')} "
+                    f"ON {quote(table)} ({quote(column)})"
+                )
+
+            result.update(callback())
+            raise Rollback
+    except Rollback:
+        pass
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--systems", type=int, default=10)
+    parser.add_argument("--measurements", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--plans", action="store_true", help="Print query plans")
+    args = parser.parse_args()
+
+    setup()
+
+    with test_database() as connection:
+        owner = seed(args.users, args.systems, args.measurements)[0]
+
+        before = with_old_indexes(
+            connection, lambda: measure(owner, connection, args.repeat)
+        )
+        after = measure(owner, connection, args.repeat)
+
+    print(f"{'query':<20} {'before (ms)':>12} {'after (ms)':>12} {'speedup':>8}")
+    for name in after:
+        old, new = before[name]["median_ms"], after[name]["median_ms"]
+        print(f"{name:<20} {old:>12.3f} {new:>12.3f} {old / new:>7.1f}x")
+
+        if args.plans:
+            print(
+                f"\n  before:\n{before[name]['plan']}\n  after:\n{after[name]['plan']}\n"
+            )
+
+
+if __name__ == "__main__":
+    main()
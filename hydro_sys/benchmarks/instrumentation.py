@@ -0,0 +1,56 @@
+"""
+Overhead of the request instrumentation: the measurement list served without
+the middleware, with it and no sampled requests, and with every request
+sampled.
+
+    python -m benchmarks.instrumentation --measurements 1000 --repeat 200
+"""
+
+import argparse
+
+from benchmarks.base import seed, setup, summary, test_database, timeit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--measurements", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    setup()
+
+    from django.conf import settings
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    middleware = "hydro_sys.instrumentation.InstrumentationMiddleware"
+    without = [name for name in settings.MIDDLEWARE if name != middleware]
+    cases = {
+        "no middleware": {"MIDDLEWARE": without},
+        "sample rate 0": {"INSTRUMENTATION_SAMPLE_RATE": 0},
+        "sample rate 0.1": {"INSTRUMENTATION_SAMPLE_RATE": 0.1},
+        "sample rate 1": {"INSTRUMENTATION_SAMPLE_RATE": 1},
+    }
+
+    with test_database():
+        (owner,) = seed(users=1, systems=1, measurements=args.measurements)
+        token = RefreshToken.for_user(owner).access_token
+
+        print(f"{'case':<18} {'median (ms)':>12} {'p95 (ms)':>9}")
+        for name, overrides in cases.items():
+            with override_settings(ALLOWED_HOSTS=["testserver"], **overrides):
+                # a new client loads the middleware of the current settings
+                client = APIClient()
+                client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+                result = summary(
+                    timeit(
+                        lambda: client.get("/systems/measurements/"),
+                        repeat=args.repeat,
+                    )
+                )
+            print(f"{name:<18} {result['median_ms']:>12.3f} {result['p95_ms']:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
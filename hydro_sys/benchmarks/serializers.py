@@ -0,0 +1,82 @@
+"""
+Serialization throughput of a 10k-row measurement page: MeasurementSerializer
+against the values()-based MeasurementRowSerializer, both rendered to JSON,
+and the size and speed of the columnar JSON and MessagePack formats.
+
+    python -m benchmarks.serializers --rows 10000
+"""
+
+import argparse
+
+from benchmarks.base import seed, setup, summary, test_database, timeit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    setup()
+
+    from rest_framework.renderers import JSONRenderer
+    from systems.models import Measurement
+    from systems.renderers import ColumnarJSONRenderer, ColumnarMessagePackRenderer
+    from systems.renderers import msgpack
+    from systems.serializers import (
+        MeasurementColumnSerializer,
+        MeasurementRowSerializer,
+        MeasurementSerializer,
+    )
+
+    renderer = JSONRenderer()
+    columnar_renderer = ColumnarJSONRenderer()
+
+    with test_database():
+        seed(users=1, systems=1, measurements=args.rows)
+
+        queryset = Measurement.objects.select_related("system").order_by("-timestamp")
+        instances = list(queryset)
+        rows = list(MeasurementRowSerializer.values(queryset))
+
+        if renderer.render(MeasurementSerializer(instances, many=True).data) != (
+            renderer.render(MeasurementRowSerializer(rows).data)
+        ):
+            raise SystemExit("The outputs of the serializers differ.")
+
+        cases = {
+            "serializer": lambda: renderer.render(
+                MeasurementSerializer(instances, many=True).data
+            ),
+            "rows": lambda: renderer.render(MeasurementRowSerializer(rows).data),
+            "serializer + query": lambda: renderer.render(
+                MeasurementSerializer(queryset.all(), many=True).data
+            ),
+            "rows + query": lambda: renderer.render(
+                MeasurementRowSerializer(MeasurementRowSerializer.values(queryset)).data
+            ),
+            "columns json": lambda: columnar_renderer.render(
+                MeasurementColumnSerializer(rows).data
+            ),
+        }
+        if msgpack is not None:
+            msgpack_renderer = ColumnarMessagePackRenderer()
+            cases["columns msgpack"] = lambda: msgpack_renderer.render(
+                MeasurementColumnSerializer(rows).data
+            )
+
+        print(
+            f"{'case':<20} {'median (ms)':>12} {'pages/s':>9} {'rows/s':>11} "
+            f"{'size (kB)':>10}"
+        )
+        for name, case in cases.items():
+            result = summary(timeit(case, repeat=args.repeat))
+            per_second = 1000 / result["median_ms"]
+            print(
+                f"{name:<20} {result['median_ms']:>12.1f} {per_second:>9.1f} "
+                f"{per_second * args.rows:>11.0f} {len(case()) / 1024:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
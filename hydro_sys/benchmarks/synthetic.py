@@ -0,0 +1,69 @@
+"""
+Rows per second of the synthetic data generator (generate_synthetic_data)
+with one and several worker processes, against the ORM loop of
+benchmarks.base.seed().
+
+    python -m benchmarks.synthetic --systems 8 --measurements 100000 --workers 8
+"""
+
+import argparse
+import os
+import time
+
+from benchmarks.base import seed, setup, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--database", choices=("postgresql", "sqlite"), default="postgresql"
+    )
+    parser.add_argument("--systems", type=int, default=8)
+    parser.add_argument("--measurements", type=int, default=100000, help="per system")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    setup(args.database)
+
+    from django.db import connection
+    from systems.models import Measurement
+    from systems.synthetic import generate
+
+    total = args.systems * args.measurements
+    cases = {
+        "orm seed()": lambda: seed(
+            users=1,
+            systems=args.systems,
+            measurements=args.measurements,
+            rollups=False,
+        ),
+        "generate, 1 worker": lambda: generate(
+            users=1,
+            systems=args.systems,
+            measurements=args.measurements,
+            prefix="one",
+        ),
+    }
+    # the SQLite test database lives in memory, out of reach of other processes
+    if args.database == "postgresql" and args.workers > 1:
+        cases[f"generate, {args.workers} workers"] = lambda: generate(
+            users=1,
+            systems=args.systems,
+            measurements=args.measurements,
+            workers=args.workers,
+            prefix="many",
+        )
+
+    with test_database():
+        print(f"{total} measurements on {connection.vendor}\n")
+        print(f"{'case':<22} {'seconds':>8} {'rows/s':>10}")
+        for name, case in cases.items():
+            start = time.perf_counter()
+            case()
+            elapsed = time.perf_counter() - start
+            print(f"{name:<22} {elapsed:>8.2f} {total / elapsed:>10.0f}")
+            Measurement.objects.all().delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -13,4 +13,31 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hydro_sys.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from asgiref.sync import sync_to_async  # noqa: E402
+from systems.streams import websocket_application  # noqa: E402
+from systems.writebehind import shutdown, startup  # noqa: E402
+
+
+async def lifespan(scope, receive, send):
+    while True:
+        message = await receive()
+
+        if message["type"] == "lifespan.startup":
+            await sync_to_async(startup)()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            # write the queued measurements before the server exits
+            await sync_to_async(shutdown)()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(scope, receive, send)
+    if scope["type"] == "websocket":
+        return await websocket_application(scope, receive, send)
+
+    return await django_application(scope, receive, send)
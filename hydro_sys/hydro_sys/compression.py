@@ -0,0 +1,210 @@
+import zlib
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class GzipCodec:
+    encoding = "gzip"
+    level = 6
+
+    def compress(self, data):
+        compressor = self.compressor()
+        return compressor.compress(data) + compressor.finish()
+
+    def compressor(self):
+        return GzipCompressor(self.level)
+
+
+class GzipCompressor:
+    def __init__(self, level):
+        self.compressobj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        # every chunk is flushed, so streams reach the client as they are sent
+        return self.compressobj.compress(data) + self.compressobj.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self):
+        return self.compressobj.flush()
+
+
+class ZstdCodec:
+    encoding = "zstd"
+    level = 3
+
+    def compress(self, data):
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def compressor(self):
+        return ZstdCompressor(self.level)
+
+
+class ZstdCompressor:
+    def __init__(self, level):
+        self.compressobj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self.compressobj.compress(data) + self.compressobj.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self):
+        return self.compressobj.flush()
+
+
+class BrotliCodec:
+    encoding = "br"
+    level = 4
+
+    def compress(self, data):
+        return brotli.compress(data, quality=self.level)
+
+    def compressor(self):
+        return BrotliCompressor(self.level)
+
+
+class BrotliCompressor:
+    def __init__(self, level):
+        self.compressobj = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self.compressobj.process(data) + self.compressobj.flush()
+
+    def finish(self):
+        return self.compressobj.finish()
+
+
+def available_codecs():
+    codecs = {"gzip": GzipCodec}
+    if zstandard is not None:
+        codecs["zstd"] = ZstdCodec
+    if brotli is not None:
+        codecs["br"] = BrotliCodec
+
+    return codecs
+
+
+def parse_accept_encoding(header):
+    """
+    Returns the quality of every coding listed in an Accept-Encoding header.
+    """
+    qualities = {}
+
+    for item in header.split(","):
+        coding, *params = item.strip().split(";")
+        quality = 1.0
+
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        if coding:
+            qualities[coding.strip().lower()] = quality
+
+    return qualities
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compresses responses with the first coding of COMPRESSION_ENCODINGS that
+    the client accepts: zstd and brotli when ``zstandard`` and ``brotli`` are
+    installed, gzip always. Responses shorter than COMPRESSION_MIN_SIZE bytes
+    are sent as they are. Streaming responses are compressed chunk by chunk
+    and every chunk is flushed; server-sent events are not compressed.
+    """
+
+    excluded_content_types = ("text/event-stream",)
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+
+        self.codecs = {
+            encoding: codec() for encoding, codec in available_codecs().items()
+        }
+
+    def get_codec(self, request):
+        qualities = parse_accept_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        default = qualities.get("*", 0)
+
+        for encoding in settings.COMPRESSION_ENCODINGS:
+            if encoding in self.codecs and qualities.get(encoding, default) > 0:
+                return self.codecs[encoding]
+
+        return None
+
+    def process_response(self, request, response):
+        if (
+            not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+        if response.has_header("Content-Encoding"):
+            return response
+        if response.get("Content-Type", "").startswith(self.excluded_content_types):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        codec = self.get_codec(request)
+        if codec is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self.compress_async(
+                    codec, response.streaming_content
+                )
+            else:
+                response.streaming_content = self.compress_sequence(
+                    codec, response.streaming_content
+                )
+            del response.headers["Content-Length"]
+        else:
+            compressed = codec.compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # a strong ETag would promise the same bytes in every encoding
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = codec.encoding
+
+        return response
+
+    def compress_sequence(self, codec, chunks):
+        compressor = codec.compressor()
+
+        for chunk in chunks:
+            if data := compressor.compress(chunk):
+                yield data
+
+        yield compressor.finish()
+
+    async def compress_async(self, codec, chunks):
+        compressor = codec.compressor()
+
+        async for chunk in chunks:
+            if data := compressor.compress(chunk):
+                yield data
+
+        yield compressor.finish()
@@ -0,0 +1,404 @@
+import logging
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import Http404, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+current = ContextVar("request_metrics", default=None)
+
+
+def fingerprint(sql):
+    """
+    The shape of a query: literals and parameters replaced by ``?`` and
+    lists of them collapsed, so the same query with other values matches.
+    """
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"%s|\b\d+(?:\.\d+)?\b", "?", sql)
+    sql = re.sub(r"\(\s*\?(?:\s*,\s*\?)*\s*\)", "(...)", sql)
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+class RequestMetrics:
+    """
+    Timings of one sampled request. Phases are exclusive: ``auth`` includes
+    the queries run to authenticate, ``db`` the other queries, ``serialize``
+    the rest of the view and ``other`` everything else (middleware, routing,
+    permission checks).
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.duplicates = 0
+        self.db_time = 0.0
+        self.statements = defaultdict(lambda: [0, 0.0])
+        self.seen = set()
+        self.auth = self.handler = self.render = 0.0
+        self.db_auth = self.db_handler = 0.0
+        self.handler_start = self.render_start = None
+
+    def add_query(self, sql, params, many, duration):
+        self.queries += 1
+        self.db_time += duration
+
+        statement = self.statements[sql]
+        statement[0] += 1
+        statement[1] += duration
+
+        if not many:
+            try:
+                key = hash((sql, tuple(params or ())))
+            except TypeError:
+                return
+            if key in self.seen:
+                self.duplicates += 1
+            self.seen.add(key)
+
+    def start_auth(self):
+        return time.perf_counter(), self.db_time
+
+    def end_auth(self, mark):
+        self.auth += time.perf_counter() - mark[0]
+        self.db_auth += self.db_time - mark[1]
+
+    def start_handler(self):
+        self.handler_start = time.perf_counter(), self.db_time
+
+    def end_handler(self):
+        if self.handler_start is not None:
+            self.handler += time.perf_counter() - self.handler_start[0]
+            self.db_handler += self.db_time - self.handler_start[1]
+            self.handler_start = None
+
+    def start_render(self):
+        self.render_start = time.perf_counter()
+
+    def end_render(self):
+        if self.render_start is not None:
+            self.render += time.perf_counter() - self.render_start
+            self.render_start = None
+
+    def phases(self, duration):
+        serialize = max(self.handler - self.db_handler, 0.0)
+        db = self.db_time - self.db_auth
+        other = duration - self.auth - db - serialize - self.render
+
+        return {
+            "auth": self.auth,
+            "db": db,
+            "serialize": serialize,
+            "render": self.render,
+            "other": max(other, 0.0),
+        }
+
+    def top_statements(self, limit=5):
+        fingerprints = defaultdict(lambda: [0, 0.0])
+
+        for sql, (count, duration) in self.statements.items():
+            totals = fingerprints[fingerprint(sql)]
+            totals[0] += count
+            totals[1] += duration
+
+        return sorted(fingerprints.items(), key=lambda item: -item[1][1])[:limit]
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current.get()
+
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, params, many, time.perf_counter() - start)
+
+
+def install(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(connection_created, dispatch_uid="instrumentation_connection_created")
+def connection_created_receiver(sender, connection, **kwargs):
+    install(connection)
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Registry:
+    """
+    Metrics of the requests handled by this process, in the Prometheus text
+    format.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = defaultdict(int)
+            self.durations = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+            self.duration_sums = defaultdict(float)
+            self.duration_counts = defaultdict(int)
+            self.sampled = defaultdict(int)
+            self.phase_sums = defaultdict(float)
+            self.queries = defaultdict(int)
+            self.duplicates = defaultdict(int)
+
+    def observe(self, endpoint, method, status, duration, phases=None, metrics=None):
+        key = (endpoint, method)
+
+        with self.lock:
+            self.requests[(endpoint, method, status)] += 1
+            self.duration_sums[key] += duration
+            self.duration_counts[key] += 1
+
+            buckets = self.durations[key]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    buckets[i] += 1
+
+            if metrics is not None:
+                self.sampled[key] += 1
+                self.queries[key] += metrics.queries
+                self.duplicates[key] += metrics.duplicates
+                for phase, value in phases.items():
+                    self.phase_sums[(endpoint, method, phase)] += value
+
+    def render(self):
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                text = ",".join(f'{key}="{escape(val)}"' for key, val in labels)
+                lines.append(f"{name}{suffix}{{{text}}} {value}")
+
+        def by_endpoint(values):
+            return [
+                ("", (("endpoint", e), ("method", m)), value)
+                for (e, m), value in sorted(values.items())
+            ]
+
+        with self.lock:
+            family(
+                "hydro_sys_requests_total",
+                "counter",
+                "Requests handled.",
+                [
+                    ("", (("endpoint", e), ("method", m), ("status", s)), count)
+                    for (e, m, s), count in sorted(self.requests.items())
+                ],
+            )
+
+            durations = []
+            for (e, m), buckets in sorted(self.durations.items()):
+                labels = (("endpoint", e), ("method", m))
+                count = self.duration_counts[e, m]
+                for bound, value in zip(DURATION_BUCKETS, buckets):
+                    durations.append(("_bucket", labels + (("le", bound),), value))
+                durations.append(("_bucket", labels + (("le", "+Inf"),), count))
+                durations.append(("_sum", labels, self.duration_sums[e, m]))
+                durations.append(("_count", labels, count))
+            family(
+                "hydro_sys_request_duration_seconds",
+                "histogram",
+                "Time to produce the response.",
+                durations,
+            )
+
+            family(
+                "hydro_sys_sampled_requests_total",
+                "counter",
+                "Requests whose phases and queries were recorded.",
+                by_endpoint(self.sampled),
+            )
+            family(
+                "hydro_sys_request_phase_seconds_total",
+                "counter",
+                "Time spent per phase by the sampled requests.",
+                [
+                    ("", (("endpoint", e), ("method", m), ("phase", p)), total)
+                    for (e, m, p), total in sorted(self.phase_sums.items())
+                ],
+            )
+            family(
+                "hydro_sys_db_queries_total",
+                "counter",
+                "Queries run by the sampled requests.",
+                by_endpoint(self.queries),
+            )
+            family(
+                "hydro_sys_db_duplicate_queries_total",
+                "counter",
+                "Queries repeated with the same SQL and parameters within a "
+                "sampled request.",
+                by_endpoint(self.duplicates),
+            )
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class InstrumentationMiddleware:
+    """
+    Records the duration of every request and, for a share of them
+    (INSTRUMENTATION_SAMPLE_RATE), the time spent authenticating, querying,
+    serializing and rendering, the number of queries and of duplicate
+    queries. Sampled requests slower than INSTRUMENTATION_SLOW_REQUEST_MS
+    are logged with their most expensive SQL fingerprints. Place it first,
+    so the duration includes the other middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+        # connections opened before the middleware was loaded
+        for connection in connections.all(initialized_only=True):
+            install(connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        start, metrics, token = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+
+        self.finish(request, response, start, metrics)
+        return response
+
+    async def __acall__(self, request):
+        start, metrics, token = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+
+        self.finish(request, response, start, metrics)
+        return response
+
+    def start(self):
+        start = time.perf_counter()
+        sampled = random.random() < settings.INSTRUMENTATION_SAMPLE_RATE
+        metrics = RequestMetrics() if sampled else None
+
+        return start, metrics, current.set(metrics)
+
+    def process_template_response(self, request, response):
+        metrics = current.get()
+
+        if metrics is not None:
+            metrics.end_handler()
+            metrics.start_render()
+            response.add_post_render_callback(lambda response: metrics.end_render())
+
+        return response
+
+    def finish(self, request, response, start, metrics):
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        endpoint = (match.view_name or match.route) if match else "unmatched"
+        phases = metrics.phases(duration) if metrics is not None else None
+
+        registry.observe(
+            endpoint,
+            request.method,
+            response.status_code,
+            duration,
+            phases,
+            metrics,
+        )
+
+        slow = settings.INSTRUMENTATION_SLOW_REQUEST_MS
+        if metrics is not None and slow and duration * 1000 >= slow:
+            self.log_slow_request(request, response, duration, phases, metrics)
+
+    def log_slow_request(self, request, response, duration, phases, metrics):
+        statements = "".join(
+            f"\n  {count} x {total * 1000:.1f} ms: {sql}"
+            for sql, (count, total) in metrics.top_statements()
+        )
+        logger.warning(
+            "Slow request %s %s (%s): %.1f ms, %s, %d queries (%d duplicates)%s",
+            request.method,
+            request.path,
+            response.status_code,
+            duration * 1000,
+            ", ".join(
+                f"{phase} {value * 1000:.1f} ms" for phase, value in phases.items()
+            ),
+            metrics.queries,
+            metrics.duplicates,
+            statements,
+        )
+
+
+class InstrumentedViewMixin:
+    """
+    Marks the authentication and the handler of a DRF view in the metrics
+    of sampled requests.
+    """
+
+    def perform_authentication(self, request):
+        metrics = current.get()
+
+        if metrics is None:
+            return super().perform_authentication(request)
+
+        mark = metrics.start_auth()
+        try:
+            super().perform_authentication(request)
+        finally:
+            metrics.end_auth(mark)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        metrics = current.get()
+        if metrics is not None:
+            metrics.start_handler()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        metrics = current.get()
+        if metrics is not None:
+            metrics.end_handler()
+
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+def metrics_view(request):
+    # only for scrapers on the same host
+    if request.META.get("REMOTE_ADDR") not in settings.INSTRUMENTATION_METRICS_IPS:
+        raise Http404()
+
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
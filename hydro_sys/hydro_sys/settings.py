@@ -49,7 +49,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "hydro_sys.instrumentation.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "hydro_sys.compression.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -93,6 +95,91 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "hydro-sys"),
+    }
+}
+
+# Seconds the responses of the systems API are cached for; entries are also
+# invalidated as soon as the underlying systems or measurements change.
+SYSTEMS_CACHE_TIMEOUT = int(os.getenv("SYSTEMS_CACHE_TIMEOUT", 60))
+
+# Seconds the user of a verified access token is cached for, so authenticated
+# requests skip the user query. Saving a user drops its entry, 0 disables it.
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv("AUTH_USER_CACHE_TIMEOUT", 60))
+
+# Live measurement streams (server-sent events and WebSockets, ASGI only).
+# The broker class is pluggable; the default one only reaches the clients
+# connected to the same process.
+MEASUREMENT_BROKER = os.getenv("MEASUREMENT_BROKER", "systems.broker.InProcessBroker")
+MEASUREMENT_STREAM_QUEUE_SIZE = int(os.getenv("MEASUREMENT_STREAM_QUEUE_SIZE", 100))
+MEASUREMENT_STREAM_KEEPALIVE = int(os.getenv("MEASUREMENT_STREAM_KEEPALIVE", 15))
+
+# Write-behind mode: POST /systems/measurements/ answers 202 Accepted once the
+# reading is queued, a background thread inserts the queue in batches. With a
+# spool path the queue survives crashes (every process writes <path>.<pid>),
+# fsync makes every write durable.
+MEASUREMENT_WRITE_BEHIND = bool(int(os.getenv("MEASUREMENT_WRITE_BEHIND", 0)))
+MEASUREMENT_WRITE_BEHIND_BATCH_SIZE = int(
+    os.getenv("MEASUREMENT_WRITE_BEHIND_BATCH_SIZE", 500)
+)
+MEASUREMENT_WRITE_BEHIND_FLUSH_INTERVAL = float(
+    os.getenv("MEASUREMENT_WRITE_BEHIND_FLUSH_INTERVAL", 1)
+)
+MEASUREMENT_WRITE_BEHIND_MAX_SIZE = int(
+    os.getenv("MEASUREMENT_WRITE_BEHIND_MAX_SIZE", 10000)
+)
+MEASUREMENT_WRITE_BEHIND_SPOOL = os.getenv("MEASUREMENT_WRITE_BEHIND_SPOOL", "")
+MEASUREMENT_WRITE_BEHIND_FSYNC = bool(
+    int(os.getenv("MEASUREMENT_WRITE_BEHIND_FSYNC", 0))
+)
+
+# Measurements are partitioned by month on PostgreSQL, partitions are created
+# this many months ahead. Older measurements are removed by
+# `manage.py prune_measurements`, 0 keeps them forever.
+MEASUREMENT_PARTITIONS_AHEAD = int(os.getenv("MEASUREMENT_PARTITIONS_AHEAD", 3))
+MEASUREMENT_RETENTION_MONTHS = int(os.getenv("MEASUREMENT_RETENTION_MONTHS", 0))
+
+# Alert rules are evaluated as measurements are saved; alerts are delivered by
+# this notifier class. Rules are reloaded this often (seconds) to pick up
+# changes made in other processes.
+ALERT_NOTIFIER = os.getenv("ALERT_NOTIFIER", "systems.alerts.LogNotifier")
+ALERT_RULES_RELOAD_INTERVAL = int(os.getenv("ALERT_RULES_RELOAD_INTERVAL", 60))
+
+# Responses of at least COMPRESSION_MIN_SIZE bytes are compressed with the
+# first of these codings the client accepts. zstd and br need the zstandard
+# and brotli packages and are skipped without them; an empty list disables
+# compression.
+COMPRESSION_ENCODINGS = [
+    encoding.strip()
+    for encoding in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",")
+    if encoding.strip()
+]
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+
+# Readings further than ANOMALY_THRESHOLD standard deviations from the mean of
+# the ANOMALY_WINDOW readings before them are anomalies: the defaults of the
+# system statistics and the window of the measurement list's ?anomaly= filter.
+ANOMALY_WINDOW = int(os.getenv("ANOMALY_WINDOW", 60))
+ANOMALY_THRESHOLD = float(os.getenv("ANOMALY_THRESHOLD", 3))
+
+# Every request is counted and timed; this share of them also records the
+# time per phase (auth, db, serialize, render) and the queries. Sampled
+# requests slower than INSTRUMENTATION_SLOW_REQUEST_MS are logged with their
+# SQL, 0 turns the log off. /metrics/ is served to these addresses only.
+INSTRUMENTATION_SAMPLE_RATE = float(os.getenv("INSTRUMENTATION_SAMPLE_RATE", 0.1))
+INSTRUMENTATION_SLOW_REQUEST_MS = float(os.getenv("INSTRUMENTATION_SLOW_REQUEST_MS", 0))
+INSTRUMENTATION_METRICS_IPS = os.getenv(
+    "INSTRUMENTATION_METRICS_IPS", "127.0.0.1,::1"
+).split(",")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -142,9 +229,12 @@ from datetime import timedelta
 
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
-    "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    ),
+    "DEFAULT_AUTHENTICATION_CLASSES": ("users.authentication.CachedJWTAuthentication",),
+    "DEFAULT_RENDERER_CLASSES": os.getenv(
+        "API_RENDERER_CLASSES",
+        "rest_framework.renderers.JSONRenderer,"
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ).split(","),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
 }
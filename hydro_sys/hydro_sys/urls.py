@@ -21,6 +21,7 @@ from rest_framework import permissions
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
+from .instrumentation import metrics_view
 
 schema_view = get_schema_view(
     openapi.Info(title="Hydroponic Management System", default_version="v1"),
@@ -39,4 +40,5 @@ urlpatterns = [
         name="schema-swagger-ui",
     ),
     path("redoc/", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
+    path("metrics/", metrics_view, name="metrics"),
 ]
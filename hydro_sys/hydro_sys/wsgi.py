@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hydro_sys.settings")
 
 application = get_wsgi_application()
+
+from systems.writebehind import startup  # noqa: E402
+
+startup()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import HydroponicSystem, Measurement
+from .models import Alert, AlertRule, HydroponicSystem, Measurement
 
 
 @admin.register(HydroponicSystem)
@@ -37,3 +37,34 @@ class MeasurementAdmin(admin.ModelAdmin):
     )
 
     readonly_fields = ("timestamp",)
+
+
+@admin.register(AlertRule)
+class AlertRuleAdmin(admin.ModelAdmin):
+    list_display = (
+        "system",
+        "metric",
+        "kind",
+        "min_value",
+        "max_value",
+        "max_rate",
+        "duration",
+        "enabled",
+        "firing_since",
+    )
+    search_fields = ("system__name",)
+    list_filter = ("metric", "kind", "enabled")
+    ordering = ("-timestamp",)
+
+    readonly_fields = ("firing_since", "timestamp")
+
+
+@admin.register(Alert)
+class AlertAdmin(admin.ModelAdmin):
+    list_display = ("rule", "state", "value", "measured_at", "message")
+    search_fields = ("rule__system__name", "message")
+    list_filter = ("state", "measured_at")
+    ordering = ("-timestamp",)
+    date_hierarchy = "timestamp"
+
+    readonly_fields = ("timestamp",)
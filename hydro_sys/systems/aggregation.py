@@ -0,0 +1,89 @@
+from django.db.models import Avg, Count, F, Max, Min, OuterRef, Q, StdDev, Subquery
+from django.db.models.functions import TruncDay, TruncHour, TruncMinute
+from .rollups import RESOLUTIONS, ceil, statistics, truncate
+
+BUCKETS = {"minute": TruncMinute, "hour": TruncHour, "day": TruncDay}
+METRICS = ("ph", "temperature", "tds")
+STATISTICS = {"min": Min, "max": Max, "avg": Avg, "stddev": StdDev}
+ROLLUP_FILTERS = ("system", "datetime_from", "datetime_to")
+
+
+def aggregate_measurements(queryset, bucket):
+    annotations = {
+        f"{metric}_{name}": function(metric)
+        for metric in METRICS
+        for name, function in STATISTICS.items()
+    }
+
+    rows = (
+        queryset.order_by()
+        .annotate(bucket=BUCKETS[bucket]("timestamp"))
+        .values("system__name", "bucket")
+        .annotate(count=Count("id"), **annotations)
+        .order_by("system__name", "bucket")
+    )
+
+    return [
+        {
+            "system": row["system__name"],
+            "bucket": row["bucket"],
+            "count": row["count"],
+            **{
+                metric: {name: row[f"{metric}_{name}"] for name in STATISTICS}
+                for metric in METRICS
+            },
+        }
+        for row in rows
+    ]
+
+
+def can_use_rollups(bucket, filters):
+    return bucket in RESOLUTIONS and not any(
+        value not in (None, "")
+        for name, value in filters.items()
+        if name not in ROLLUP_FILTERS
+    )
+
+
+def aggregate_rollups(queryset, rollups, bucket, start=None, end=None):
+    """
+    Whole buckets inside [start, end] are read from the rollups, the partial
+    buckets at either end of the range are aggregated from the raw rows.
+    """
+    rollups = rollups.filter(resolution=bucket)
+    edges = Q()
+
+    if start is not None:
+        rollups = rollups.filter(bucket__gte=ceil(start, bucket))
+        edges |= Q(timestamp__lt=ceil(start, bucket))
+    if end is not None:
+        rollups = rollups.filter(bucket__lt=truncate(end, bucket))
+        edges |= Q(timestamp__gte=truncate(end, bucket))
+
+    rows = [
+        {"system": rollup.system_name, "bucket": rollup.bucket, **statistics(rollup)}
+        for rollup in rollups.annotate(system_name=F("system__name"))
+    ]
+
+    if edges:
+        rows += aggregate_measurements(queryset.filter(edges), bucket)
+
+    return sorted(rows, key=lambda row: (row["system"], row["bucket"]))
+
+
+def latest_measurements(systems, measurements):
+    """
+    The newest of ``measurements`` of each of ``systems``, in one query
+    whatever the number of systems. A correlated subquery finds the newest
+    reading of every system with one lookup in the (system, timestamp, id)
+    index, like a lateral join, instead of scanning their measurements.
+    """
+    latest = systems.annotate(
+        latest_id=Subquery(
+            measurements.filter(system=OuterRef("pk"))
+            .order_by("-timestamp", "-id")
+            .values("id")[:1]
+        )
+    ).values("latest_id")
+
+    return measurements.filter(pk__in=latest)
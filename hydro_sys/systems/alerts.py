@@ -0,0 +1,252 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache, partial
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from .models import Alert, AlertRule, HydroponicSystem, Measurement
+from .signals import measurements_created
+
+logger = logging.getLogger(__name__)
+
+UNITS = {"ph": "", "temperature": " °C", "tds": " ppm"}
+
+
+class BaseNotifier:
+    def send(self, alerts):
+        raise NotImplementedError
+
+
+class LogNotifier(BaseNotifier):
+    def send(self, alerts):
+        for alert in alerts:
+            logger.warning("%s alert: %s", alert.state.capitalize(), alert.message)
+
+
+# alerts sent through LocMemNotifier, like django.core.mail.outbox
+outbox = []
+
+
+class LocMemNotifier(BaseNotifier):
+    def send(self, alerts):
+        outbox.extend(alerts)
+
+
+@lru_cache(maxsize=None)
+def get_notifier():
+    return import_string(settings.ALERT_NOTIFIER)()
+
+
+class RuleState:
+    __slots__ = ("firing", "breach_since", "last_value", "last_timestamp")
+
+    def __init__(self, firing=False):
+        self.firing = firing
+        self.breach_since = None
+        self.last_value = None
+        self.last_timestamp = None
+
+
+def describe(rule, value, firing):
+    name = rule.get_metric_display()
+    unit = UNITS[rule.metric]
+
+    if rule.kind == "rate":
+        comparison = "above" if firing else "back within"
+        return (
+            f"{rule.system.name}: {name} changes by {value:g}{unit}/min, "
+            f"{comparison} {rule.max_rate:g}{unit}/min"
+        )
+
+    if not firing:
+        return f"{rule.system.name}: {name} is back to {value:g}{unit}"
+
+    if rule.max_value is not None and value > rule.max_value:
+        message = f"{name} is {value:g}{unit}, above {rule.max_value:g}{unit}"
+    else:
+        message = f"{name} is {value:g}{unit}, below {rule.min_value:g}{unit}"
+
+    if rule.kind == "sustained":
+        message += f" for {rule.duration} min"
+
+    return f"{rule.system.name}: {message}"
+
+
+class AlertEngine:
+    """
+    Evaluates the alert rules of each system against new measurements as they
+    are saved. The state of every rule (firing or not, when the value left its
+    band, the previous reading) is kept in memory, so evaluating a reading
+    costs no queries; only the changes between firing and resolved are saved.
+
+    Rules are loaded once per system and reloaded every ``reload_interval``
+    seconds to pick up changes made by other processes. Each process only
+    sees the measurements it saves itself.
+    """
+
+    def __init__(self, reload_interval=60):
+        self.reload_interval = reload_interval
+        self.lock = threading.Lock()
+        self.rules = {}
+        self.states = {}
+
+    def load(self, system_ids):
+        now = time.monotonic()
+
+        with self.lock:
+            missing = {
+                system_id
+                for system_id in system_ids
+                if system_id not in self.rules
+                or now - self.rules[system_id][0] > self.reload_interval
+            }
+
+        if not missing:
+            return
+
+        rules = defaultdict(list)
+        for rule in AlertRule.objects.filter(
+            system_id__in=missing, enabled=True
+        ).select_related("system"):
+            rules[rule.system_id].append(rule)
+
+        with self.lock:
+            for system_id in missing:
+                self.rules[system_id] = (now, rules[system_id])
+
+                for rule in rules[system_id]:
+                    if rule.pk not in self.states:
+                        self.states[rule.pk] = RuleState(rule.firing_since is not None)
+
+    def forget(self, system_id):
+        with self.lock:
+            _, rules = self.rules.pop(system_id, (None, []))
+
+            for rule in rules:
+                self.states.pop(rule.pk, None)
+
+    def evaluate(self, measurements):
+        """
+        Returns the unsaved alerts raised or resolved by ``measurements``.
+        Readings older than the last one seen for a system are skipped.
+        """
+        self.load({measurement.system_id for measurement in measurements})
+        to_python = Measurement._meta.get_field("timestamp").to_python
+        alerts = []
+
+        with self.lock:
+            for measurement in sorted(
+                measurements, key=lambda m: to_python(m.timestamp)
+            ):
+                _, rules = self.rules.get(measurement.system_id, (None, []))
+                if not rules:
+                    continue
+
+                timestamp = to_python(measurement.timestamp)
+                for rule in rules:
+                    value = float(getattr(measurement, rule.metric))
+                    alert = self.check(rule, self.states[rule.pk], value, timestamp)
+                    if alert is not None:
+                        alerts.append(alert)
+
+        return alerts
+
+    def check(self, rule, state, value, timestamp):
+        if state.last_timestamp is not None and timestamp <= state.last_timestamp:
+            return None
+
+        previous_value, previous_timestamp = state.last_value, state.last_timestamp
+        state.last_value, state.last_timestamp = value, timestamp
+
+        if rule.kind == "rate":
+            if previous_timestamp is None:
+                return None
+
+            minutes = (timestamp - previous_timestamp).total_seconds() / 60
+            value = abs(value - previous_value) / minutes
+            breach = value > rule.max_rate
+        else:
+            outside = (rule.min_value is not None and value < rule.min_value) or (
+                rule.max_value is not None and value > rule.max_value
+            )
+
+            if not outside:
+                state.breach_since = None
+                breach = False
+            elif rule.kind == "sustained":
+                state.breach_since = state.breach_since or timestamp
+                breach = (timestamp - state.breach_since).total_seconds() >= (
+                    rule.duration * 60
+                )
+            else:
+                breach = True
+
+        if breach == state.firing:
+            return None
+
+        state.firing = breach
+        return Alert(
+            rule=rule,
+            state="firing" if breach else "resolved",
+            value=value,
+            measured_at=timestamp,
+            message=describe(rule, value, breach),
+        )
+
+
+@lru_cache(maxsize=None)
+def get_engine():
+    return AlertEngine(reload_interval=settings.ALERT_RULES_RELOAD_INTERVAL)
+
+
+def deliver(alerts):
+    try:
+        with transaction.atomic():
+            # rules deleted since they were loaded
+            existing = set(
+                AlertRule.objects.filter(
+                    pk__in={alert.rule_id for alert in alerts}
+                ).values_list("id", flat=True)
+            )
+            alerts = [alert for alert in alerts if alert.rule_id in existing]
+            Alert.objects.bulk_create(alerts)
+
+            for alert in alerts:
+                AlertRule.objects.filter(pk=alert.rule_id).update(
+                    firing_since=alert.measured_at if alert.state == "firing" else None
+                )
+    except DatabaseError:
+        logger.exception("Failed to save alerts.")
+        return
+
+    try:
+        get_notifier().send(alerts)
+    except Exception:
+        logger.exception("Failed to send alerts.")
+
+
+@receiver(measurements_created, dispatch_uid="alerts_measurements_created")
+def measurements_created_receiver(sender, measurements, **kwargs):
+    alerts = get_engine().evaluate(measurements)
+
+    if alerts:
+        # saved and sent once the measurements are, in their own transaction,
+        # so that alerting never fails an insert
+        transaction.on_commit(partial(deliver, alerts))
+
+
+@receiver(post_save, sender=AlertRule, dispatch_uid="alerts_rule_saved")
+@receiver(post_delete, sender=AlertRule, dispatch_uid="alerts_rule_deleted")
+def alert_rule_changed(sender, instance, **kwargs):
+    get_engine().forget(instance.system_id)
+
+
+@receiver(post_save, sender=HydroponicSystem, dispatch_uid="alerts_system_saved")
+@receiver(post_delete, sender=HydroponicSystem, dispatch_uid="alerts_system_deleted")
+def system_changed(sender, instance, **kwargs):
+    # the name is part of the messages
+    get_engine().forget(instance.pk)
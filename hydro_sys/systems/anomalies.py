@@ -0,0 +1,225 @@
+import numpy as np
+from django.db.models import Avg, Count, F, Q, Window
+from django.db.models.expressions import RowRange
+from .downsampling import EPOCH, METRICS, MICROSECOND, load
+
+METHODS = ("zscore", "ewma")
+PERCENTILES = (5, 25, 50, 75, 95, 99)
+# (1 - alpha) ** -k is kept below e ** 20 within a block of ewma()
+EWMA_EXPONENT = 20
+# variances smaller than this share of the squared mean are rounding errors
+# of a window without variation
+VARIANCE_TOLERANCE = 1e-9
+
+
+def rolling(values, window):
+    """
+    Mean and standard deviation of the ``window`` values before each value,
+    NaN for the first ``window`` values.
+    """
+    n = len(values)
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    if n <= window:
+        return mean, std
+
+    # centered, so the cumulative sums stay small and lose no precision
+    offset = values.mean()
+    centered = values - offset
+    sums = np.concatenate(([0.0], np.cumsum(centered)))
+    squares = np.concatenate(([0.0], np.cumsum(centered * centered)))
+
+    window_mean = (sums[window:n] - sums[: n - window]) / window
+    window_squares = (squares[window:n] - squares[: n - window]) / window
+    mean[window:] = window_mean + offset
+    std[window:] = np.sqrt(np.maximum(window_squares - window_mean**2, 0))
+
+    return mean, std
+
+
+def ewma(values, alpha, initial):
+    """
+    ``y[i] = (1 - alpha) * y[i - 1] + alpha * values[i]`` with ``y[-1] =
+    initial``, without a Python loop over the values: within a block,
+    ``y[k] = (1 - alpha) ** k * (y[-1] + alpha * sum((1 - alpha) ** -j *
+    values[j]))``. Blocks are short enough for the powers to stay exact.
+    """
+    decay = 1 - alpha
+    block = max(int(EWMA_EXPONENT / -np.log(decay)), 1)
+    result = np.empty(len(values))
+    state = initial
+
+    for start in range(0, len(values), block):
+        chunk = values[start : start + block]
+        powers = decay ** np.arange(1, len(chunk) + 1)
+        result[start : start + len(chunk)] = powers * (
+            state + alpha * np.cumsum(chunk / powers)
+        )
+        state = result[start + len(chunk) - 1]
+
+    return result
+
+
+def ewm(values, window):
+    """
+    Exponentially weighted mean and standard deviation of the values before
+    each value, with the span of ``window`` values (alpha = 2 / (window +
+    1)). NaN for the first ``window`` values, while the average warms up.
+    """
+    n = len(values)
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    if n <= window:
+        return mean, std
+
+    alpha = 2 / (window + 1)
+    means = ewma(values, alpha, values[0])
+    previous = np.concatenate(([values[0]], means[:-1]))
+    deviations = values - previous
+    # var[i] = (1 - alpha) * (var[i - 1] + alpha * deviation[i] ** 2)
+    variances = ewma((1 - alpha) * deviations**2, alpha, 0.0)
+
+    mean[window:] = previous[window:]
+    std[window:] = np.sqrt(variances[window - 1 : n - 1])
+
+    return mean, std
+
+
+def scores(values, window, method="zscore"):
+    """
+    The rolling mean and standard deviation before every value and its
+    deviation from them in standard deviations. A value after a window
+    without variation scores 0; the first ``window`` values score NaN.
+    """
+    mean, std = (rolling if method == "zscore" else ewm)(values, window)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        varies = std * std > VARIANCE_TOLERANCE * mean * mean
+        score = np.where(varies, (values - mean) / std, 0.0)
+    score[np.isnan(std)] = np.nan
+
+    return mean, std, score
+
+
+def to_datetime(value):
+    return EPOCH + int(value) * MICROSECOND
+
+
+def summarize(values):
+    if not len(values):
+        return {
+            "mean": None,
+            "stddev": None,
+            "min": None,
+            "max": None,
+            "percentiles": dict.fromkeys(map(str, PERCENTILES)),
+        }
+
+    return {
+        "mean": float(values.mean()),
+        "stddev": float(values.std()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "percentiles": dict(
+            zip(map(str, PERCENTILES), np.percentile(values, PERCENTILES).tolist())
+        ),
+    }
+
+
+def describe(
+    queryset,
+    window,
+    threshold,
+    method="zscore",
+    metrics=METRICS,
+    points=500,
+    limit=100,
+):
+    """
+    Statistics of each metric over the measurements of ``queryset``: mean,
+    standard deviation, range, percentiles, the rolling mean and standard
+    deviation (at most ``points`` of them) and the number of anomalies,
+    readings more than ``threshold`` standard deviations away from the
+    rolling mean of the ``window`` readings before them. Also returns the
+    ``limit`` latest anomalies and their total.
+    """
+    data = load(queryset, metrics, ids=True)
+    n = len(data)
+    statistics, flags, metric_scores = {}, {}, {}
+    flagged = np.zeros(n, dtype=bool)
+
+    sample = np.empty(0, dtype=int)
+    if n > window:
+        sample = np.unique(
+            np.linspace(window, n - 1, min(points, n - window)).round().astype(int)
+        )
+
+    for metric in metrics:
+        values = data[metric]
+        mean, std, score = scores(values, window, method)
+        with np.errstate(invalid="ignore"):
+            flags[metric] = np.abs(score) > threshold
+        metric_scores[metric] = score
+        flagged |= flags[metric]
+
+        statistics[metric] = {
+            **summarize(values),
+            "rolling": {
+                "timestamps": [
+                    to_datetime(value) for value in data["timestamp"][sample]
+                ],
+                "mean": mean[sample].tolist(),
+                "stddev": std[sample].tolist(),
+            },
+            "anomalies": int(np.count_nonzero(flags[metric])),
+        }
+
+    anomalies = [
+        {
+            "id": int(data["id"][i]),
+            "timestamp": to_datetime(data["timestamp"][i]),
+            "metrics": {
+                metric: {
+                    "value": float(data[metric][i]),
+                    "score": float(metric_scores[metric][i]),
+                }
+                for metric in metrics
+                if flags[metric][i]
+            },
+        }
+        for i in np.flatnonzero(flagged)[::-1][:limit]
+    ]
+
+    return {
+        "count": n,
+        "statistics": statistics,
+        "anomaly_count": int(np.count_nonzero(flagged)),
+        "anomalies": anomalies,
+    }
+
+
+def anomalous(queryset, window, threshold, metrics=METRICS):
+    """
+    The measurements of ``queryset`` that score more than ``threshold`` on
+    any metric with the ``zscore`` method, computed with window functions
+    over the ``window`` previous readings of the same system.
+    """
+    over = {
+        "partition_by": [F("system_id")],
+        "order_by": [F("timestamp").asc(), F("id").asc()],
+        "frame": RowRange(start=-window, end=-1),
+    }
+    annotations = {"window_count": Window(Count("id"), **over)}
+    condition = Q()
+
+    for metric in metrics:
+        mean = Window(Avg(metric), **over)
+        variance = Window(Avg(F(metric) * F(metric)), **over) - mean * mean
+        deviation = F(metric) - mean
+        annotations[f"{metric}_varies"] = variance - VARIANCE_TOLERANCE * mean * mean
+        annotations[f"{metric}_excess"] = (
+            deviation * deviation - threshold * threshold * variance
+        )
+        condition |= Q(**{f"{metric}_varies__gt": 0, f"{metric}_excess__gt": 0})
+
+    return queryset.alias(**annotations).filter(condition, window_count=window)
@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def create_partitions(sender, using, **kwargs):
+    from django.conf import settings
+    from .partitions import ensure_partitions, is_partitioned
+
+    if using == "default" and is_partitioned():
+        ensure_partitions(months_ahead=settings.MEASUREMENT_PARTITIONS_AHEAD)
 
 
 class SystemsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "systems"
+
+    def ready(self):
+        from . import alerts, broker, cache, rollups  # noqa: F401
+
+        post_migrate.connect(create_partitions, sender=self)
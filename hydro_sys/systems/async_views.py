@@ -0,0 +1,215 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import (
+    AuthenticationFailed,
+    NotAuthenticated,
+    NotFound,
+)
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+from users.authentication import CachedJWTAuthentication
+from .models import HydroponicSystem, Measurement
+from .serializers import (
+    HydroponicSystemDetailSerializer,
+    HydroponicSystemListSerializer,
+    MeasurementRowSerializer,
+    MeasurementSerializer,
+)
+from .pagination import MeasurementPagination
+from .views import HydroponicSystemViewSet, MeasurementViewSet
+from .writebehind import get_queue
+
+
+class AsyncAPIView(View):
+    """
+    Async counterpart of a viewset of ``views.py``. Querysets, filters,
+    ordering, serializers and pagination come from ``viewset_class``; the
+    queries go through the async ORM, so under ASGI a request only takes a
+    thread while a query runs.
+    """
+
+    viewset_class = None
+    actions = {}
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # authentication is by token, not by session, as in DRF's APIView
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        method = request.method.lower()
+
+        if method not in self.actions:
+            return await self.http_method_not_allowed(request, *args, **kwargs)
+
+        request = Request(request, parsers=[JSONParser()])
+        viewset = self.viewset_class(
+            request=request,
+            args=args,
+            kwargs=kwargs,
+            format_kwarg=None,
+            action=self.actions[method],
+        )
+
+        try:
+            request.user = await self.authenticate(request)
+            data, status_code = await getattr(self, method)(viewset, request, **kwargs)
+        except Exception as e:
+            return self.handle_exception(e, viewset, request)
+
+        return HttpResponse(
+            self.get_renderer().render(data),
+            status=status_code,
+            content_type="application/json",
+        )
+
+    def get_renderer(self):
+        # the JSON renderer of the sync views
+        return api_settings.DEFAULT_RENDERER_CLASSES[0]()
+
+    async def authenticate(self, request):
+        result = await sync_to_async(CachedJWTAuthentication().authenticate)(request)
+
+        if result is None:
+            raise NotAuthenticated()
+
+        return result[0]
+
+    def handle_exception(self, exc, viewset, request):
+        response = exception_handler(exc, {"view": viewset, "request": request})
+
+        if response is None:
+            raise exc
+
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            response["WWW-Authenticate"] = (
+                CachedJWTAuthentication().authenticate_header(request)
+            )
+
+        http_response = HttpResponse(
+            self.get_renderer().render(response.data),
+            status=response.status_code,
+            content_type="application/json",
+        )
+        for name, value in response.items():
+            http_response[name] = value
+
+        return http_response
+
+    async def paginate(self, viewset, queryset):
+        paginator = viewset.paginator
+
+        if hasattr(paginator, "apaginate_queryset"):
+            return await paginator.apaginate_queryset(
+                queryset, viewset.request, viewset
+            )
+
+        return await sync_to_async(paginator.paginate_queryset)(
+            queryset, viewset.request, viewset
+        )
+
+    async def get_object(self, viewset, pk):
+        queryset = viewset.get_queryset()
+
+        try:
+            return await queryset.aget(pk=pk)
+        except queryset.model.DoesNotExist:
+            raise NotFound(
+                f"No {queryset.model._meta.object_name} matches the given query."
+            )
+
+    async def validate(self, serializer):
+        # validators of related and unique fields run queries
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        return serializer.validated_data
+
+
+class HydroponicSystemListView(AsyncAPIView):
+    viewset_class = HydroponicSystemViewSet
+    actions = {"get": "list", "post": "create"}
+
+    async def get(self, viewset, request):
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        page = await self.paginate(viewset, queryset)
+        data = HydroponicSystemListSerializer(page, many=True).data
+
+        return viewset.get_paginated_response(data).data, status.HTTP_200_OK
+
+    async def post(self, viewset, request):
+        validated_data = await self.validate(
+            HydroponicSystemListSerializer(data=request.data)
+        )
+        system = await HydroponicSystem.objects.acreate(
+            owner=request.user, **validated_data
+        )
+
+        return HydroponicSystemListSerializer(system).data, status.HTTP_201_CREATED
+
+
+class HydroponicSystemDetailView(AsyncAPIView):
+    viewset_class = HydroponicSystemViewSet
+    actions = {"get": "retrieve"}
+
+    async def get(self, viewset, request, pk):
+        system = await self.get_object(viewset, pk)
+        data = HydroponicSystemListSerializer(system).data
+
+        measurements = MeasurementRowSerializer.values(
+            system.measurements.all(), system=system.name
+        )
+        paginator = MeasurementPagination()
+        page = await paginator.apaginate_queryset(measurements, request)
+        data["measurements"] = paginator.get_paginated_response(
+            MeasurementRowSerializer(page, system=system.name).data
+        ).data
+
+        resolution = request.query_params.get("summary")
+        if resolution is not None:
+            serializer = HydroponicSystemDetailSerializer(system)
+            data["summary"] = await sync_to_async(serializer.get_summary)(
+                system, resolution
+            )
+
+        return data, status.HTTP_200_OK
+
+
+class MeasurementListView(AsyncAPIView):
+    viewset_class = MeasurementViewSet
+    actions = {"get": "list", "post": "create"}
+
+    async def get(self, viewset, request):
+        queryset = MeasurementRowSerializer.values(
+            viewset.filter_queryset(viewset.get_queryset())
+        )
+        page = await self.paginate(viewset, queryset)
+        data = MeasurementRowSerializer(page).data
+
+        return viewset.get_paginated_response(data).data, status.HTTP_200_OK
+
+    async def post(self, viewset, request):
+        validated_data = await self.validate(MeasurementSerializer(data=request.data))
+        viewset.check_system_owner(validated_data["system"])
+
+        if not settings.MEASUREMENT_WRITE_BEHIND:
+            measurement = await Measurement.objects.acreate(**validated_data)
+            return MeasurementSerializer(measurement).data, status.HTTP_201_CREATED
+
+        write_behind = await sync_to_async(get_queue)()
+        measurement = viewset.enqueue(write_behind, validated_data)
+
+        return MeasurementSerializer(measurement).data, status.HTTP_202_ACCEPTED
+
+
+class MeasurementDetailView(AsyncAPIView):
+    viewset_class = MeasurementViewSet
+    actions = {"get": "retrieve"}
+
+    async def get(self, viewset, request, pk):
+        measurement = await self.get_object(viewset, pk)
+        return MeasurementSerializer(measurement).data, status.HTTP_200_OK
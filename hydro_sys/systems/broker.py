@@ -0,0 +1,160 @@
+import asyncio
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from django.conf import settings
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from .models import HydroponicSystem, Measurement
+from .serializers import MeasurementRowSerializer
+from .signals import measurements_created
+
+
+class Subscription:
+    """
+    Bounded queue of messages for one connection. When the client reads slower
+    than measurements arrive, the oldest messages are dropped and counted
+    instead of letting the queue grow.
+    """
+
+    def __init__(self, broker, system_id, queue_size):
+        self.broker = broker
+        self.system_id = system_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(queue_size)
+        self.dropped = 0
+
+    def put(self, message):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def take_dropped(self):
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class BaseBroker:
+    def __init__(self, queue_size=None):
+        self.queue_size = queue_size or settings.MEASUREMENT_STREAM_QUEUE_SIZE
+
+    def subscribe(self, system_id):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+    def publish(self, system_id, message):
+        raise NotImplementedError
+
+    def has_subscribers(self, system_id):
+        return True
+
+
+class InProcessBroker(BaseBroker):
+    """
+    Fans messages out to the subscriptions of the current process. Publishing
+    is thread-safe, so it can be called from sync views and ingestion.
+    """
+
+    def __init__(self, queue_size=None):
+        super().__init__(queue_size)
+        self.lock = threading.Lock()
+        self.subscriptions = defaultdict(set)
+
+    def subscribe(self, system_id):
+        subscription = Subscription(self, system_id, self.queue_size)
+
+        with self.lock:
+            self.subscriptions[system_id].add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.system_id, set())
+            subscriptions.discard(subscription)
+
+            if not subscriptions:
+                self.subscriptions.pop(subscription.system_id, None)
+
+    def publish(self, system_id, message):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(system_id, ()))
+
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, message)
+            except RuntimeError:
+                # the event loop of the connection is already closed
+                self.unsubscribe(subscription)
+
+    def has_subscribers(self, system_id):
+        return system_id in self.subscriptions
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.MEASUREMENT_BROKER)()
+
+
+def serialize(measurements):
+    timestamp = Measurement._meta.get_field("timestamp")
+    names = {
+        measurement.system_id: measurement.system.name
+        for measurement in measurements
+        if Measurement.system.is_cached(measurement)
+    }
+    missing = {measurement.system_id for measurement in measurements} - set(names)
+
+    if missing:
+        names.update(
+            HydroponicSystem.objects.filter(pk__in=missing).values_list("id", "name")
+        )
+
+    rows = [
+        {
+            "id": measurement.pk,
+            "system_name": names[measurement.system_id],
+            "ph": measurement.ph,
+            "temperature": measurement.temperature,
+            "tds": measurement.tds,
+            "timestamp": timestamp.to_python(measurement.timestamp),
+            "description": measurement.description,
+        }
+        for measurement in measurements
+    ]
+    return MeasurementRowSerializer(rows).data
+
+
+@receiver(measurements_created, dispatch_uid="broker_measurements_created")
+def measurements_created_receiver(sender, measurements, **kwargs):
+    broker = get_broker()
+    systems = defaultdict(list)
+
+    for measurement in measurements:
+        if broker.has_subscribers(measurement.system_id):
+            systems[measurement.system_id].append(measurement)
+
+    if not systems:
+        return
+
+    messages = {
+        system_id: serialize(measurements)
+        for system_id, measurements in systems.items()
+    }
+
+    def publish():
+        for system_id, message in messages.items():
+            broker.publish(system_id, message)
+
+    transaction.on_commit(publish)
@@ -0,0 +1,156 @@
+import hashlib
+import time
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+from .models import HydroponicSystem, Measurement
+from .signals import measurements_changed, measurements_created
+
+
+def owner_key(pk):
+    return f"systems:version:owner:{pk}"
+
+
+def system_key(pk):
+    return f"systems:version:system:{pk}"
+
+
+def get_versions(keys):
+    versions = cache.get_many(keys)
+
+    for key in keys:
+        if key not in versions:
+            # a version that was evicted restarts from the clock, so it never
+            # goes back to a value that old responses were cached under
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+
+    return [versions[key] for key in keys]
+
+
+def bump(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+def invalidate_systems(systems):
+    keys = set()
+
+    for system_id, owner_id in systems:
+        keys.add(system_key(system_id))
+        keys.add(owner_key(owner_id))
+
+    bump(sorted(keys))
+
+
+def view_versions(view):
+    if not hasattr(view, "cache_versions"):
+        view.cache_versions = get_versions(view.get_cache_versions())
+
+    return view.cache_versions
+
+
+def response_key(view, request, kwargs):
+    versions = view_versions(view)
+    path = f"{request.get_host()}{request.get_full_path()}"
+    digest = hashlib.sha1(path.encode()).hexdigest()
+
+    # the data of some actions depends on the negotiated format
+    renderer = getattr(request, "accepted_renderer", None)
+
+    return (
+        f"systems:response:{view.basename}:{view.action}:{request.user.pk}:"
+        f"{getattr(renderer, 'format', '')}:{digest}:{'.'.join(map(str, versions))}"
+    )
+
+
+def cache_response(view):
+    @wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        key = response_key(self, request, kwargs)
+        data = cache.get(key)
+
+        if data is not None:
+            return Response(data)
+
+        response = view(self, request, *args, **kwargs)
+
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.SYSTEMS_CACHE_TIMEOUT)
+
+        return response
+
+    return wrapper
+
+
+def conditional_response(view):
+    """
+    Answer polls with 304 Not Modified when nothing the response depends on
+    has changed. The ETag is derived from the change counters, so the check
+    costs no query and no serialization. There is no Last-Modified: updates,
+    deletions and backdated readings change a response without moving any
+    timestamp forward.
+    """
+
+    @wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        state = ":".join(
+            map(
+                str,
+                [
+                    request.user.pk,
+                    request.get_full_path(),
+                    request.META.get("HTTP_ACCEPT", ""),
+                    *view_versions(self),
+                ],
+            )
+        )
+        etag = quote_etag(hashlib.sha1(state.encode()).hexdigest())
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = view(self, request, *args, **kwargs)
+
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response["ETag"] = etag
+            patch_cache_control(response, private=True, no_cache=True)
+
+        return response
+
+    return wrapper
+
+
+@receiver(measurements_created, dispatch_uid="cache_measurements_created")
+@receiver(measurements_changed, dispatch_uid="cache_measurements_changed")
+def measurements_receiver(sender, measurements, **kwargs):
+    systems, unknown = set(), set()
+
+    for measurement in measurements:
+        if Measurement.system.is_cached(measurement):
+            systems.add((measurement.system_id, measurement.system.owner_id))
+        else:
+            unknown.add(measurement.system_id)
+
+    if unknown:
+        systems.update(
+            HydroponicSystem.objects.filter(pk__in=unknown).values_list(
+                "id", "owner_id"
+            )
+        )
+
+    invalidate_systems(systems)
+
+
+@receiver(post_save, sender=HydroponicSystem, dispatch_uid="cache_system_saved")
+@receiver(post_delete, sender=HydroponicSystem, dispatch_uid="cache_system_deleted")
+def system_receiver(sender, instance, **kwargs):
+    invalidate_systems([(instance.pk, instance.owner_id)])
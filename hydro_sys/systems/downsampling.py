@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+import numpy as np
+
+METRICS = ("ph", "temperature", "tds")
+METHODS = ("lttb", "minmax")
+BATCH_SIZE = 5000
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def load(queryset, metrics=METRICS, ids=False):
+    """
+    Reads the measurements into a structured array, ``timestamp`` in
+    microseconds since the epoch, with an ``id`` field when ``ids`` is set.
+    Rows are streamed from the database in batches, without building a model
+    instance or a list of tuples.
+    """
+    fields = ("timestamp", "id") if ids else ("timestamp",)
+    rows = (
+        queryset.order_by("timestamp", "id")
+        .values_list(*fields, *metrics)
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    dtype = [(field, "i8") for field in fields] + [(metric, "f8") for metric in metrics]
+
+    return np.fromiter(
+        (((row[0] - EPOCH) // MICROSECOND, *row[1:]) for row in rows), dtype=dtype
+    )
+
+
+def lttb(x, y, points):
+    """
+    Largest-triangle-three-buckets: keeps the first and last points and, from
+    each of ``points - 2`` buckets in between, the point forming the largest
+    triangle with the previously kept point and the average of the next
+    bucket. Returns the indices of the kept points.
+    """
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+
+    x = (x - x[0]).astype("f8")
+    edges = np.linspace(1, n - 1, points - 1).astype(np.intp)
+    sizes = np.diff(edges)
+
+    # the averages of all buckets at once, the last point follows the last one
+    average_x = np.append(np.add.reduceat(x[: n - 1], edges[:-1]) / sizes, x[-1])
+    average_y = np.append(np.add.reduceat(y[: n - 1], edges[:-1]) / sizes, y[-1])
+
+    selected = np.empty(points, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        px, py = x[previous], y[previous]
+        areas = np.abs(
+            (px - average_x[i + 1]) * (y[start:end] - py)
+            - (px - x[start:end]) * (average_y[i + 1] - py)
+        )
+        previous = start + areas.argmax()
+        selected[i + 1] = previous
+
+    return selected
+
+
+def minmax(y, points):
+    """
+    Min/max envelope: the lowest and the highest point of each of
+    ``points // 2`` buckets, in time order. Returns their indices.
+    """
+    n = len(y)
+    if points >= n or points < 2:
+        return np.arange(n)
+
+    buckets = points // 2
+    bucket = np.arange(n) * buckets // n
+    # sorted by bucket, then by value, so each bucket starts with its minimum
+    order = np.lexsort((y, bucket))
+    ends = np.cumsum(np.bincount(bucket, minlength=buckets))
+    starts = np.append(0, ends[:-1])
+
+    return np.unique(np.concatenate((order[starts], order[ends - 1])))
+
+
+def downsample(queryset, points, method="lttb", metrics=METRICS):
+    """
+    Returns the number of measurements and, for each metric, the timestamps
+    and values of at most ``points`` of them.
+    """
+    data = load(queryset, metrics)
+    series = {}
+
+    for metric in metrics:
+        if method == "lttb":
+            indices = lttb(data["timestamp"], data[metric], points)
+        else:
+            indices = minmax(data[metric], points)
+
+        series[metric] = {
+            "timestamps": [
+                EPOCH + int(value) * MICROSECOND for value in data["timestamp"][indices]
+            ],
+            "values": data[metric][indices].tolist(),
+        }
+
+    return len(data), series
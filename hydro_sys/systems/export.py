@@ -0,0 +1,142 @@
+import csv
+import io
+from itertools import islice
+from asgiref.sync import sync_to_async
+from rest_framework.utils.encoders import JSONEncoder
+from .serializers import MeasurementRowSerializer
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+BATCH_SIZE = 5000
+COLUMNS = ("id", "system", "ph", "temperature", "tds", "timestamp", "description")
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+
+def available_formats():
+    if pyarrow is None:
+        return [fmt for fmt in CONTENT_TYPES if fmt not in COLUMNAR_FORMATS]
+
+    return list(CONTENT_TYPES)
+
+
+def batches(queryset, batch_size=BATCH_SIZE):
+    # iterator() reads through a server-side cursor on PostgreSQL, so only one
+    # batch of rows is held in memory at a time
+    rows = MeasurementRowSerializer.values(queryset).iterator(chunk_size=batch_size)
+
+    while batch := list(islice(rows, batch_size)):
+        yield batch
+
+
+class Buffer(io.RawIOBase):
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def write_csv(queryset):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+
+    for batch in batches(queryset):
+        for row in MeasurementRowSerializer(batch).data:
+            writer.writerow(row[column] for column in COLUMNS)
+
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    yield buffer.getvalue().encode()
+
+
+def write_ndjson(queryset):
+    encoder = JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    for batch in batches(queryset):
+        yield "".join(
+            encoder.encode(row) + "\n" for row in MeasurementRowSerializer(batch).data
+        ).encode()
+
+
+def arrow_schema():
+    return pyarrow.schema(
+        [
+            ("id", pyarrow.int64()),
+            ("system", pyarrow.string()),
+            ("ph", pyarrow.float64()),
+            ("temperature", pyarrow.float64()),
+            ("tds", pyarrow.float64()),
+            ("timestamp", pyarrow.timestamp("us", tz="UTC")),
+            ("description", pyarrow.string()),
+        ]
+    )
+
+
+def write_columnar(queryset, fmt):
+    schema, buffer = arrow_schema(), Buffer()
+
+    if fmt == "parquet":
+        writer = pyarrow.parquet.ParquetWriter(buffer, schema)
+    else:
+        writer = pyarrow.ipc.new_stream(buffer, schema)
+
+    with writer:
+        for batch in batches(queryset):
+            columns = {column: [] for column in COLUMNS}
+            for row in batch:
+                row["system"] = row.pop("system_name")
+                for column in COLUMNS:
+                    columns[column].append(row[column])
+
+            # each batch becomes a parquet row group or an arrow record batch
+            writer.write_table(pyarrow.table(columns, schema=schema))
+            yield buffer.drain()
+
+    yield buffer.drain()
+
+
+def export(queryset, fmt):
+    if fmt == "csv":
+        return write_csv(queryset)
+    if fmt == "ndjson":
+        return write_ndjson(queryset)
+
+    return write_columnar(queryset, fmt)
+
+
+async def aiterate(chunks):
+    # Django buffers a sync iterator with sync_to_async(list) under ASGI, which
+    # would hold the whole export in memory, so pull one chunk at a time instead
+    try:
+        while (chunk := await sync_to_async(next)(chunks, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
@@ -1,5 +1,7 @@
 import django_filters
-from .models import Measurement, HydroponicSystem
+from django.conf import settings
+from .anomalies import anomalous
+from .models import Alert, AlertRule, Measurement, HydroponicSystem
 
 
 class BaseFilter(django_filters.FilterSet):
@@ -15,6 +17,7 @@ class BaseFilter(django_filters.FilterSet):
 
 
 class MeasurementFilter(BaseFilter):
+    system = django_filters.CharFilter(field_name="system__name", label="System")
     ph_min = django_filters.NumberFilter(
         field_name="ph", lookup_expr="gte", label="Min pH"
     )
@@ -33,11 +36,36 @@ class MeasurementFilter(BaseFilter):
     temperature_max = django_filters.NumberFilter(
         field_name="temperature", lookup_expr="lte", label="Max Temperature"
     )
+    anomaly = django_filters.BooleanFilter(method="filter_anomaly", label="Anomaly")
 
     class Meta:
         model = Measurement
         fields = ("ph", "tds", "temperature", "timestamp")
 
+    def filter_anomaly(self, queryset, name, value):
+        # the windows need every earlier reading, not only the filtered ones
+        measurements = self.queryset
+        if self.form.cleaned_data.get("system"):
+            measurements = measurements.filter(
+                system__name=self.form.cleaned_data["system"]
+            )
+        if self.form.cleaned_data.get("datetime_to"):
+            measurements = measurements.filter(
+                timestamp__lte=self.form.cleaned_data["datetime_to"]
+            )
+
+        ids = anomalous(
+            measurements, settings.ANOMALY_WINDOW, settings.ANOMALY_THRESHOLD
+        ).values("pk")
+
+        return queryset.filter(pk__in=ids) if value else queryset.exclude(pk__in=ids)
+
+
+class MeasurementRangeFilter(BaseFilter):
+    class Meta:
+        model = Measurement
+        fields = ()
+
 
 class HydroponicSystemFilter(BaseFilter):
     type = django_filters.ChoiceFilter(choices=HydroponicSystem.types)
@@ -45,3 +73,19 @@ class HydroponicSystemFilter(BaseFilter):
     class Meta:
         model = HydroponicSystem
         fields = ("type", "timestamp")
+
+
+class AlertRuleFilter(django_filters.FilterSet):
+    system = django_filters.CharFilter(field_name="system__name", label="System")
+
+    class Meta:
+        model = AlertRule
+        fields = ("metric", "kind", "enabled")
+
+
+class AlertFilter(BaseFilter):
+    system = django_filters.CharFilter(field_name="rule__system__name", label="System")
+
+    class Meta:
+        model = Alert
+        fields = ("rule", "state")
@@ -0,0 +1,259 @@
+import codecs
+import csv
+import io
+import json
+import math
+from datetime import timezone as dt_timezone
+from itertools import islice
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import HydroponicSystem, Measurement
+from .signals import measurements_created
+
+BATCH_SIZE = 1000
+MAX_ERRORS = 100
+FORMATS = {
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+COPY_COLUMNS = ("system", "ph", "temperature", "tds", "timestamp", "description")
+VALUE_FIELDS = ("ph", "temperature", "tds", "description")
+
+SYSTEM_DOES_NOT_EXIST = "Object with name={value} does not exist."
+SYSTEM_PERMISSION_DENIED = (
+    "You do not have permission to add measurements to this system."
+)
+NOT_FINITE = "Ensure this value is a finite number."
+
+
+def clean_row(row):
+    values, errors = {}, {}
+
+    for name in VALUE_FIELDS:
+        try:
+            value = Measurement._meta.get_field(name).clean(row.get(name), None)
+        except ValidationError as e:
+            errors[name] = e.messages
+            continue
+
+        # NaN passes the range validators, every comparison with it is false
+        if isinstance(value, float) and not math.isfinite(value):
+            errors[name] = [NOT_FINITE]
+        else:
+            values[name] = value
+
+    timestamp = row.get("timestamp")
+    if timestamp in (None, ""):
+        values["timestamp"] = timezone.now()
+    else:
+        try:
+            timestamp = Measurement._meta.get_field("timestamp").clean(timestamp, None)
+            if timezone.is_naive(timestamp):
+                timestamp = timezone.make_aware(timestamp, dt_timezone.utc)
+            values["timestamp"] = timestamp
+        except ValidationError as e:
+            errors["timestamp"] = e.messages
+
+    return values, errors
+
+
+class InvalidRow(Exception):
+    pass
+
+
+def reject_constant(name):
+    raise ValueError(f"{name} is not valid JSON.")
+
+
+def parse_ndjson(lines):
+    for line in codecs.iterdecode(lines, "utf-8"):
+        if not line.strip():
+            continue
+
+        try:
+            yield json.loads(line, parse_constant=reject_constant)
+        except ValueError:
+            yield InvalidRow("Invalid JSON.")
+
+
+def parse_csv(lines):
+    lines = (line for line in codecs.iterdecode(lines, "utf-8") if line.strip())
+    yield from csv.DictReader(lines)
+
+
+PARSERS = {"ndjson": parse_ndjson, "csv": parse_csv}
+
+
+def copy_csv(buffer, names=COPY_COLUMNS):
+    columns = ", ".join(Measurement._meta.get_field(name).column for name in names)
+
+    with connection.cursor() as cursor:
+        cursor.cursor.copy_expert(
+            f"COPY {Measurement._meta.db_table} ({columns}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+
+
+def reserve_ids(count):
+    # COPY returns nothing, so the ids are taken from the sequence up front
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, %s)) "
+            "FROM generate_series(1, %s)",
+            [Measurement._meta.db_table, Measurement._meta.pk.column, count],
+        )
+        return [pk for pk, in cursor.fetchall()]
+
+
+def copy_measurements(measurements):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    for m, pk in zip(measurements, reserve_ids(len(measurements))):
+        m.pk = pk
+        writer.writerow(
+            (m.pk, m.system_id, m.ph, m.temperature, m.tds, m.timestamp.isoformat())
+            + (m.description or None,)
+        )
+
+    buffer.seek(0)
+    copy_csv(buffer, ("id",) + COPY_COLUMNS)
+
+
+def can_copy():
+    return connection.vendor == "postgresql"
+
+
+class MeasurementIngestor:
+    def __init__(self, user, batch_size=BATCH_SIZE, upload=None, use_copy=False):
+        self.user = user
+        self.batch_size = batch_size
+        self.upload = upload
+        self.use_copy = use_copy and can_copy()
+        self.systems = {}
+        self.pending = []
+        self.position = upload.offset if upload else 0
+        self.previously_created = upload.created if upload else 0
+        self.previously_failed = upload.failed if upload else 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def load_systems(self, names):
+        missing = {str(name) for name in names if name is not None} - set(self.systems)
+        if not missing:
+            return
+
+        found = HydroponicSystem.objects.filter(name__in=missing).only(
+            "id", "name", "owner_id"
+        )
+        for system in found:
+            self.systems[system.name] = system.owner_id == self.user.pk and system
+            missing.discard(system.name)
+
+        for name in missing:
+            self.systems[name] = None
+
+    def resolve_system(self, name):
+        if name in (None, ""):
+            return None, "This field is required."
+
+        name = str(name)
+        self.load_systems([name])
+        system = self.systems[name]
+
+        if system is None:
+            return None, SYSTEM_DOES_NOT_EXIST.format(value=name)
+        if system is False:
+            return None, SYSTEM_PERMISSION_DENIED
+
+        return system, None
+
+    def reject(self, index, errors):
+        self.failed += 1
+        # bulk requests are bounded and report every row, uploads report the
+        # first errors and the number of failed rows
+        if self.upload is None or len(self.errors) < MAX_ERRORS:
+            self.errors.append({"index": index, "errors": errors})
+
+    def add(self, index, row):
+        self.position = index + 1
+
+        if isinstance(row, InvalidRow):
+            self.reject(index, {"non_field_errors": [str(row)]})
+            return False
+        if not isinstance(row, dict):
+            self.reject(index, {"non_field_errors": ["Expected an object."]})
+            return False
+
+        values, errors = clean_row(row)
+        system, system_error = self.resolve_system(row.get("system"))
+
+        if system_error:
+            errors["system"] = [system_error]
+
+        if errors:
+            self.reject(index, errors)
+            return False
+
+        self.pending.append(Measurement(system=system, **values))
+
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+        return True
+
+    def flush(self):
+        if not self.pending and not self.upload:
+            return
+
+        with transaction.atomic():
+            if self.use_copy and self.pending:
+                copy_measurements(self.pending)
+            elif self.pending:
+                Measurement.objects.bulk_create(
+                    self.pending, batch_size=self.batch_size
+                )
+
+            if self.pending:
+                measurements_created.send(sender=Measurement, measurements=self.pending)
+
+            self.created += len(self.pending)
+            self.pending = []
+
+            if self.upload:
+                self.save_progress()
+
+    def save_progress(self, finished=False):
+        self.upload.offset = self.position
+        self.upload.created = self.previously_created + self.created
+        self.upload.failed = self.previously_failed + self.failed
+        self.upload.finished = finished
+        self.upload.save()
+
+    def ingest(self, rows, start=0):
+        rows = list(rows)
+        self.load_systems(row.get("system") for row in rows if isinstance(row, dict))
+
+        for index, row in enumerate(rows, start=start):
+            self.add(index, row)
+
+        self.flush()
+
+        return self.created, self.errors
+
+    def ingest_stream(self, lines, fmt):
+        rows = PARSERS[fmt](lines)
+        start = self.position
+
+        for index, row in enumerate(islice(rows, start, None), start=start):
+            self.add(index, row)
+
+        self.flush()
+
+        if self.upload:
+            self.save_progress(finished=True)
+
+        return self.created, self.errors
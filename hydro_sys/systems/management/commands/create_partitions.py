@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from systems.partitions import ensure_partitions, is_partitioned
+
+
+class Command(BaseCommand):
+    help = "Create the monthly measurement partitions for the coming months."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead", type=int, default=settings.MEASUREMENT_PARTITIONS_AHEAD
+        )
+
+    def handle(self, months_ahead, **options):
+        if not is_partitioned():
+            raise CommandError("The measurement table is not partitioned.")
+
+        for name in ensure_partitions(months_ahead=months_ahead):
+            self.stdout.write(f"Created {name}")
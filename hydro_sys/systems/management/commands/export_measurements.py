@@ -0,0 +1,52 @@
+import sys
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from systems.export import available_formats, export
+from systems.filters import MeasurementFilter
+from systems.models import Measurement
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Stream the measurements of a user to a CSV, NDJSON or columnar file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to write, '-' for standard output")
+        parser.add_argument("--user", required=True, help="Owner of the systems")
+        parser.add_argument(
+            "--format", choices=available_formats(), default="csv", dest="fmt"
+        )
+        parser.add_argument(
+            "--filter",
+            action="append",
+            default=[],
+            dest="filters",
+            metavar="NAME=VALUE",
+            help="Measurement filter, e.g. system=<name> or datetime_from=<datetime>",
+        )
+
+    def handle(self, path, user, fmt, filters, **options):
+        try:
+            user = User.objects.get(username=user)
+        except User.DoesNotExist:
+            raise CommandError(f"User '{user}' does not exist.")
+
+        data = dict(value.partition("=")[::2] for value in filters)
+        filterset = MeasurementFilter(
+            data, queryset=Measurement.objects.filter(system__owner=user)
+        )
+        if not filterset.is_valid():
+            raise CommandError(filterset.errors.as_text())
+
+        queryset = filterset.qs.order_by("timestamp", "id")
+
+        if path == "-":
+            self.write(queryset, fmt, sys.stdout.buffer)
+        else:
+            with open(path, "wb") as output:
+                self.write(queryset, fmt, output)
+
+    def write(self, queryset, fmt, output):
+        for chunk in export(queryset, fmt):
+            output.write(chunk)
@@ -0,0 +1,118 @@
+import os
+import time
+from datetime import timedelta, timezone as dt_timezone
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from systems.rollups import rebuild
+from systems.synthetic import BATCH_SIZE, generate
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users, systems and synthetic sensor readings for capacity "
+        "tests, written in bulk by parallel worker processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--systems", type=int, default=10, help="Per user")
+        parser.add_argument(
+            "--measurements", type=int, default=10000, help="Per system"
+        )
+        parser.add_argument(
+            "--interval", type=float, default=60, help="Seconds between readings"
+        )
+        parser.add_argument(
+            "--end", help="ISO 8601 datetime of the last reading, now by default"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Processes writing the measurements",
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--prefix",
+            default="synthetic",
+            help="Of the usernames and the system names",
+        )
+        parser.add_argument(
+            "--no-rollups",
+            action="store_false",
+            dest="rollups",
+            help="Do not compute the hourly and daily rollups",
+        )
+
+    def handle(
+        self,
+        users,
+        systems,
+        measurements,
+        interval,
+        end,
+        workers,
+        batch_size,
+        seed,
+        prefix,
+        rollups,
+        **options,
+    ):
+        if min(users, systems, measurements, interval, batch_size) <= 0:
+            raise CommandError(
+                "--users, --systems, --measurements, --interval and --batch-size "
+                "must be positive."
+            )
+        if User.objects.filter(username__startswith=f"{prefix}_user_").exists():
+            raise CommandError(
+                f"Users named '{prefix}_user_*' already exist, use another --prefix."
+            )
+
+        if end is not None:
+            try:
+                parsed = parse_datetime(end)
+            except ValueError:
+                parsed = None
+
+            if parsed is None:
+                raise CommandError(f"'{end}' is not a valid ISO 8601 datetime.")
+            if timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed, dt_timezone.utc)
+            end = parsed
+
+        total = users * systems * measurements
+        start = time.perf_counter()
+
+        def progress(written):
+            self.stdout.write(f"{written}/{total} measurements", ending="\r")
+            self.stdout.flush()
+
+        system_ids = generate(
+            users=users,
+            systems=systems,
+            measurements=measurements,
+            interval=timedelta(seconds=interval),
+            end=end,
+            workers=workers,
+            seed=seed,
+            batch_size=batch_size,
+            prefix=prefix,
+            progress=progress if self.stdout.isatty() else None,
+        )
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f"Created {users} users, {len(system_ids)} systems and {total} "
+            f"measurements in {elapsed:.1f} s ({total / elapsed:.0f} rows/s)."
+        )
+
+        if rollups:
+            created = rebuild(system_ids=system_ids)
+            self.stdout.write(f"Created {created} rollups.")
+
+        self.stdout.write(self.style.SUCCESS("Done."))
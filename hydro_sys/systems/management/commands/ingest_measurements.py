@@ -0,0 +1,72 @@
+import sys
+import uuid
+from pathlib import Path
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from systems.ingest import BATCH_SIZE, PARSERS, MeasurementIngestor
+from systems.models import MeasurementUpload
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Stream measurements from an NDJSON or CSV file into the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to read, '-' for standard input")
+        parser.add_argument("--user", required=True, help="Owner of the systems")
+        parser.add_argument("--format", choices=sorted(PARSERS), dest="fmt")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            "--upload-id", help="Resume a previous upload from its last checkpoint"
+        )
+
+    def handle(self, path, user, fmt, batch_size, upload_id, **options):
+        try:
+            user = User.objects.get(username=user)
+        except User.DoesNotExist:
+            raise CommandError(f"User '{user}' does not exist.")
+
+        if fmt is None:
+            suffix = Path(path).suffix.lstrip(".").lower()
+            fmt = {"jsonl": "ndjson"}.get(suffix, suffix)
+        if fmt not in PARSERS:
+            raise CommandError("Unable to detect the file format, use --format.")
+
+        if upload_id:
+            try:
+                upload_id = uuid.UUID(upload_id)
+            except ValueError:
+                raise CommandError(f"'{upload_id}' is not a valid UUID.")
+
+            upload, _ = MeasurementUpload.objects.get_or_create(
+                pk=upload_id, defaults={"owner": user}
+            )
+            if upload.owner_id != user.pk:
+                raise CommandError(f"Upload {upload.pk} belongs to another user.")
+        else:
+            upload = MeasurementUpload.objects.create(owner=user)
+            self.stdout.write(f"Upload {upload.pk}, resume it with --upload-id.")
+
+        if upload.finished:
+            raise CommandError(f"Upload {upload.pk} is already finished.")
+
+        ingestor = MeasurementIngestor(
+            user, batch_size=batch_size, upload=upload, use_copy=True
+        )
+
+        if path == "-":
+            ingestor.ingest_stream(sys.stdin.buffer, fmt)
+        else:
+            with open(path, "rb") as lines:
+                ingestor.ingest_stream(lines, fmt)
+
+        for error in ingestor.errors:
+            self.stderr.write(f"row {error['index']}: {error['errors']}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Upload {upload.pk}: {upload.created} created, "
+                f"{upload.failed} failed, {upload.offset} rows processed."
+            )
+        )
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from systems.models import Measurement
+from systems.partitions import (
+    add_months,
+    drop_partitions_before,
+    is_partitioned,
+    month_start,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete measurements older than the retention period. Whole monthly "
+        "partitions are dropped when the table is partitioned."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=settings.MEASUREMENT_RETENTION_MONTHS,
+            help="Number of full months to keep besides the current one",
+        )
+
+    def handle(self, months, **options):
+        if not months:
+            raise CommandError(
+                "No retention period, set MEASUREMENT_RETENTION_MONTHS or --months."
+            )
+
+        cutoff = add_months(month_start(timezone.now()), -months)
+
+        if is_partitioned():
+            for name in drop_partitions_before(cutoff):
+                self.stdout.write(f"Dropped {name}")
+        else:
+            deleted, _ = Measurement.objects.filter(timestamp__lt=cutoff).delete()
+            self.stdout.write(f"Deleted {deleted} measurements")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Removed measurements older than {cutoff:%Y-%m-%d}.")
+        )
@@ -0,0 +1,58 @@
+from datetime import timezone as dt_timezone
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from systems.models import HydroponicSystem
+from systems.rollups import RESOLUTIONS, rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the hourly and daily measurement rollups from raw rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--system", action="append", help="Name of a system, can be repeated"
+        )
+        parser.add_argument("--since", help="ISO 8601 datetime")
+        parser.add_argument("--until", help="ISO 8601 datetime")
+        parser.add_argument("--resolution", choices=sorted(RESOLUTIONS))
+
+    def handle(self, system, since, until, resolution, **options):
+        system_ids = None
+        if system:
+            systems = dict(
+                HydroponicSystem.objects.filter(name__in=system).values_list(
+                    "name", "id"
+                )
+            )
+            missing = set(system) - set(systems)
+            if missing:
+                raise CommandError(f"Unknown systems: {', '.join(sorted(missing))}")
+            system_ids = list(systems.values())
+
+        since, until = self.parse(since), self.parse(until)
+
+        created = rebuild(
+            system_ids=system_ids,
+            since=since,
+            until=until,
+            resolutions=[resolution] if resolution else RESOLUTIONS,
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"Created {created} rollups."))
+
+    def parse(self, value):
+        if value is None:
+            return None
+
+        try:
+            parsed = parse_datetime(value)
+        except ValueError:
+            parsed = None
+
+        if parsed is None:
+            raise CommandError(f"'{value}' is not a valid ISO 8601 datetime.")
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed, dt_timezone.utc)
+
+        return parsed
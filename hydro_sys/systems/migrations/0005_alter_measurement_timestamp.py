@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 15:19
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("systems", "0004_alter_measurement_ph_alter_measurement_tds_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="measurement",
+            name="timestamp",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
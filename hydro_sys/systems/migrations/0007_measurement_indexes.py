@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-18 15:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("systems", "0006_measurementupload"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="measurement",
+            index=models.Index(
+                fields=["system", "timestamp", "id"], name="measurement_system_ts_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="measurement",
+            index=models.Index(fields=["timestamp", "id"], name="measurement_ts_idx"),
+        ),
+        migrations.AlterField(
+            model_name="measurement",
+            name="system",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="measurements",
+                to="systems.hydroponicsystem",
+            ),
+        ),
+    ]
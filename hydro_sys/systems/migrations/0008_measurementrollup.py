@@ -0,0 +1,65 @@
+# Generated by Django 5.1.6 on 2026-10-18 15:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("systems", "0007_measurement_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MeasurementRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "resolution",
+                    models.CharField(
+                        choices=[("hour", "Hour"), ("day", "Day")], max_length=10
+                    ),
+                ),
+                ("bucket", models.DateTimeField()),
+                ("count", models.PositiveBigIntegerField(default=0)),
+                ("ph_sum", models.FloatField(default=0)),
+                ("ph_sum_squares", models.FloatField(default=0)),
+                ("ph_min", models.FloatField(null=True)),
+                ("ph_max", models.FloatField(null=True)),
+                ("temperature_sum", models.FloatField(default=0)),
+                ("temperature_sum_squares", models.FloatField(default=0)),
+                ("temperature_min", models.FloatField(null=True)),
+                ("temperature_max", models.FloatField(null=True)),
+                ("tds_sum", models.FloatField(default=0)),
+                ("tds_sum_squares", models.FloatField(default=0)),
+                ("tds_min", models.FloatField(null=True)),
+                ("tds_max", models.FloatField(null=True)),
+                (
+                    "system",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rollups",
+                        to="systems.hydroponicsystem",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("system", "resolution", "bucket"),
+                        name="measurement_rollup_unique",
+                    )
+                ],
+            },
+        ),
+    ]
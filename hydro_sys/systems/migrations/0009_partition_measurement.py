@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def partition_measurements(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    from systems.partitions import partition
+
+    partition(schema_editor, apps.get_model("systems", "Measurement"))
+
+
+def unpartition_measurements(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    from systems.partitions import unpartition
+
+    unpartition(schema_editor, apps.get_model("systems", "Measurement"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("systems", "0008_measurementrollup"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_measurements, unpartition_measurements),
+    ]
@@ -0,0 +1,123 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:05
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("systems", "0009_partition_measurement"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AlertRule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "metric",
+                    models.CharField(
+                        choices=[
+                            ("ph", "pH"),
+                            ("temperature", "Temperature"),
+                            ("tds", "TDS"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("band", "Outside a band"),
+                            ("rate", "Rate of change"),
+                            ("sustained", "Outside a band for a while"),
+                        ],
+                        default="band",
+                        max_length=20,
+                    ),
+                ),
+                ("min_value", models.FloatField(blank=True, null=True)),
+                ("max_value", models.FloatField(blank=True, null=True)),
+                (
+                    "max_rate",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Largest allowed change per minute",
+                        null=True,
+                        validators=[django.core.validators.MinValueValidator(0)],
+                    ),
+                ),
+                (
+                    "duration",
+                    models.PositiveIntegerField(
+                        blank=True,
+                        help_text="Minutes the value has to stay outside the band",
+                        null=True,
+                    ),
+                ),
+                ("enabled", models.BooleanField(default=True)),
+                (
+                    "firing_since",
+                    models.DateTimeField(blank=True, editable=False, null=True),
+                ),
+                ("timestamp", models.DateTimeField(auto_now_add=True)),
+                (
+                    "system",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="alert_rules",
+                        to="systems.hydroponicsystem",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="Alert",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "state",
+                    models.CharField(
+                        choices=[("firing", "Firing"), ("resolved", "Resolved")],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "value",
+                    models.FloatField(
+                        help_text="The value, or the rate for rate rules"
+                    ),
+                ),
+                ("measured_at", models.DateTimeField()),
+                ("message", models.TextField()),
+                ("timestamp", models.DateTimeField(auto_now_add=True)),
+                (
+                    "rule",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="alerts",
+                        to="systems.alertrule",
+                    ),
+                ),
+            ],
+        ),
+    ]
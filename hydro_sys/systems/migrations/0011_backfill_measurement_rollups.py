@@ -0,0 +1,50 @@
+from django.db import migrations
+from django.db.models import Count, F, Max, Min, Sum
+from django.db.models.functions import TruncDay, TruncHour
+
+METRICS = ("ph", "temperature", "tds")
+RESOLUTIONS = {"hour": TruncHour, "day": TruncDay}
+BATCH_SIZE = 1000
+
+
+def backfill_rollups(apps, schema_editor):
+    # a copy of rollups.rebuild() against the models of this migration
+    Measurement = apps.get_model("systems", "Measurement")
+    MeasurementRollup = apps.get_model("systems", "MeasurementRollup")
+
+    MeasurementRollup.objects.all().delete()
+
+    annotations = {}
+    for metric in METRICS:
+        annotations[f"{metric}_sum"] = Sum(metric)
+        annotations[f"{metric}_sum_squares"] = Sum(F(metric) * F(metric))
+        annotations[f"{metric}_min"] = Min(metric)
+        annotations[f"{metric}_max"] = Max(metric)
+
+    for resolution, trunc in RESOLUTIONS.items():
+        rows = (
+            Measurement.objects.annotate(bucket=trunc("timestamp"))
+            .values("system_id", "bucket")
+            .annotate(count=Count("id"), **annotations)
+            .order_by()
+        )
+
+        batch = []
+        for row in rows.iterator(chunk_size=BATCH_SIZE):
+            batch.append(MeasurementRollup(resolution=resolution, **row))
+            if len(batch) >= BATCH_SIZE:
+                MeasurementRollup.objects.bulk_create(batch)
+                batch = []
+
+        MeasurementRollup.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("systems", "0010_alertrule_alert"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
+import uuid
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 User = get_user_model()
@@ -27,7 +30,10 @@ class HydroponicSystem(models.Model):
 
 class Measurement(models.Model):
     system = models.ForeignKey(
-        HydroponicSystem, on_delete=models.CASCADE, related_name="measurements"
+        HydroponicSystem,
+        on_delete=models.CASCADE,
+        related_name="measurements",
+        db_index=False,
     )
     ph = models.FloatField(
         validators=[MinValueValidator(0), MaxValueValidator(14)],
@@ -41,5 +47,129 @@ class Measurement(models.Model):
         validators=[MinValueValidator(0), MaxValueValidator(1000000)],
         help_text="Parts per million (ppm)",
     )
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)
     description = models.TextField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["system", "timestamp", "id"], name="measurement_system_ts_idx"
+            ),
+            models.Index(fields=["timestamp", "id"], name="measurement_ts_idx"),
+        ]
+
+
+class MeasurementUpload(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="uploads")
+    offset = models.PositiveBigIntegerField(
+        default=0, help_text="Number of rows already processed"
+    )
+    created = models.PositiveBigIntegerField(default=0)
+    failed = models.PositiveBigIntegerField(default=0)
+    finished = models.BooleanField(default=False)
+    timestamp = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class MeasurementRollup(models.Model):
+    resolutions = [("hour", "Hour"), ("day", "Day")]
+
+    system = models.ForeignKey(
+        HydroponicSystem,
+        on_delete=models.CASCADE,
+        related_name="rollups",
+        db_index=False,
+    )
+    resolution = models.CharField(max_length=10, choices=resolutions)
+    bucket = models.DateTimeField()
+    count = models.PositiveBigIntegerField(default=0)
+    ph_sum = models.FloatField(default=0)
+    ph_sum_squares = models.FloatField(default=0)
+    ph_min = models.FloatField(null=True)
+    ph_max = models.FloatField(null=True)
+    temperature_sum = models.FloatField(default=0)
+    temperature_sum_squares = models.FloatField(default=0)
+    temperature_min = models.FloatField(null=True)
+    temperature_max = models.FloatField(null=True)
+    tds_sum = models.FloatField(default=0)
+    tds_sum_squares = models.FloatField(default=0)
+    tds_min = models.FloatField(null=True)
+    tds_max = models.FloatField(null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["system", "resolution", "bucket"],
+                name="measurement_rollup_unique",
+            )
+        ]
+
+
+class AlertRule(models.Model):
+    metrics = [
+        ("ph", "pH"),
+        ("temperature", "Temperature"),
+        ("tds", "TDS"),
+    ]
+    kinds = [
+        ("band", "Outside a band"),
+        ("rate", "Rate of change"),
+        ("sustained", "Outside a band for a while"),
+    ]
+
+    system = models.ForeignKey(
+        HydroponicSystem, on_delete=models.CASCADE, related_name="alert_rules"
+    )
+    metric = models.CharField(max_length=20, choices=metrics)
+    kind = models.CharField(max_length=20, choices=kinds, default="band")
+    min_value = models.FloatField(null=True, blank=True)
+    max_value = models.FloatField(null=True, blank=True)
+    max_rate = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(0)],
+        help_text="Largest allowed change per minute",
+    )
+    duration = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Minutes the value has to stay outside the band",
+    )
+    enabled = models.BooleanField(default=True)
+    firing_since = models.DateTimeField(null=True, blank=True, editable=False)
+    timestamp = models.DateTimeField(auto_now_add=True)
+
+    def clean(self):
+        errors = {}
+
+        if self.kind in ("band", "sustained"):
+            if self.min_value is None and self.max_value is None:
+                errors["min_value"] = "Set a minimum, a maximum or both."
+            elif (
+                self.min_value is not None
+                and self.max_value is not None
+                and self.min_value > self.max_value
+            ):
+                errors["max_value"] = "Must not be less than the minimum."
+        if self.kind == "sustained" and not self.duration:
+            errors["duration"] = "Required for sustained rules."
+        if self.kind == "rate" and self.max_rate is None:
+            errors["max_rate"] = "Required for rate of change rules."
+
+        if errors:
+            raise ValidationError(errors)
+
+    def __str__(self):
+        return f"{self.system} {self.metric} {self.kind}"
+
+
+class Alert(models.Model):
+    states = [("firing", "Firing"), ("resolved", "Resolved")]
+
+    rule = models.ForeignKey(AlertRule, on_delete=models.CASCADE, related_name="alerts")
+    state = models.CharField(max_length=10, choices=states)
+    value = models.FloatField(help_text="The value, or the rate for rate rules")
+    measured_at = models.DateTimeField()
+    message = models.TextField()
+    timestamp = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,163 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on (ordering_field, id), so every page is an index
+    range scan no matter how deep it is. Querysets ordered by anything else,
+    or requests using the ``page`` parameter, fall back to page numbers.
+    """
+
+    page_size = 10
+    ordering_field = "timestamp"
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    invalid_cursor_message = "Invalid cursor"
+    fallback_class = PageNumberPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_fallback(queryset, request):
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.count = self.get_count(queryset)
+        return self.set_page(list(self.get_page_queryset(queryset)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        if self.use_fallback(queryset, request):
+            return await sync_to_async(self.fallback.paginate_queryset)(
+                queryset, request, view
+            )
+
+        self.count = await queryset.acount() if self.count_requested() else None
+        return self.set_page([row async for row in self.get_page_queryset(queryset)])
+
+    def use_fallback(self, queryset, request):
+        self.request = request
+        self.fallback = None
+        self.descending = self.get_direction(queryset)
+
+        if self.descending is None or self.fallback_class.page_query_param in (
+            request.query_params
+        ):
+            self.fallback = self.fallback_class()
+            self.fallback.page_size = self.page_size
+
+        return self.fallback is not None
+
+    def get_page_queryset(self, queryset):
+        self.position, self.reverse = self.decode_cursor(self.request)
+        descending = self.descending != self.reverse
+        field = self.ordering_field
+
+        if self.position is not None:
+            value, pk = self.position
+            lookup = "lt" if descending else "gt"
+            queryset = queryset.filter(**{f"{field}__{lookup}e": value}).filter(
+                Q(**{f"{field}__{lookup}": value}) | Q(**{f"id__{lookup}": pk})
+            )
+
+        prefix = "-" if descending else ""
+        return queryset.order_by(f"{prefix}{field}", f"{prefix}id")[
+            : self.page_size + 1
+        ]
+
+    def set_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+
+        if self.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = self.position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+
+        self.page = rows
+        return rows
+
+    def get_direction(self, queryset):
+        ordering = tuple(queryset.query.order_by)
+
+        if ordering in ((), (f"-{self.ordering_field}",)):
+            return True
+        if ordering == (self.ordering_field,):
+            return False
+
+        return None
+
+    def count_requested(self):
+        value = self.request.query_params.get(self.count_query_param, "true")
+        return value.lower() not in ("false", "0", "no")
+
+    def get_count(self, queryset):
+        return queryset.count() if self.count_requested() else None
+
+    def get_position(self, row):
+        if isinstance(row, dict):
+            return row[self.ordering_field], row["id"]
+
+        return getattr(row, self.ordering_field), row.pk
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+
+        if encoded is None:
+            return None, False
+
+        try:
+            data = json.loads(urlsafe_b64decode(encoded.encode()))
+            value, pk = data["p"]
+            return (datetime.fromisoformat(value), int(pk)), bool(data.get("r"))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse):
+        value, pk = self.get_position(row)
+        data = {"p": [value.isoformat(), pk]}
+        if reverse:
+            data["r"] = 1
+
+        encoded = urlsafe_b64encode(json.dumps(data).encode()).decode()
+        url = remove_query_param(
+            self.request.build_absolute_uri(),
+            self.fallback_class.page_query_param,
+        )
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+
+        payload = {}
+        if self.count is not None:
+            payload["count"] = self.count
+
+        payload.update(
+            next=self.get_next_link(),
+            previous=self.get_previous_link(),
+            results=data,
+        )
+        return Response(payload)
+
+
+class MeasurementPagination(KeysetPagination):
+    page_size = 10
@@ -0,0 +1,188 @@
+from datetime import datetime, timezone as dt_timezone
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Measurement
+
+TABLE = Measurement._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+
+def month_start(value):
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    return value.replace(year=value.year + month // 12, month=month % 12 + 1)
+
+
+def partition_name(month):
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def is_supported():
+    return connection.vendor == "postgresql"
+
+
+def is_partitioned():
+    if not is_supported():
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def partitions():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s AND pg_table_is_visible(p.oid)",
+            [TABLE],
+        )
+        names = {name for name, in cursor.fetchall()}
+
+    months = {}
+    for name in names - {DEFAULT_PARTITION}:
+        month = datetime.strptime(name[-6:], "%Y%m").replace(tzinfo=dt_timezone.utc)
+        months[month] = name
+
+    return dict(sorted(months.items()))
+
+
+def create_partition(cursor, month):
+    name, end = partition_name(month), add_months(month, 1)
+    quote = connection.ops.quote_name
+
+    # rows that landed in the default partition have to move before the new
+    # partition can be attached
+    cursor.execute(
+        f"CREATE TABLE {quote(name)} (LIKE {quote(TABLE)} INCLUDING DEFAULTS)"
+    )
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {quote(DEFAULT_PARTITION)} "
+        '    WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING *) '
+        f"INSERT INTO {quote(name)} SELECT * FROM moved",
+        [month, end],
+    )
+    cursor.execute(
+        f"ALTER TABLE {quote(TABLE)} ATTACH PARTITION {quote(name)} "
+        "FOR VALUES FROM (%s) TO (%s)",
+        [month, end],
+    )
+
+
+def ensure_partitions(start=None, months_ahead=3):
+    current = month_start(timezone.now())
+    month = month_start(start) if start else current
+    end = add_months(current, months_ahead)
+    created = []
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        existing = partitions()
+
+        while month <= end:
+            if month not in existing:
+                create_partition(cursor, month)
+                created.append(partition_name(month))
+            month = add_months(month, 1)
+
+    return created
+
+
+def drop_partitions_before(cutoff):
+    cutoff = month_start(cutoff)
+    quote = connection.ops.quote_name
+    dropped = []
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        for month, name in partitions().items():
+            if add_months(month, 1) > cutoff:
+                break
+
+            cursor.execute(f"ALTER TABLE {quote(TABLE)} DETACH PARTITION {quote(name)}")
+            cursor.execute(f"DROP TABLE {quote(name)}")
+            dropped.append(name)
+
+        cursor.execute(
+            f'DELETE FROM {quote(DEFAULT_PARTITION)} WHERE "timestamp" < %s',
+            [cutoff],
+        )
+
+    return dropped
+
+
+def partition(schema_editor, model, months_ahead=3):
+    """
+    Replace the plain measurement table with one range-partitioned by month.
+    The primary key of a partitioned table has to contain the partition key,
+    so it becomes (id, timestamp); ids still come from a single sequence.
+    """
+    quote = schema_editor.quote_name
+    table, staging = quote(TABLE), quote(f"{TABLE}_partitioned")
+    sequence = quote(f"{TABLE}_id_seq")
+    execute = schema_editor.execute
+
+    execute(f'CREATE TABLE {staging} (LIKE {table}) PARTITION BY RANGE ("timestamp")')
+    execute(f'ALTER TABLE {staging} ADD PRIMARY KEY (id, "timestamp")')
+    execute(f"CREATE TABLE {quote(DEFAULT_PARTITION)} PARTITION OF {staging} DEFAULT")
+    execute(f"INSERT INTO {staging} SELECT * FROM {table}")
+    execute(f"DROP TABLE {table}")
+    execute(f"ALTER TABLE {staging} RENAME TO {table}")
+    rename_primary_key(schema_editor, f"{TABLE}_partitioned")
+
+    execute(f"CREATE SEQUENCE {sequence} OWNED BY {table}.id")
+    execute(
+        f"SELECT setval('{sequence}', COALESCE(MAX(id), 0) + 1, false) FROM {table}"
+    )
+    execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+    restore_constraints(schema_editor, model)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT MIN("timestamp") FROM {table}')
+        oldest = cursor.fetchone()[0]
+
+    ensure_partitions(start=oldest, months_ahead=months_ahead)
+
+
+def unpartition(schema_editor, model):
+    quote = schema_editor.quote_name
+    table, staging = quote(TABLE), quote(f"{TABLE}_unpartitioned")
+    sequence = quote(f"{TABLE}_id_seq")
+    execute = schema_editor.execute
+
+    execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE")
+    execute(f"CREATE TABLE {staging} (LIKE {table} INCLUDING DEFAULTS)")
+    execute(f"ALTER TABLE {staging} ADD PRIMARY KEY (id)")
+    execute(f"INSERT INTO {staging} SELECT * FROM {table}")
+    execute(f"DROP TABLE {table}")
+    execute(f"ALTER TABLE {staging} RENAME TO {table}")
+    rename_primary_key(schema_editor, f"{TABLE}_unpartitioned")
+    execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+    restore_constraints(schema_editor, model)
+
+
+def rename_primary_key(schema_editor, staging):
+    quote = schema_editor.quote_name
+    schema_editor.execute(
+        f"ALTER TABLE {quote(TABLE)} "
+        f"RENAME CONSTRAINT {quote(f'{staging}_pkey')} TO {quote(f'{TABLE}_pkey')}"
+    )
+
+
+def restore_constraints(schema_editor, model):
+    field = model._meta.get_field("system")
+    schema_editor.execute(
+        schema_editor._create_fk_sql(model, field, "_fk_%(to_table)s_%(to_column)s")
+    )
+
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
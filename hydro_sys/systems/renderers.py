@@ -0,0 +1,80 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding with orjson when it is installed. Types orjson does
+    not know, and datetimes so they keep DRF's format, go through DRF's
+    encoder. Indented output (the browsable API) and anything orjson rejects
+    fall back to the stdlib encoder.
+    """
+
+    orjson_options = (
+        orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=self.orjson_options
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # the same escapes as JSONRenderer, for JSON embedded in JavaScript
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+class ColumnarJSONRenderer(FastJSONRenderer):
+    """
+    Measurement lists as parallel arrays (MeasurementColumnSerializer)
+    instead of one object per measurement.
+    """
+
+    media_type = "application/vnd.hydro-sys.columns+json"
+    format = "columns"
+    columnar = True
+
+
+class ColumnarMessagePackRenderer(BaseRenderer):
+    """
+    The same document as ColumnarJSONRenderer, encoded with MessagePack.
+    """
+
+    media_type = "application/vnd.hydro-sys.columns+msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+    columnar = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        # links, dates and other types the JSON encoder knows about
+        return msgpack.packb(data, default=JSONEncoder().default)
+
+
+def columnar_renderers():
+    if msgpack is None:
+        return [ColumnarJSONRenderer]
+
+    return [ColumnarJSONRenderer, ColumnarMessagePackRenderer]
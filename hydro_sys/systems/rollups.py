@@ -0,0 +1,179 @@
+import math
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Sum, Value
+from django.db.models.functions import Greatest, Least, TruncDay, TruncHour
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Measurement, MeasurementRollup
+from .signals import measurements_changed, measurements_created
+
+METRICS = ("ph", "temperature", "tds")
+RESOLUTIONS = {"hour": TruncHour, "day": TruncDay}
+STEPS = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+BATCH_SIZE = 1000
+
+
+def truncate(value, resolution):
+    value = Measurement._meta.get_field("timestamp").to_python(value)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, dt_timezone.utc)
+    value = timezone.localtime(value)
+    value = value.replace(minute=0, second=0, microsecond=0)
+
+    if resolution == "day":
+        value = value.replace(hour=0)
+
+    return value
+
+
+def ceil(value, resolution):
+    bucket = truncate(value, resolution)
+    return bucket if bucket == value else bucket + STEPS[resolution]
+
+
+class Totals:
+    def __init__(self):
+        self.count = 0
+        self.values = {metric: [] for metric in METRICS}
+
+    def add(self, measurement):
+        self.count += 1
+        for metric in METRICS:
+            self.values[metric].append(float(getattr(measurement, metric)))
+
+    def fields(self):
+        fields = {"count": self.count}
+        for metric, values in self.values.items():
+            fields[f"{metric}_sum"] = math.fsum(values)
+            fields[f"{metric}_sum_squares"] = math.fsum(v * v for v in values)
+            fields[f"{metric}_min"] = min(values)
+            fields[f"{metric}_max"] = max(values)
+        return fields
+
+    def increments(self):
+        fields = self.fields()
+        increments = {"count": F("count") + fields["count"]}
+        for metric in METRICS:
+            for name in ("sum", "sum_squares"):
+                field = f"{metric}_{name}"
+                increments[field] = F(field) + fields[field]
+            increments[f"{metric}_min"] = Least(
+                F(f"{metric}_min"), Value(fields[f"{metric}_min"])
+            )
+            increments[f"{metric}_max"] = Greatest(
+                F(f"{metric}_max"), Value(fields[f"{metric}_max"])
+            )
+        return increments
+
+
+def apply(measurements):
+    groups = defaultdict(Totals)
+
+    for measurement in measurements:
+        for resolution in RESOLUTIONS:
+            bucket = truncate(measurement.timestamp, resolution)
+            groups[measurement.system_id, resolution, bucket].add(measurement)
+
+    with transaction.atomic():
+        for (system_id, resolution, bucket), totals in groups.items():
+            rollups = MeasurementRollup.objects.filter(
+                system_id=system_id, resolution=resolution, bucket=bucket
+            )
+
+            if rollups.update(**totals.increments()):
+                continue
+
+            try:
+                with transaction.atomic():
+                    MeasurementRollup.objects.create(
+                        system_id=system_id,
+                        resolution=resolution,
+                        bucket=bucket,
+                        **totals.fields(),
+                    )
+            except IntegrityError:
+                # created concurrently since the update above
+                rollups.update(**totals.increments())
+
+
+def rebuild(system_ids=None, since=None, until=None, resolutions=RESOLUTIONS):
+    created = 0
+
+    with transaction.atomic():
+        for resolution in resolutions:
+            measurements = Measurement.objects.all()
+            rollups = MeasurementRollup.objects.filter(resolution=resolution)
+
+            if system_ids is not None:
+                measurements = measurements.filter(system_id__in=system_ids)
+                rollups = rollups.filter(system_id__in=system_ids)
+            if since is not None:
+                start = truncate(since, resolution)
+                measurements = measurements.filter(timestamp__gte=start)
+                rollups = rollups.filter(bucket__gte=start)
+            if until is not None:
+                end = truncate(until, resolution) + STEPS[resolution]
+                measurements = measurements.filter(timestamp__lt=end)
+                rollups = rollups.filter(bucket__lt=end)
+
+            rollups.delete()
+
+            annotations = {}
+            for metric in METRICS:
+                annotations[f"{metric}_sum"] = Sum(metric)
+                annotations[f"{metric}_sum_squares"] = Sum(F(metric) * F(metric))
+                annotations[f"{metric}_min"] = Min(metric)
+                annotations[f"{metric}_max"] = Max(metric)
+
+            rows = (
+                measurements.annotate(bucket=RESOLUTIONS[resolution]("timestamp"))
+                .values("system_id", "bucket")
+                .annotate(count=Count("id"), **annotations)
+                .order_by()
+            )
+
+            batch = []
+            for row in rows.iterator(chunk_size=BATCH_SIZE):
+                batch.append(MeasurementRollup(resolution=resolution, **row))
+                if len(batch) >= BATCH_SIZE:
+                    MeasurementRollup.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+
+            MeasurementRollup.objects.bulk_create(batch)
+            created += len(batch)
+
+    return created
+
+
+def statistics(rollup):
+    row = {"count": rollup.count}
+
+    for metric in METRICS:
+        avg = getattr(rollup, f"{metric}_sum") / rollup.count
+        variance = getattr(rollup, f"{metric}_sum_squares") / rollup.count - avg**2
+        row[metric] = {
+            "min": getattr(rollup, f"{metric}_min"),
+            "max": getattr(rollup, f"{metric}_max"),
+            "avg": avg,
+            "stddev": math.sqrt(max(variance, 0)),
+        }
+
+    return row
+
+
+@receiver(measurements_created, dispatch_uid="rollups_measurements_created")
+def measurements_created_receiver(sender, measurements, **kwargs):
+    apply(measurements)
+
+
+@receiver(measurements_changed, dispatch_uid="rollups_measurements_changed")
+def measurements_changed_receiver(sender, measurements, **kwargs):
+    for measurement in measurements:
+        rebuild(
+            system_ids=[measurement.system_id],
+            since=measurement.timestamp,
+            until=measurement.timestamp,
+        )
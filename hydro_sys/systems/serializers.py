@@ -1,10 +1,17 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import F
+from django.utils import timezone
 from rest_framework import serializers
-from rest_framework.pagination import PageNumberPagination
-from .models import HydroponicSystem, Measurement
-
-
-class MeasurementPagination(PageNumberPagination):
-    page_size = 10
+from .models import (
+    Alert,
+    AlertRule,
+    HydroponicSystem,
+    Measurement,
+    MeasurementUpload,
+)
+from .pagination import MeasurementPagination
+from .rollups import statistics
 
 
 class MeasurementSerializer(serializers.ModelSerializer):
@@ -15,6 +22,124 @@ class MeasurementSerializer(serializers.ModelSerializer):
     class Meta:
         model = Measurement
         fields = "__all__"
+        read_only_fields = ("timestamp",)
+
+
+def format_datetime(value, tz=None):
+    value = value.astimezone(tz or timezone.get_current_timezone()).isoformat()
+    return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+
+class MeasurementRowSerializer:
+    """
+    Read-only fast path for large pages. Renders rows of ``values(queryset)``
+    to the same output as MeasurementSerializer without model instances or
+    field objects.
+    """
+
+    fields = ("id", "ph", "temperature", "tds", "timestamp", "description")
+
+    def __init__(self, rows, system=None):
+        self.rows = rows
+        self.system = system
+
+    @classmethod
+    def values(cls, queryset, system=None):
+        if system is not None:
+            return queryset.values(*cls.fields)
+
+        return queryset.values(*cls.fields, system_name=F("system__name"))
+
+    @property
+    def data(self):
+        system = self.system
+        tz = timezone.get_current_timezone()
+
+        return [
+            {
+                "id": row["id"],
+                "system": system if system is not None else row["system_name"],
+                "ph": float(row["ph"]),
+                "temperature": float(row["temperature"]),
+                "tds": float(row["tds"]),
+                "timestamp": format_datetime(row["timestamp"], tz),
+                "description": row["description"],
+            }
+            for row in self.rows
+        ]
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def delta_encode(values):
+    previous = 0
+    deltas = []
+
+    for value in values:
+        deltas.append(value - previous)
+        previous = value
+
+    return deltas
+
+
+class MeasurementColumnSerializer(MeasurementRowSerializer):
+    """
+    Renders the rows of ``values(queryset)`` as parallel arrays, one per
+    column. System names are listed once in ``systems`` and referenced by
+    their index. Ids and timestamps (microseconds since the epoch) are
+    delta-encoded: every value is the difference from the previous one, the
+    first from zero.
+    """
+
+    @property
+    def data(self):
+        rows = self.rows
+        systems = {}
+
+        if self.system is not None:
+            systems[self.system] = 0
+            system_column = [0] * len(rows)
+        else:
+            system_column = [
+                systems.setdefault(row["system_name"], len(systems)) for row in rows
+            ]
+
+        return {
+            "systems": list(systems),
+            "id": delta_encode(row["id"] for row in rows),
+            "system": system_column,
+            "ph": [float(row["ph"]) for row in rows],
+            "temperature": [float(row["temperature"]) for row in rows],
+            "tds": [float(row["tds"]) for row in rows],
+            "timestamp": delta_encode(
+                (row["timestamp"] - EPOCH) // MICROSECOND for row in rows
+            ),
+            "description": [row["description"] for row in rows],
+        }
+
+
+class MetricAggregateSerializer(serializers.Serializer):
+    min = serializers.FloatField()
+    max = serializers.FloatField()
+    avg = serializers.FloatField()
+    stddev = serializers.FloatField()
+
+
+class MeasurementAggregateSerializer(serializers.Serializer):
+    system = serializers.CharField()
+    bucket = serializers.DateTimeField()
+    count = serializers.IntegerField()
+    ph = MetricAggregateSerializer()
+    temperature = MetricAggregateSerializer()
+    tds = MetricAggregateSerializer()
+
+
+class MeasurementUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MeasurementUpload
+        fields = ("id", "offset", "created", "failed", "finished", "timestamp")
 
 
 class HydroponicSystemListSerializer(serializers.ModelSerializer):
@@ -26,17 +151,92 @@ class HydroponicSystemListSerializer(serializers.ModelSerializer):
 class HydroponicSystemDetailSerializer(serializers.ModelSerializer):
     measurements = serializers.SerializerMethodField()
 
+    summary_buckets = {"hour": 24, "day": 30}
+
     class Meta:
         model = HydroponicSystem
         fields = ("id", "name", "type", "timestamp", "description", "measurements")
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        request = self.context.get("request")
+        resolution = request.query_params.get("summary") if request else None
+
+        if resolution is not None:
+            data["summary"] = self.get_summary(instance, resolution)
+
+        return data
+
+    def get_summary(self, obj, resolution):
+        if resolution not in self.summary_buckets:
+            raise serializers.ValidationError(
+                {"summary": [f"Must be one of: {', '.join(self.summary_buckets)}."]}
+            )
+
+        rollups = obj.rollups.filter(resolution=resolution).order_by("-bucket")
+        rows = [
+            {"system": obj.name, "bucket": rollup.bucket, **statistics(rollup)}
+            for rollup in rollups[: self.summary_buckets[resolution]]
+        ]
+
+        return MeasurementAggregateSerializer(rows[::-1], many=True).data
+
     def get_measurements(self, obj):
         request = self.context.get("request")
-        measurements = obj.measurements.all()
+        measurements = MeasurementRowSerializer.values(
+            obj.measurements.all(), system=obj.name
+        )
 
         paginator = MeasurementPagination()
         paginated_measurements = paginator.paginate_queryset(measurements, request)
 
         return paginator.get_paginated_response(
-            MeasurementSerializer(paginated_measurements, many=True).data
+            MeasurementRowSerializer(paginated_measurements, system=obj.name).data
         ).data
+
+
+class AlertRuleSerializer(serializers.ModelSerializer):
+    system = serializers.SlugRelatedField(
+        queryset=HydroponicSystem.objects.all(), slug_field="name"
+    )
+
+    class Meta:
+        model = AlertRule
+        fields = "__all__"
+        read_only_fields = ("firing_since", "timestamp")
+
+    def validate(self, attrs):
+        # the rule is checked as a whole, also on partial updates
+        fields = {
+            field.name: getattr(self.instance, field.name)
+            for field in AlertRule._meta.concrete_fields
+            if self.instance is not None and field.name != "system"
+        }
+        fields.update((key, value) for key, value in attrs.items() if key != "system")
+        rule = AlertRule(**fields)
+
+        try:
+            rule.clean()
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.message_dict)
+
+        return attrs
+
+
+class AlertSerializer(serializers.ModelSerializer):
+    system = serializers.CharField(source="rule.system.name", read_only=True)
+    metric = serializers.CharField(source="rule.metric", read_only=True)
+
+    class Meta:
+        model = Alert
+        fields = (
+            "id",
+            "rule",
+            "system",
+            "metric",
+            "state",
+            "value",
+            "measured_at",
+            "message",
+            "timestamp",
+        )
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save
+from django.dispatch import Signal, receiver
+from .models import Measurement
+
+# Sent with ``measurements``, a list of Measurement instances, after new rows
+# are written, including bulk and COPY inserts which bypass post_save.
+measurements_created = Signal()
+
+# Sent with ``measurements`` after existing rows are updated or deleted.
+measurements_changed = Signal()
+
+
+@receiver(post_save, sender=Measurement)
+def measurement_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    signal = measurements_created if created else measurements_changed
+    signal.send(sender=Measurement, measurements=[instance])
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import re
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.signals import request_finished, request_started
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from users.authentication import CachedJWTAuthentication
+from .broker import get_broker
+from .models import HydroponicSystem
+
+WEBSOCKET_PATH = re.compile(r"/systems/hydroponic/(?P<pk>\d+)/ws/")
+
+
+class StreamError(Exception):
+    def __init__(self, detail, status, code):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+        self.code = code
+
+
+def get_raw_token(header, query_string):
+    # browsers cannot set headers on EventSource and WebSocket connections, so
+    # the access token may also be passed as ?token=
+    authentication = CachedJWTAuthentication()
+
+    if header:
+        token = authentication.get_raw_token(header)
+        if token is not None:
+            return token
+
+    token = parse_qs(query_string).get("token")
+    return token[0].encode() if token else None
+
+
+@sync_to_async
+def get_system(header, query_string, pk):
+    authentication = CachedJWTAuthentication()
+
+    try:
+        raw_token = get_raw_token(header, query_string)
+        if raw_token is None:
+            raise AuthenticationFailed("Authentication credentials were not provided.")
+
+        user = authentication.get_user(authentication.get_validated_token(raw_token))
+        return HydroponicSystem.objects.get(pk=pk, owner=user)
+    except (AuthenticationFailed, InvalidToken) as e:
+        detail = e.detail.get("detail") if isinstance(e.detail, dict) else e.detail
+        raise StreamError(str(detail), 401, 4401)
+    except HydroponicSystem.DoesNotExist:
+        raise StreamError("No HydroponicSystem matches the given query.", 404, 4404)
+
+
+async def events(subscription):
+    keepalive = settings.MEASUREMENT_STREAM_KEEPALIVE
+
+    try:
+        yield "retry: 5000\n\n"
+
+        while True:
+            try:
+                message = await subscription.get(timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+
+            dropped = subscription.take_dropped()
+            if dropped:
+                yield f"event: dropped\ndata: {json.dumps({'count': dropped})}\n\n"
+
+            yield f"event: measurements\ndata: {json.dumps(message)}\n\n"
+    finally:
+        subscription.close()
+
+
+async def measurement_stream(request, pk):
+    """
+    Server-sent events with the measurements created for one system. Needs an
+    ASGI server, since every client holds its connection open.
+    """
+    if not isinstance(request, ASGIRequest):
+        # under WSGI every client would hold a worker thread
+        return JsonResponse(
+            {"detail": "Measurement streams need the ASGI application."}, status=501
+        )
+
+    try:
+        system = await get_system(
+            request.META.get("HTTP_AUTHORIZATION", "").encode(),
+            request.META.get("QUERY_STRING", ""),
+            pk,
+        )
+    except StreamError as e:
+        return JsonResponse({"detail": e.detail}, status=e.status)
+
+    response = StreamingHttpResponse(
+        events(get_broker().subscribe(system.pk)), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+
+    return response
+
+
+async def websocket_application(scope, receive, send):
+    """
+    WebSocket variant of ``measurement_stream`` at /systems/hydroponic/<id>/ws/.
+    Every message is a JSON object with the new measurements of the system.
+    """
+    if (await receive())["type"] != "websocket.connect":
+        return
+
+    match = WEBSOCKET_PATH.fullmatch(scope["path"])
+    if match is None:
+        await send({"type": "websocket.close", "code": 4404})
+        return
+
+    headers = dict(scope.get("headers", []))
+    # like an HTTP request, so that the database connection gets closed
+    await sync_to_async(request_started.send)(sender=None, scope=scope)
+
+    try:
+        system = await get_system(
+            headers.get(b"authorization"),
+            scope.get("query_string", b"").decode(),
+            int(match["pk"]),
+        )
+    except StreamError as e:
+        await send({"type": "websocket.close", "code": e.code})
+        return
+    finally:
+        await sync_to_async(request_finished.send)(sender=None)
+
+    subscription = get_broker().subscribe(system.pk)
+    await send({"type": "websocket.accept"})
+
+    received = asyncio.ensure_future(receive())
+    message = asyncio.ensure_future(subscription.get())
+
+    try:
+        while True:
+            await asyncio.wait({received, message}, return_when=asyncio.FIRST_COMPLETED)
+
+            if message.done():
+                data = {"measurements": message.result()}
+                dropped = subscription.take_dropped()
+                if dropped:
+                    data["dropped"] = dropped
+
+                await send({"type": "websocket.send", "text": json.dumps(data)})
+                message = asyncio.ensure_future(subscription.get())
+
+            if received.done():
+                if received.result()["type"] == "websocket.disconnect":
+                    break
+
+                # messages from the client are ignored
+                received = asyncio.ensure_future(receive())
+    finally:
+        received.cancel()
+        message.cancel()
+        subscription.close()
@@ -0,0 +1,223 @@
+import io
+import multiprocessing
+from datetime import datetime, timedelta, timezone as dt_timezone
+import django
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from .ingest import can_copy, copy_csv
+from .models import HydroponicSystem, Measurement
+from .partitions import ensure_partitions, is_partitioned
+
+User = get_user_model()
+
+BATCH_SIZE = 50000
+COPY_COLUMNS = ("system", "ph", "temperature", "tds", "timestamp")
+DAY = 24 * 3600
+HOUR = 3600
+MICROSECONDS = 10**6
+UTC = dt_timezone.utc
+
+
+def profile(rng):
+    """
+    The set points of one system: its temperature range over the day, how
+    fast its pH rises between two doses of pH down and how much nutrient
+    the plants take up between two doses of concentrate.
+    """
+    return {
+        "temperature": rng.uniform(19, 23),
+        "temperature_amplitude": rng.uniform(1.5, 4),
+        "ph": rng.uniform(5.6, 6.0),
+        "ph_rise": rng.uniform(0.3, 0.8),
+        "ph_period": rng.uniform(12, 48) * HOUR,
+        "tds": rng.uniform(600, 1100),
+        "tds_uptake": rng.uniform(0.1, 0.25),
+        "tds_period": rng.uniform(6, 24) * HOUR,
+        "offset": rng.uniform(0, 2 * DAY),
+    }
+
+
+def series(timestamps, profile, rng):
+    """
+    pH, temperature and TDS at ``timestamps`` (microseconds since the epoch,
+    UTC). The temperature follows the day, warmest at 15:00. The pH drifts
+    up and is dosed back down to its set point; TDS falls as the plants feed
+    and steps back up when concentrate is added. Every reading gets sensor
+    noise. The curves only depend on the time, so any slice of a series can
+    be generated on its own.
+    """
+    seconds = timestamps / MICROSECONDS
+    count = len(timestamps)
+
+    hour = (seconds % DAY) / HOUR
+    temperature = (
+        profile["temperature"]
+        + profile["temperature_amplitude"] * np.sin(2 * np.pi * (hour - 9) / 24)
+        + rng.normal(0, 0.15, count)
+    )
+
+    since_ph_dose = ((seconds + profile["offset"]) / profile["ph_period"]) % 1
+    ph = profile["ph"] + profile["ph_rise"] * since_ph_dose + rng.normal(0, 0.03, count)
+
+    since_tds_dose = ((seconds + profile["offset"]) / profile["tds_period"]) % 1
+    tds = profile["tds"] * (1 - profile["tds_uptake"] * since_tds_dose) + rng.normal(
+        0, 5, count
+    )
+
+    return (
+        np.round(np.clip(ph, 0, 14), 2),
+        np.round(temperature, 1),
+        np.round(np.clip(tds, 0, None)),
+    )
+
+
+def write_csv(system_id, timestamps, ph, temperature, tds):
+    buffer = io.StringIO()
+    dates = np.datetime_as_string(
+        timestamps.astype("datetime64[us]"), unit="us", timezone="UTC"
+    )
+    buffer.writelines(
+        f"{system_id},{p},{t},{d},{date}\n"
+        for p, t, d, date in zip(ph.tolist(), temperature.tolist(), tds.tolist(), dates)
+    )
+    buffer.seek(0)
+    copy_csv(buffer, COPY_COLUMNS)
+
+
+def write_insert(system_id, timestamps, ph, temperature, tds):
+    # bulk_create spends most of its time preparing every field of every row
+    quote = connection.ops.quote_name
+    adapt = connection.ops.adapt_datetimefield_value
+    columns = ", ".join(
+        quote(Measurement._meta.get_field(name).column) for name in COPY_COLUMNS
+    )
+    rows = [
+        (system_id, p, t, d, adapt(datetime.fromtimestamp(us / MICROSECONDS, UTC)))
+        for p, t, d, us in zip(
+            ph.tolist(), temperature.tolist(), tds.tolist(), timestamps.tolist()
+        )
+    ]
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {quote(Measurement._meta.db_table)} ({columns}) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def generate_measurements(task):
+    """
+    Writes the readings ``start`` to ``stop`` of the ``count`` of a system,
+    with ``COPY`` on PostgreSQL and ``executemany()`` elsewhere. Runs in
+    the worker processes of generate().
+    """
+    system_id, start, stop, count, end, interval, seed = task
+    system = profile(np.random.default_rng([seed, system_id]))
+    rng = np.random.default_rng([seed, system_id, start])
+    write = write_csv if can_copy() else write_insert
+
+    timestamps = end - (count - 1 - np.arange(start, stop)) * interval
+    write(system_id, timestamps, *series(timestamps, system, rng))
+
+    return stop - start
+
+
+def init_worker():
+    # a no-op in forked workers, which share the parent's setup
+    django.setup()
+
+
+def generate(
+    users=10,
+    systems=10,
+    measurements=10000,
+    interval=timedelta(minutes=1),
+    end=None,
+    workers=1,
+    seed=0,
+    batch_size=BATCH_SIZE,
+    prefix="synthetic",
+    progress=None,
+):
+    """
+    Creates ``users`` users with ``systems`` systems each, and
+    ``measurements`` readings per system, one every ``interval`` up to
+    ``end``. Users and systems are inserted in bulk; the measurements are
+    generated with numpy and written by ``workers`` processes in batches
+    of ``batch_size`` (in the current process with ``workers=1``).
+    ``progress`` is called with the number of measurements written so far.
+    Returns the ids of the new systems.
+    """
+    rng = np.random.default_rng(seed)
+    # phone numbers are unique, continue after the existing users
+    first = (User.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+    password = make_password(f"{prefix}_pass")
+    types = [value for value, _ in HydroponicSystem.types]
+
+    owners = User.objects.bulk_create(
+        User(
+            username=f"{prefix}_user_{u}",
+            email=f"{prefix}_user_{u}@email.com",
+            password=password,
+            phone_number=f"{first + u:09d}",
+        )
+        for u in range(users)
+    )
+    system_ids = [
+        system.pk
+        for system in HydroponicSystem.objects.bulk_create(
+            HydroponicSystem(
+                name=f"{prefix} system {u}-{s}",
+                owner=owner,
+                type=types[rng.integers(len(types))],
+            )
+            for u, owner in enumerate(owners)
+            for s in range(systems)
+        )
+    ]
+
+    end = end or datetime.now(UTC)
+    end_us = int(end.timestamp() * MICROSECONDS)
+    interval_us = interval // timedelta(microseconds=1)
+
+    if is_partitioned():
+        ensure_partitions(start=end - interval * max(measurements - 1, 0))
+
+    tasks = [
+        (
+            system_id,
+            start,
+            min(start + batch_size, measurements),
+            measurements,
+            end_us,
+            interval_us,
+            seed,
+        )
+        for system_id in system_ids
+        for start in range(0, measurements, batch_size)
+    ]
+    written = 0
+
+    if workers <= 1:
+        for task in tasks:
+            written += generate_measurements(task)
+            if progress:
+                progress(written)
+    else:
+        # forked workers must open their own connections
+        connections.close_all()
+        with multiprocessing.Pool(workers, initializer=init_worker) as pool:
+            for count in pool.imap_unordered(generate_measurements, tasks):
+                written += count
+                if progress:
+                    progress(written)
+
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Measurement._meta.db_table}")
+
+    return system_ids
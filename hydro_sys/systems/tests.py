@@ -1,8 +1,60 @@
+import asyncio
+import csv
+import io
+import json
+import math
+import os
+import tempfile
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+from asgiref.sync import async_to_sync, sync_to_async
+from unittest import skipIf
+import numpy
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
-from .models import HydroponicSystem, Measurement
+from django.core.management import CommandError, call_command
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections, connection
+from django.db.models import Sum
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import RefreshToken
+from hydro_sys.asgi import application
+from hydro_sys.compression import brotli, parse_accept_encoding, zstandard
+from hydro_sys.instrumentation import RequestMetrics, fingerprint, registry
+from .models import (
+    Alert,
+    AlertRule,
+    HydroponicSystem,
+    Measurement,
+    MeasurementRollup,
+    MeasurementUpload,
+)
+from .serializers import (
+    MeasurementRowSerializer,
+    MeasurementSerializer,
+    format_datetime,
+)
+from .alerts import get_engine, get_notifier, outbox
+from .anomalies import anomalous, describe, ewm, rolling
+from .broker import InProcessBroker
+from .downsampling import lttb, minmax
+from .export import pyarrow
+from .partitions import ensure_partitions, is_partitioned, month_start
+from .renderers import (
+    ColumnarJSONRenderer,
+    ColumnarMessagePackRenderer,
+    FastJSONRenderer,
+    msgpack,
+)
+from .signals import measurements_created
+from .synthetic import profile, series
+from .writebehind import QueueFull, WriteBehindQueue, get_queue, startup
 from tests.base import BaseTestCase
 
 User = get_user_model()
@@ -179,6 +231,64 @@ class MeasurementTestCase(BaseTestCase):
         self.assertEqual(len(response.data.get("results")), 10)
         self.assertIsNotNone("next", response.data)
 
+    def test_cursor_pagination_measurement(self):
+        expected = list(
+            Measurement.objects.order_by("-timestamp", "-id").values_list(
+                "id", flat=True
+            )
+        )
+
+        pages, url = [], self.url
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data.get("count"), 15)
+            pages.append(response.data)
+            url = response.data.get("next")
+
+        result = [obj.get("id") for page in pages for obj in page.get("results")]
+
+        self.assertEqual(len(pages), 2)
+        self.assertEqual(result, expected)
+        self.assertIsNone(pages[0].get("previous"))
+
+        response = self.client.get(pages[1].get("previous"))
+
+        self.assertEqual(response.data.get("results"), pages[0].get("results"))
+
+    def test_cursor_pagination_without_count(self):
+        response = self.client.get(self.url + "?count=false&ordering=timestamp")
+
+        expected = list(
+            Measurement.objects.order_by("timestamp", "id").values_list("id", flat=True)
+        )[:10]
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+        self.assertEqual([obj.get("id") for obj in response.data["results"]], expected)
+
+    def test_cursor_pagination_invalid_cursor(self):
+        response = self.client.get(self.url + "?cursor=invalid")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number_pagination_measurement(self):
+        response = self.client.get(self.url + "?page=2")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get("count"), 15)
+        self.assertEqual(len(response.data.get("results")), 5)
+
+    def test_system_detail_measurements_pagination(self):
+        url = reverse("hydroponic-detail", args=[self.system.id])
+
+        first = self.client.get(url).data.get("measurements")
+        second = self.client.get(first.get("next")).data.get("measurements")
+
+        self.assertEqual(len(first.get("results")), 10)
+        self.assertEqual(len(second.get("results")), 5)
+        self.assertIsNone(second.get("next"))
+
     def test_ordering_measurement(self):
         response = self.client.get(self.url + "?ordering=ph")
 
@@ -207,3 +317,2458 @@ class MeasurementTestCase(BaseTestCase):
         response = self.client.get(f"{self.url}{measurement.id}/")
 
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_bulk_create_measurements(self):
+        other_system = HydroponicSystem.objects.create(
+            name="Other System", owner=self.other_user, type="DWC"
+        )
+        payload = [
+            {"system": self.system.name, "ph": 6.1, "temperature": 21, "tds": 410},
+            {
+                "system": self.system.name,
+                "ph": 6.3,
+                "temperature": 22,
+                "tds": 420,
+                "timestamp": "2025-02-06T10:00:00Z",
+            },
+            {"system": self.system.name, "ph": 15.0, "temperature": 22, "tds": 420},
+            {"system": other_system.name, "ph": 6.0, "temperature": 20, "tds": 400},
+            {"system": "some_invalid_name", "ph": 6.0, "temperature": 20, "tds": 400},
+        ]
+
+        response = self.client.post(f"{self.url}bulk/", payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data.get("created"), 2)
+        self.assertEqual(
+            [error.get("index") for error in response.data.get("errors")], [2, 3, 4]
+        )
+        self.assertIn("ph", response.data.get("errors")[0].get("errors"))
+        self.assertEqual(Measurement.objects.filter(system=self.system).count(), 17)
+        self.assertFalse(Measurement.objects.filter(system=other_system).exists())
+        self.assertTrue(
+            Measurement.objects.filter(
+                system=self.system, timestamp="2025-02-06T10:00:00Z"
+            ).exists()
+        )
+
+    def test_bulk_create_measurements_reports_every_error(self):
+        payload = [
+            {"system": self.system.name, "ph": 15, "temperature": 20, "tds": 500}
+            for _ in range(150)
+        ]
+
+        response = self.client.post(f"{self.url}bulk/", payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data.get("errors")), 150)
+
+    def test_bulk_create_measurements_single_system_lookup(self):
+        payload = [
+            {"system": self.system.name, "ph": 6.5, "temperature": 20, "tds": 500}
+            for _ in range(50)
+        ]
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(f"{self.url}bulk/", payload, format="json")
+
+        statements = [
+            query["sql"].split()[0]
+            for query in context.captured_queries
+            if "SAVEPOINT" not in query["sql"]
+        ]
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # the systems lookup, the batch INSERT and one UPDATE per rollup bucket
+        self.assertEqual(statements, ["SELECT", "INSERT", "UPDATE", "UPDATE"])
+        self.assertEqual(response.data.get("created"), 50)
+
+    def test_bulk_create_measurements_invalid(self):
+        response = self.client.post(
+            f"{self.url}bulk/", {"system": self.system.name}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class MeasurementUploadTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.client.force_authenticate(user=self.user)
+
+        self.system = HydroponicSystem.objects.create(
+            name="Test System", owner=self.user, type="NFT"
+        )
+        self.rows = [
+            {
+                "system": self.system.name,
+                "ph": 6.0 + i / 10,
+                "temperature": 20,
+                "tds": 400,
+                "timestamp": f"2025-01-01T00:0{i}:00Z",
+            }
+            for i in range(4)
+        ]
+
+        self.url = reverse("measurement-upload")
+
+    def ndjson(self, rows):
+        return "\n".join(json.dumps(row) for row in rows).encode()
+
+    def post(self, body, **kwargs):
+        return self.client.post(f"{self.url}?upload_id={uuid.uuid4()}", body, **kwargs)
+
+    def test_upload_ndjson(self):
+        body = self.ndjson(self.rows) + b"\nnot json\n"
+
+        response = self.post(body, content_type="application/x-ndjson")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data.get("created"), 4)
+        self.assertEqual(response.data.get("failed"), 1)
+        self.assertEqual(response.data.get("offset"), 5)
+        self.assertTrue(response.data.get("finished"))
+        self.assertEqual(response.data.get("errors")[0].get("index"), 4)
+        self.assertEqual(Measurement.objects.filter(system=self.system).count(), 4)
+
+    def test_upload_csv(self):
+        body = "system,ph,temperature,tds,timestamp\n" + "".join(
+            f"{self.system.name},7.0,20,{400 + i},2025-01-01T00:00:0{i}Z\n"
+            for i in range(3)
+        )
+
+        response = self.post(body.encode(), content_type="text/csv")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data.get("created"), 3)
+        self.assertEqual(Measurement.objects.filter(tds=402).count(), 1)
+
+    def test_upload_rejects_non_finite_values(self):
+        body = (
+            self.ndjson(self.rows[:1])
+            + b'\n{"system": "Test System", "ph": NaN, "temperature": 20, "tds": 1}\n'
+        )
+
+        response = self.post(body, content_type="application/x-ndjson")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data.get("created"), 1)
+        self.assertEqual(response.data.get("errors")[0].get("index"), 1)
+
+        body = "system,ph,temperature,tds\n" + "".join(
+            f"{self.system.name},{ph},{temperature},400\n"
+            for ph, temperature in (("nan", 20), (7, "inf"), (7, "-inf"), (7, 20))
+        )
+
+        response = self.post(body.encode(), content_type="text/csv")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data.get("created"), 1)
+        self.assertEqual(
+            [list(error.get("errors")) for error in response.data.get("errors")],
+            [["ph"], ["temperature"], ["temperature"]],
+        )
+        self.assertEqual(
+            response.data.get("errors")[0].get("errors"),
+            {"ph": ["Ensure this value is a finite number."]},
+        )
+        self.assertTrue(
+            all(
+                math.isfinite(value)
+                for value in Measurement.objects.values_list("ph", flat=True)
+            )
+        )
+
+    @skipIf(connection.vendor != "postgresql", "COPY needs PostgreSQL")
+    def test_upload_copy_assigns_ids(self):
+        created = []
+        measurements_created.connect(
+            lambda measurements, **kwargs: created.extend(measurements),
+            weak=False,
+            dispatch_uid="test_upload_copy_assigns_ids",
+        )
+        self.addCleanup(
+            measurements_created.disconnect, dispatch_uid="test_upload_copy_assigns_ids"
+        )
+
+        response = self.post(
+            self.ndjson(self.rows), content_type="application/x-ndjson"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(measurement.pk for measurement in created),
+            sorted(Measurement.objects.values_list("id", flat=True)),
+        )
+        # the sequence moved past the copied rows
+        copied = max(measurement.pk for measurement in created)
+        self.assertGreater(
+            Measurement.objects.create(
+                system=self.system, ph=7, temperature=20, tds=1
+            ).pk,
+            copied,
+        )
+
+    def test_upload_requires_id(self):
+        response = self.client.post(
+            self.url, self.ndjson(self.rows), content_type="application/x-ndjson"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("upload_id", response.data)
+        self.assertFalse(MeasurementUpload.objects.exists())
+
+    def test_upload_resume(self):
+        upload = MeasurementUpload.objects.create(owner=self.user, offset=2, created=2)
+
+        response = self.client.post(
+            f"{self.url}?upload_id={upload.pk}",
+            self.ndjson(self.rows),
+            content_type="application/x-ndjson",
+        )
+        upload.refresh_from_db()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(
+                Measurement.objects.order_by("timestamp").values_list("ph", flat=True)
+            ),
+            [6.2, 6.3],
+        )
+        self.assertEqual(upload.created, 4)
+        self.assertEqual(upload.offset, 4)
+
+        response = self.client.get(f"{self.url}?upload_id={upload.pk}")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data.get("finished"))
+
+    def test_upload_of_other_user(self):
+        upload = MeasurementUpload.objects.create(owner=self.other_user)
+
+        response = self.client.get(f"{self.url}?upload_id={upload.pk}")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_upload_unsupported_media_type(self):
+        response = self.post(self.rows, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    def test_ingest_measurements_command(self):
+        with tempfile.NamedTemporaryFile(suffix=".ndjson") as file:
+            file.write(self.ndjson(self.rows))
+            file.flush()
+
+            call_command(
+                "ingest_measurements",
+                file.name,
+                user=self.user.username,
+                batch_size=3,
+                stdout=io.StringIO(),
+            )
+
+        self.assertEqual(Measurement.objects.filter(system=self.system).count(), 4)
+        self.assertEqual(MeasurementUpload.objects.get(owner=self.user).offset, 4)
+
+        with self.assertRaisesMessage(CommandError, "is not a valid UUID"):
+            call_command(
+                "ingest_measurements",
+                "-",
+                user=self.user.username,
+                fmt="ndjson",
+                upload_id="1",
+            )
+
+
+class MeasurementAggregateTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.client.force_authenticate(user=self.user)
+
+        self.system = HydroponicSystem.objects.create(
+            name="Test System", owner=self.user, type="NFT"
+        )
+        other_system = HydroponicSystem.objects.create(
+            name="Other System", owner=self.other_user, type="NFT"
+        )
+
+        readings = [
+            ("2025-01-01T10:05:00Z", 6.0, 20, 400),
+            ("2025-01-01T10:35:00Z", 7.0, 22, 600),
+            ("2025-01-01T11:15:00Z", 8.0, 24, 800),
+        ]
+        for system in (self.system, other_system):
+            for timestamp, ph, temperature, tds in readings:
+                Measurement.objects.create(
+                    system=system,
+                    timestamp=timestamp,
+                    ph=ph,
+                    temperature=temperature,
+                    tds=tds,
+                )
+
+        self.url = reverse("measurement-aggregate")
+
+    def test_aggregate_by_hour(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url + "?bucket=hour")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+
+        first, second = response.data
+        self.assertEqual(first.get("system"), self.system.name)
+        self.assertEqual(first.get("bucket"), "2025-01-01T10:00:00Z")
+        self.assertEqual(first.get("count"), 2)
+        self.assertEqual(
+            first.get("ph"), {"min": 6.0, "max": 7.0, "avg": 6.5, "stddev": 0.5}
+        )
+        self.assertEqual(second.get("count"), 1)
+        self.assertEqual(second.get("tds").get("avg"), 800)
+
+    def test_aggregate_with_filters(self):
+        response = self.client.get(
+            self.url
+            + "?bucket=day&ph_min=7&datetime_from=2025-01-01T10:30:00Z"
+            + f"&system={self.system.name}"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0].get("count"), 2)
+        self.assertEqual(response.data[0].get("temperature").get("min"), 22)
+
+    def test_aggregate_invalid_bucket(self):
+        response = self.client.get(self.url + "?bucket=week")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_aggregate_reads_whole_buckets_from_rollups(self):
+        # rollups are only read for whole buckets, make them diverge from the
+        # raw rows to see which source each bucket comes from
+        MeasurementRollup.objects.filter(
+            system=self.system, resolution="hour", bucket="2025-01-01T10:00:00Z"
+        ).update(count=100)
+
+        response = self.client.get(
+            self.url
+            + f"?bucket=hour&system={self.system.name}"
+            + "&datetime_from=2025-01-01T10:00:00Z&datetime_to=2025-01-01T11:30:00Z"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row.get("count") for row in response.data], [100, 1])
+
+        response = self.client.get(
+            self.url
+            + f"?bucket=hour&system={self.system.name}"
+            + "&datetime_from=2025-01-01T10:30:00Z"
+        )
+
+        self.assertEqual([row.get("count") for row in response.data], [1, 1])
+
+    def test_aggregate_minute_bucket_reads_raw_rows(self):
+        MeasurementRollup.objects.all().delete()
+
+        response = self.client.get(self.url + "?bucket=minute")
+
+        self.assertEqual(len(response.data), 3)
+
+
+class MeasurementRollupTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.client.force_authenticate(user=self.user)
+
+        self.system = HydroponicSystem.objects.create(
+            name="Test System", owner=self.user, type="NFT"
+        )
+        self.url = reverse("measurement-list")
+
+    def rollup(self, resolution="hour", bucket="2025-01-01T10:00:00Z"):
+        return MeasurementRollup.objects.get(
+            system=self.system, resolution=resolution, bucket=bucket
+        )
+
+    def test_rollups_follow_inserts(self):
+        Measurement.objects.create(
+            system=self.system,
+            timestamp="2025-01-01T10:05:00Z",
+            ph=6,
+            temperature=20,
+            tds=400,
+        )
+        payload = [
+            {
+                "system": self.system.name,
+                "ph": ph,
+                "temperature": 22,
+                "tds": 500,
+                "timestamp": f"2025-01-01T{hour}:30:00Z",
+            }
+            for ph, hour in ((7, 10), (8, 10), (5, 12))
+        ]
+        self.client.post(f"{self.url}bulk/", payload, format="json")
+
+        rollup = self.rollup()
+
+        self.assertEqual(rollup.count, 3)
+        self.assertEqual(rollup.ph_sum, 21)
+        self.assertEqual(rollup.ph_sum_squares, 149)
+        self.assertEqual((rollup.ph_min, rollup.ph_max), (6, 8))
+        self.assertEqual(self.rollup("day", "2025-01-01T00:00:00Z").count, 4)
+        self.assertEqual(self.rollup("day", "2025-01-01T00:00:00Z").ph_min, 5)
+
+    def test_rollups_follow_updates_and_deletes(self):
+        first, second = (
+            Measurement.objects.create(
+                system=self.system,
+                timestamp="2025-01-01T10:05:00Z",
+                ph=ph,
+                temperature=20,
+                tds=400,
+            )
+            for ph in (6, 7)
+        )
+
+        self.client.patch(f"{self.url}{first.id}/", {"ph": 9}, format="json")
+
+        self.assertEqual((self.rollup().ph_min, self.rollup().ph_max), (7, 9))
+
+        self.client.delete(f"{self.url}{second.id}/")
+
+        self.assertEqual((self.rollup().count, self.rollup().ph_sum), (1, 9))
+
+    def test_rollups_follow_moved_measurements(self):
+        other_system = HydroponicSystem.objects.create(
+            name="Other System", owner=self.user, type="DWC"
+        )
+        measurement = Measurement.objects.create(
+            system=self.system,
+            timestamp="2025-01-01T10:05:00Z",
+            ph=6,
+            temperature=20,
+            tds=400,
+        )
+
+        self.client.patch(
+            f"{self.url}{measurement.id}/",
+            {"system": other_system.name},
+            format="json",
+        )
+
+        self.assertFalse(MeasurementRollup.objects.filter(system=self.system).exists())
+        self.assertEqual(
+            MeasurementRollup.objects.get(
+                system=other_system, resolution="day", bucket="2025-01-01T00:00:00Z"
+            ).count,
+            1,
+        )
+
+    def test_rebuild_rollups_command(self):
+        Measurement.objects.bulk_create(
+            Measurement(
+                system=self.system,
+                timestamp=f"2025-01-0{day}T10:05:00Z",
+                ph=6,
+                temperature=20,
+                tds=400,
+            )
+            for day in (1, 2, 2)
+        )
+        self.assertFalse(MeasurementRollup.objects.exists())
+
+        call_command(
+            "rebuild_rollups",
+            system=[self.system.name],
+            since="2025-01-02T00:00:00Z",
+            stdout=io.StringIO(),
+        )
+
+        self.assertEqual(self.rollup("day", "2025-01-02T00:00:00Z").count, 2)
+        self.assertFalse(
+            MeasurementRollup.objects.filter(bucket__lt="2025-01-02T00:00:00Z").exists()
+        )
+
+    def test_rebuild_rollups_naive_bounds(self):
+        Measurement.objects.create(
+            system=self.system,
+            timestamp="2025-01-02T10:05:00Z",
+            ph=6,
+            temperature=20,
+            tds=400,
+        )
+        MeasurementRollup.objects.all().delete()
+
+        call_command(
+            "rebuild_rollups",
+            since="2025-01-02T10:00:00",
+            until="2025-01-02T11:00:00",
+            resolution="hour",
+            stdout=io.StringIO(),
+        )
+
+        self.assertEqual(self.rollup("hour", "2025-01-02T10:00:00Z").count, 1)
+
+    def test_system_detail_summary(self):
+        for hour in (10, 10, 11):
+            Measurement.objects.create(
+                system=self.system,
+                timestamp=f"2025-01-01T{hour}:05:00Z",
+                ph=6,
+                temperature=20,
+                tds=400,
+            )
+        url = reverse("hydroponic-detail", args=[self.system.id])
+
+        response = self.client.get(url + "?summary=hour")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row.get("count") for row in response.data.get("summary")], [2, 1]
+        )
+        self.assertNotIn("summary", self.client.get(url).data)
+        self.assertEqual(
+            self.client.get(url + "?summary=week").status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class MeasurementRetentionTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.system = HydroponicSystem.objects.create(
+            name="Test System", owner=self.user, type="NFT"
+        )
+        now = timezone.now()
+
+        for age in (0, 400, 800):
+            Measurement.objects.create(
+                system=self.system,
+                timestamp=now - timedelta(days=age),
+                ph=7,
+                temperature=20,
+                tds=400,
+            )
+
+    def test_prune_measurements_command(self):
+        call_command("prune_measurements", months=12, stdout=io.StringIO())
+
+        self.assertEqual(Measurement.objects.count(), 1)
+
+    def test_partitions_take_over_rows_from_default_partition(self):
+        if not is_partitioned():
+            self.skipTest("requires a partitioned table")
+
+        start = month_start(timezone.now() - timedelta(days=800))
+
+        created = ensure_partitions(start=start, months_ahead=1)
+
+        self.assertGreater(len(created), 24)
+        self.assertEqual(Measurement.objects.count(), 3)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM systems_measurement_default")
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+
+class QueryCountTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.client.force_authenticate(user=self.user)
+
+        self.systems = [
+            HydroponicSystem.objects.create(
+                name=f"System {i}", owner=self.user, type="NFT"
+            )
+            for i in range(5)
+        ]
+        Measurement.objects.bulk_create(
+            Measurement(system=system, ph=6.5, temperature=22, tds=500)
+            for _ in range(10)
+            for system in self.systems
+        )
+
+    def test_measurement_list_queries(self):
+        url = reverse("measurement-list")
+
+        # the count and the page, whatever the number of systems on the page
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+
+        self.assertEqual(
+            {obj.get("system") for obj in response.data.get("results")},
+            {system.name for system in self.systems},
+        )
+
+        with self.assertNumQueries(1):
+            self.client.get(url + "?count=false")
+
+        with self.assertNumQueries(2):
+            self.client.get(url + "?ordering=system&page=2")
+
+    def test_measurement_retrieve_queries(self):
+        measurement = Measurement.objects.filter(system=self.systems[0]).first()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                reverse("measurement-detail", args=[measurement.id])
+            )
+
+        self.assertEqual(response.data.get("system"), self.systems[0].name)
+
+    def test_system_detail_queries(self):
+        url = reverse("hydroponic-detail", args=[self.systems[0].id])
+
+        # the system, the count and the page of measurements
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+
+        self.assertEqual(len(response.data.get("measurements").get("results")), 10)
+
+        with self.assertNumQueries(2):
+            self.client.get(url + "?count=false")
+
+    def test_create_measurement_queries(self):
+        payload = {"system": self.systems[0].name, "ph": 7, "temperature": 20, "tds": 1}
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                reverse("measurement-list"), payload, format="json"
+            )
+
+        selects = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith("SELECT")
+        ]
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # the system lookup of the serializer, its owner is not fetched, and the
+        # alert rules of the system, which are only loaded once
+        self.assertEqual(len(selects), 2)
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.post(reverse("measurement-list"), payload, format="json")
+
+        self.assertEqual(
+            [
+                query["sql"]
+                for query in context.captured_queries
+                if query["sql"].startswith("SELECT")
+            ],
+            selects[:1],
+        )
+
+
+class MeasurementRowSerializerTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.client.force_authenticate(user=self.user)
+
+        self.system = HydroponicSystem.objects.create(
+            name="Système \u2028 1", owner=self.user, type="NFT"
+        )
+        for ph, tds, description in (
+            (7, 1e-05, None),
+            (0.1, 999999.999, ""),
+            (14, 0, 'Ünïcode "quoted" \u2029 </script>'),
+        ):
+            Measurement.objects.create(
+                system=self.system,
+                ph=ph,
+                temperature=-12.5,
+                tds=tds,
+                description=description,
+            )
+
+    def test_rows_render_like_measurement_serializer(self):
+        queryset = Measurement.objects.order_by("id")
+        expected = JSONRenderer().render(
+            MeasurementSerializer(queryset.select_related("system"), many=True).data
+        )
+
+        result = JSONRenderer().render(
+            MeasurementRowSerializer(MeasurementRowSerializer.values(queryset)).data
+        )
+
+        self.assertEqual(result, expected)
+
+    def test_list_renders_like_measurement_serializer(self):
+        response = self.client.get(reverse("measurement-list"))
+
+        queryset = Measurement.objects.order_by("-timestamp", "-id")
+        expected = JSONRenderer().render(
+            {
+                **response.data,
+                "results": MeasurementSerializer(queryset, many=True).data,
+            }
+        )
+
+        self.assertEqual(response.content, expected)
+
+
+class ResponseCacheTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.client.force_authenticate(user=self.user)
+
+        self.system = HydroponicSystem.objects.create(
+            name="System 1", owner=self.user, type="NFT"
+        )
+        self.other_system = HydroponicSystem.objects.create(
+            name="System 2", owner=self.other_user, type="NFT"
+        )
+        self.measurement = Measurement.objects.create(
+            system=self.system, ph=6.5, temperature=22, tds=500
+        )
+
+    def test_repeated_reads_are_cached(self):
+        urls = [
+            reverse("measurement-list"),
+            reverse("measurement-detail", args=[self.measurement.id]),
+            reverse("hydroponic-list"),
+            reverse("hydroponic-detail", args=[self.system.id]),
+        ]
+
+        for url in urls:
+            response = self.client.get(url)
+
+            with self.assertNumQueries(0):
+                cached = self.client.get(url)
+
+            self.assertEqual(cached.status_code, status.HTTP_200_OK)
+            self.assertEqual(cached.data, response.data)
+
+    def test_cache_is_per_user(self):
+        url = reverse("hydroponic-list")
+        self.client.get(url)
+
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.get(url)
+
+        self.assertEqual(
+            [obj.get("name") for obj in response.data.get("results")], ["System 2"]
+        )
+
+    def test_measurement_writes_invalidate_reads(self):
+        list_url = reverse("measurement-list")
+        detail_url = reverse("hydroponic-detail", args=[self.system.id])
+        self.client.get(list_url)
+        self.client.get(detail_url)
+
+        self.client.post(
+            reverse("measurement-bulk"),
+            [{"system": "System 1", "ph": 7, "temperature": 20, "tds": 1}],
+            format="json",
+        )
+
+        self.assertEqual(self.client.get(list_url).data.get("count"), 2)
+        self.assertEqual(
+            self.client.get(detail_url).data.get("measurements").get("count"), 2
+        )
+
+        self.client.delete(reverse("measurement-detail", args=[self.measurement.id]))
+
+        self.assertEqual(self.client.get(list_url).data.get("count"), 1)
+
+    def test_other_users_writes_keep_cache(self):
+        url = reverse("measurement-list")
+        self.client.get(url)
+
+        Measurement.objects.create(
+            system=self.other_system, ph=7, temperature=20, tds=1
+        )
+
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    def test_system_changes_invalidate_reads(self):
+        list_url = reverse("measurement-list")
+        detail_url = reverse("hydroponic-detail", args=[self.system.id])
+        self.client.get(list_url)
+        self.client.get(detail_url)
+
+        self.client.patch(detail_url, {"name": "Renamed"}, format="json")
+
+        self.assertEqual(self.client.get(detail_url).data.get("name"), "Renamed")
+        self.assertEqual(
+            self.client.get(list_url).data.get("results")[0].get("system"), "Renamed"
+        )
+
+        self.client.delete(detail_url)
+
+        self.assertEqual(
+            self.client.get(detail_url).status_code, status.HTTP_404_NOT_FOUND
+        )
+
+
+class ConditionalGetTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.client.force_authenticate(user=self.user)
+
+        self.system = HydroponicSystem.objects.create(
+            name="System 1", owner=self.user, type="NFT"
+        )
+        self.measurement = Measurement.objects.create(
+            system=self.system,
+            ph=6.5,
+            temperature=22,
+            tds=500,
+            timestamp="2025-01-01T10:00:00Z",
+        )
+        self.urls = [
+            reverse("measurement-list"),
+            reverse("hydroponic-detail", args=[self.system.id]),
+        ]
+
+    def test_unchanged_poll_returns_not_modified(self):
+        for url in self.urls:
+            response = self.client.get(url)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertFalse(response.has_header("Last-Modified"))
+
+            with self.assertNumQueries(0):
+                not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+            self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(not_modified["ETag"], response["ETag"])
+            self.assertEqual(not_modified.content, b"")
+
+    def test_changes_return_new_etag(self):
+        changes = [
+            # an older reading, an update and a deletion move no timestamp
+            lambda: Measurement.objects.create(
+                system=self.system,
+                ph=7,
+                temperature=20,
+                tds=1,
+                timestamp="2024-01-01T10:00:00Z",
+            ),
+            lambda: self.client.patch(
+                reverse("measurement-detail", args=[self.measurement.id]),
+                {"ph": 8},
+                format="json",
+            ),
+            lambda: self.client.delete(
+                reverse("measurement-detail", args=[self.measurement.id])
+            ),
+        ]
+
+        for change in changes:
+            etags = [self.client.get(url)["ETag"] for url in self.urls]
+            change()
+
+            for url, etag in zip(self.urls, etags):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_depends_on_query_and_user(self):
+        response = self.client.get(self.urls[0])
+
+        filtered = self.client.get(
+            self.urls[0] + "?ph_min=7", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(filtered.status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(user=self.other_user)
+        other = self.client.get(self.urls[0], HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(other.status_code, status.HTTP_200_OK)
+
+
+class MeasurementExportTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.client.force_authenticate(user=self.user)
+
+        self.system = HydroponicSystem.objects.create(
+            name="System 1", owner=self.user, type="NFT"
+        )
+        other_system = HydroponicSystem.objects.create(
+            name="System 2", owner=self.other_user, type="NFT"
+        )
+        Measurement.objects.bulk_create(
+            [
+                Measurement(
+                    system=system,
+                    ph=i % 14,
+                    temperature=20 + i / 10,
+                    tds=500,
+                    timestamp=timezone.now() - timedelta(minutes=i),
+                    description='a, "quoted"\nline' if i == 3 else None,
+                )
+                for i in range(25)
+                for system in (self.system, other_system)
+            ]
+        )
+        self.url = reverse("measurement-export")
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content)
+
+    def test_export_csv(self):
+        response, content = self.export(ph_min=7)
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual(
+            len(rows), Measurement.objects.filter(system=self.system, ph__gte=7).count()
+        )
+        self.assertEqual({row["system"] for row in rows}, {"System 1"})
+
+        response, content = self.export()
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertIn('a, "quoted"\nline', [row["description"] for row in rows])
+
+    def test_export_ndjson_matches_list(self):
+        response, content = self.export(export_format="ndjson")
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        listed = self.client.get(reverse("measurement-list")).data.get("results")
+        self.assertEqual(len(rows), 25)
+        self.assertEqual(rows[:10], json.loads(json.dumps(listed)))
+
+    @skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_export_columnar(self):
+        for fmt in ("parquet", "arrow"):
+            response, content = self.export(export_format=fmt, system="System 1")
+
+            if fmt == "parquet":
+                table = pyarrow.parquet.read_table(pyarrow.BufferReader(content))
+            else:
+                table = pyarrow.ipc.open_stream(content).read_all()
+
+            self.assertEqual(table.num_rows, 25)
+            self.assertEqual(set(table.column("system").to_pylist()), {"System 1"})
+
+    async def test_export_streams_asynchronously_under_asgi(self):
+        token = await sync_to_async(RefreshToken.for_user)(self.user)
+        response = await self.async_client.get(
+            self.url,
+            {"export_format": "ndjson"},
+            headers={"Authorization": f"Bearer {token.access_token}"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        content = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(content.decode().splitlines()), 25)
+
+    def test_export_invalid_format(self):
+        response = self.client.get(self.url, {"export_format": "xlsx"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_measurements_command(self):
+        with tempfile.NamedTemporaryFile(suffix=".ndjson") as output:
+            call_command(
+                "export_measurements",
+                output.name,
+                user="test_user",
+                format="ndjson",
+                filter=["ph_max=5"],
+            )
+            rows = [json.loads(line) for line in output.read().splitlines()]
+
+        self.assertEqual(
+            len(rows), Measurement.objects.filter(system=self.system, ph__lte=5).count()
+        )
+        self.assertEqual(
+            [row["timestamp"] for row in rows],
+            sorted(row["timestamp"] for row in rows),
+        )
+
+
+class MeasurementStreamTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.system = HydroponicSystem.objects.create(
+            name="System 1", owner=self.user, type="NFT"
+        )
+        self.other_system = HydroponicSystem.objects.create(
+            name="System 2", owner=self.other_user, type="NFT"
+        )
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.url = reverse("hydroponic-stream", args=[self.system.id])
+
+    @sync_to_async
+    def create_measurement(self, system):
+        # in the thread that owns the test transaction
+        with self.captureOnCommitCallbacks(execute=True):
+            return Measurement.objects.create(
+                system=system, ph=6.5, temperature=22, tds=500
+            )
+
+    async def test_stream_sends_new_measurements(self):
+        response = await self.async_client.get(
+            self.url, headers={"Authorization": f"Bearer {self.token}"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        events = response.streaming_content
+        self.assertEqual(await anext(events), b"retry: 5000\n\n")
+
+        await self.create_measurement(self.other_system)
+        measurement = await self.create_measurement(self.system)
+
+        event = await asyncio.wait_for(anext(events), 5)
+        name, data = event.decode().strip().split("\n")
+        self.assertEqual(name, "event: measurements")
+        self.assertEqual(
+            json.loads(data.removeprefix("data: ")),
+            [
+                {
+                    "id": measurement.id,
+                    "system": "System 1",
+                    "ph": 6.5,
+                    "temperature": 22.0,
+                    "tds": 500.0,
+                    "timestamp": json.loads(
+                        JSONRenderer().render(measurement.timestamp)
+                    ),
+                    "description": None,
+                }
+            ],
+        )
+
+        await events.aclose()
+
+    async def test_stream_authentication(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = await self.async_client.get(self.url, {"token": "invalid"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = await self.async_client.get(
+            reverse("hydroponic-stream", args=[self.other_system.id]),
+            {"token": self.token},
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = await self.async_client.get(self.url, {"token": self.token})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        await response.streaming_content.aclose()
+
+    def test_stream_needs_asgi(self):
+        response = Client().get(self.url, {"token": self.token})
+
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+        self.assertEqual(
+            response.json(),
+            {"detail": "Measurement streams need the ASGI application."},
+        )
+
+    async def websocket(self, path, query_string=b""):
+        incoming, outgoing = asyncio.Queue(), asyncio.Queue()
+        await incoming.put({"type": "websocket.connect"})
+        scope = {
+            "type": "websocket",
+            "path": path,
+            "query_string": query_string,
+            "headers": [],
+        }
+        task = asyncio.ensure_future(application(scope, incoming.get, outgoing.put))
+
+        return task, incoming, outgoing
+
+    async def test_websocket(self):
+        # the test transaction must survive the end of the handshake
+        for signal in (request_started, request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+
+        path = f"/systems/hydroponic/{self.system.id}/ws/"
+
+        task, _, outgoing = await self.websocket(path)
+        self.assertEqual(
+            await outgoing.get(), {"type": "websocket.close", "code": 4401}
+        )
+        await task
+
+        task, incoming, outgoing = await self.websocket(
+            path, f"token={self.token}".encode()
+        )
+        self.assertEqual(await outgoing.get(), {"type": "websocket.accept"})
+
+        measurement = await self.create_measurement(self.system)
+
+        message = await asyncio.wait_for(outgoing.get(), 5)
+        self.assertEqual(message["type"], "websocket.send")
+        self.assertEqual(
+            [row["id"] for row in json.loads(message["text"])["measurements"]],
+            [measurement.id],
+        )
+
+        await incoming.put({"type": "websocket.disconnect", "code": 1000})
+        await asyncio.wait_for(task, 5)
+
+    async def test_slow_subscriber_drops_oldest_messages(self):
+        broker = InProcessBroker(queue_size=2)
+        subscription = broker.subscribe(self.system.id)
+
+        for i in range(5):
+            broker.publish(self.system.id, i)
+        await asyncio.sleep(0)
+
+        self.assertEqual([await subscription.get(), await subscription.get()], [3, 4])
+        self.assertEqual(subscription.take_dropped(), 3)
+
+        subscription.close()
+        self.assertFalse(broker.has_subscribers(self.system.id))
+
+
+class WriteBehindTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.system = HydroponicSystem.objects.create(
+            name="System 1", owner=self.user, type="NFT"
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.spool = os.path.join(directory.name, "spool.jsonl")
+
+    def measurement(self, system=None):
+        return Measurement(
+            system=system or self.system,
+            ph=7,
+            temperature=20,
+            tds=1,
+            timestamp=timezone.now(),
+        )
+
+    def test_flush_in_batches(self):
+        write_behind = WriteBehindQueue(batch_size=2, max_size=3)
+
+        for _ in range(3):
+            write_behind.put(self.measurement())
+
+        with self.assertRaises(QueueFull):
+            write_behind.put(self.measurement())
+
+        self.assertEqual(Measurement.objects.count(), 0)
+        self.assertTrue(write_behind.flush())
+
+        metrics = write_behind.metrics()
+        self.assertEqual(Measurement.objects.count(), 3)
+        self.assertEqual(metrics["depth"], 0)
+        self.assertEqual(metrics["written"], 3)
+        self.assertEqual(metrics["batches"], 2)
+        self.assertEqual(metrics["rejected"], 1)
+        # the other receivers of measurements_created still run
+        self.assertEqual(MeasurementRollup.objects.get(resolution="hour").count, 3)
+
+    def test_spool_recovers_unwritten_measurements(self):
+        write_behind = WriteBehindQueue(spool_path=self.spool)
+        write_behind.put(self.measurement())
+        write_behind.flush()
+        write_behind.put(self.measurement())
+        write_behind.put(self.measurement())
+
+        # the spool of a running process is left alone
+        self.assertEqual(WriteBehindQueue(spool_path=self.spool).recover(), 0)
+
+        # the process dies before the next flush
+        write_behind.spool.close()
+
+        self.assertEqual(WriteBehindQueue(spool_path=self.spool).recover(), 2)
+        self.assertEqual(Measurement.objects.count(), 3)
+        self.assertEqual(WriteBehindQueue(spool_path=self.spool).recover(), 0)
+        self.assertEqual(os.listdir(os.path.dirname(self.spool)), [])
+
+    def write_dead_spool(self):
+        # another worker wrote one reading and died
+        with open(f"{self.spool}.{os.getpid() + 1}", "w") as spool:
+            entry = {
+                "system_id": self.system.id,
+                "ph": 7,
+                "temperature": 20,
+                "tds": 1,
+                "timestamp": timezone.now().isoformat(),
+                "description": None,
+                "seq": 1,
+            }
+            spool.write(json.dumps(entry) + "\n")
+
+    def test_spool_per_process(self):
+        write_behind = WriteBehindQueue(spool_path=self.spool)
+        write_behind.put(self.measurement())
+        write_behind.flush()
+        self.write_dead_spool()
+
+        # truncating its own spool does not touch the other one
+        write_behind.put(self.measurement())
+        write_behind.flush()
+
+        self.assertEqual(WriteBehindQueue(spool_path=self.spool).recover(), 1)
+        self.assertEqual(Measurement.objects.count(), 3)
+
+        write_behind.stop()
+
+        self.assertEqual(os.listdir(os.path.dirname(self.spool)), [])
+
+    @override_settings(
+        MEASUREMENT_WRITE_BEHIND=True,
+        MEASUREMENT_WRITE_BEHIND_FLUSH_INTERVAL=3600,
+    )
+    def test_startup_recovers_spools(self):
+        get_queue.cache_clear()
+        self.addCleanup(get_queue.cache_clear)
+        self.write_dead_spool()
+
+        with self.settings(MEASUREMENT_WRITE_BEHIND_SPOOL=self.spool):
+            startup()
+            self.addCleanup(get_queue().stop)
+
+        self.assertEqual(Measurement.objects.count(), 1)
+
+    def test_measurements_of_deleted_systems_are_dropped(self):
+        other_system = HydroponicSystem.objects.create(
+            name="System 2", owner=self.user, type="NFT"
+        )
+        write_behind = WriteBehindQueue()
+        write_behind.put(self.measurement())
+        write_behind.put(self.measurement(other_system))
+        HydroponicSystem.objects.filter(pk=other_system.pk).delete()
+
+        write_behind.flush()
+
+        self.assertEqual(Measurement.objects.count(), 1)
+        self.assertEqual(write_behind.metrics()["dropped"], 1)
+
+    @override_settings(
+        MEASUREMENT_WRITE_BEHIND=True,
+        MEASUREMENT_WRITE_BEHIND_FLUSH_INTERVAL=3600,
+        MEASUREMENT_WRITE_BEHIND_BATCH_SIZE=1000,
+    )
+    def test_create_measurement_is_accepted(self):
+        get_queue.cache_clear()
+        self.addCleanup(get_queue.cache_clear)
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.post(
+            reverse("measurement-list"),
+            {"system": "System 1", "ph": 7, "temperature": 20, "tds": 1},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertIsNone(response.data.get("id"))
+        self.assertEqual(Measurement.objects.count(), 0)
+
+        write_behind = get_queue()
+        self.addCleanup(write_behind.stop)
+        write_behind.flush()
+
+        measurement = Measurement.objects.get()
+        self.assertEqual(
+            MeasurementSerializer(measurement).data["timestamp"],
+            response.data.get("timestamp"),
+        )
+
+        url = reverse("measurement-write-behind")
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        response = self.client.get(url)
+        self.assertEqual(response.data.get("written"), 1)
+
+    @override_settings(
+        MEASUREMENT_WRITE_BEHIND=True,
+        MEASUREMENT_WRITE_BEHIND_FLUSH_INTERVAL=3600,
+    )
+    async def test_asgi_shutdown_drains_queue(self):
+        get_queue.cache_clear()
+        self.addCleanup(get_queue.cache_clear)
+        write_behind = await sync_to_async(get_queue)()
+        await sync_to_async(write_behind.put)(self.measurement())
+
+        incoming, outgoing = asyncio.Queue(), asyncio.Queue()
+        for message in ("lifespan.startup", "lifespan.shutdown"):
+            await incoming.put({"type": message})
+
+        await application({"type": "lifespan"}, incoming.get, outgoing.put)
+
+        self.assertEqual(
+            [await outgoing.get(), await outgoing.get()],
+            [
+                {"type": "lifespan.startup.complete"},
+                {"type": "lifespan.shutdown.complete"},
+            ],
+        )
+        self.assertEqual(await Measurement.objects.acount(), 1)
+        self.assertFalse(write_behind.thread.is_alive())
+
+
+class AsyncViewsTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.client.force_authenticate(user=self.user)
+        self.headers = {
+            "Authorization": f"Bearer {RefreshToken.for_user(self.user).access_token}"
+        }
+
+        self.system = HydroponicSystem.objects.create(
+            name="System 1", owner=self.user, type="NFT"
+        )
+        self.other_system = HydroponicSystem.objects.create(
+            name="System 2", owner=self.other_user, type="DWC"
+        )
+        for i in range(15):
+            for system in (self.system, self.other_system):
+                Measurement.objects.create(
+                    system=system,
+                    ph=i % 14,
+                    temperature=20,
+                    tds=500,
+                    timestamp=timezone.now() - timedelta(minutes=i),
+                )
+
+    def async_request(self, method, url, data=None, **kwargs):
+        request = getattr(self.async_client, method)
+        kwargs.setdefault("headers", self.headers)
+
+        if method == "post":
+            kwargs["content_type"] = "application/json"
+
+        return async_to_sync(request)(url, data, **kwargs)
+
+    def assertSameResponse(self, name, args=(), query=""):
+        sync_url = reverse(name, args=args) + query
+        async_url = reverse(f"async-{name}", args=args) + query
+
+        expected = self.client.get(sync_url)
+        response = self.async_request("get", async_url)
+
+        self.assertEqual(response.status_code, expected.status_code)
+        # links point to the URL that was requested
+        self.assertEqual(
+            response.content.decode().replace("/async/", "/"),
+            JSONRenderer().render(expected.data).decode(),
+        )
+
+    def test_reads_match_sync_views(self):
+        measurement = Measurement.objects.filter(system=self.system).first()
+
+        self.assertSameResponse("hydroponic-list")
+        self.assertSameResponse("hydroponic-list", query="?type=DWC")
+        self.assertSameResponse("hydroponic-detail", args=[self.system.id])
+        self.assertSameResponse(
+            "hydroponic-detail", args=[self.system.id], query="?summary=hour"
+        )
+        self.assertSameResponse("hydroponic-detail", args=[self.other_system.id])
+        self.assertSameResponse("measurement-list")
+        self.assertSameResponse("measurement-list", query="?ph_min=5&count=false")
+        self.assertSameResponse("measurement-list", query="?ordering=ph&page=2")
+        self.assertSameResponse("measurement-detail", args=[measurement.id])
+
+    def test_cursor_pagination(self):
+        response = self.async_request("get", reverse("async-measurement-list"))
+        next_page = self.async_request("get", json.loads(response.content)["next"])
+
+        self.assertEqual(
+            [row["id"] for row in json.loads(next_page.content)["results"]],
+            list(
+                Measurement.objects.filter(system=self.system)
+                .order_by("-timestamp", "-id")
+                .values_list("id", flat=True)[10:]
+            ),
+        )
+
+    def test_create(self):
+        response = self.async_request(
+            "post",
+            reverse("async-measurement-list"),
+            {"system": "System 1", "ph": 7, "temperature": 20, "tds": 1},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        measurement = Measurement.objects.get(pk=json.loads(response.content)["id"])
+        self.assertEqual(measurement.system, self.system)
+        # the receivers of post_save run as for the sync views
+        self.assertEqual(
+            MeasurementRollup.objects.filter(
+                system=self.system, resolution="day"
+            ).aggregate(Sum("count"))["count__sum"],
+            16,
+        )
+
+        response = self.async_request(
+            "post",
+            reverse("async-measurement-list"),
+            {"system": "System 2", "ph": 7, "temperature": 20, "tds": 1},
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.async_request(
+            "post",
+            reverse("async-hydroponic-list"),
+            {"name": "System 3", "type": "NFT"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(HydroponicSystem.objects.get(name="System 3").owner, self.user)
+
+        response = self.async_request(
+            "post",
+            reverse("async-hydroponic-list"),
+            {"name": "System 3", "type": "NFT"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("name", json.loads(response.content))
+
+    def test_authentication(self):
+        url = reverse("async-measurement-list")
+
+        response = self.async_request("get", url, headers={})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response["WWW-Authenticate"], 'Bearer realm="api"')
+
+        response = self.async_request(
+            "get", url, headers={"Authorization": "Bearer invalid"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.async_request(
+            "delete", reverse("async-hydroponic-detail", args=[self.system.id])
+        )
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_csrf_exempt(self):
+        client = Client(enforce_csrf_checks=True)
+        data = {"system": "System 1", "ph": 7, "temperature": 20, "tds": 1}
+
+        for name in ("measurement-list", "async-measurement-list"):
+            response = client.post(
+                reverse(name),
+                data,
+                content_type="application/json",
+                headers=self.headers,
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = client.post(
+            reverse("async-hydroponic-list"),
+            {"name": "System 3", "type": "NFT"},
+            content_type="application/json",
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+@override_settings(ALERT_NOTIFIER="systems.alerts.LocMemNotifier")
+class AlertTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        get_engine.cache_clear()
+        get_notifier.cache_clear()
+        self.addCleanup(get_notifier.cache_clear)
+        outbox.clear()
+
+        self.client.force_authenticate(user=self.user)
+
+        self.system = HydroponicSystem.objects.create(
+            name="System 1", owner=self.user, type="NFT"
+        )
+        self.start = timezone.now() - timedelta(hours=1)
+
+    def ingest(self, *rows, metric="ph"):
+        measurements = [
+            Measurement(
+                system=self.system,
+                timestamp=self.start + timedelta(minutes=minute),
+                **{"ph": 7, "temperature": 20, "tds": 500, metric: value},
+            )
+            for minute, value in rows
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Measurement.objects.bulk_create(measurements)
+            measurements_created.send(sender=Measurement, measurements=measurements)
+
+        return [(alert.state, alert.value) for alert in outbox]
+
+    def test_band_rule(self):
+        rule = AlertRule.objects.create(
+            system=self.system, metric="ph", min_value=5.5, max_value=7.5
+        )
+
+        self.assertEqual(
+            self.ingest((0, 7), (1, 8), (2, 8.2), (3, 7)),
+            [
+                ("firing", 8),
+                ("resolved", 7),
+            ],
+        )
+        self.assertEqual(outbox[0].message, "System 1: pH is 8, above 7.5")
+        self.assertEqual(Alert.objects.filter(rule=rule).count(), 2)
+
+        self.ingest((4, 5))
+        rule.refresh_from_db()
+        self.assertEqual(rule.firing_since, self.start + timedelta(minutes=4))
+        self.assertEqual(outbox[-1].message, "System 1: pH is 5, below 5.5")
+
+    def test_sustained_rule(self):
+        AlertRule.objects.create(
+            system=self.system,
+            metric="temperature",
+            kind="sustained",
+            max_value=25,
+            duration=10,
+        )
+
+        alerts = self.ingest(
+            (0, 30),
+            (5, 30),
+            (6, 20),
+            (7, 30),
+            (16, 30),
+            (17, 30),
+            (18, 20),
+            metric="temperature",
+        )
+
+        self.assertEqual(alerts, [("firing", 30), ("resolved", 20)])
+        self.assertEqual(outbox[0].measured_at, self.start + timedelta(minutes=17))
+
+    def test_rate_rule(self):
+        AlertRule.objects.create(
+            system=self.system, metric="tds", kind="rate", max_rate=50
+        )
+
+        alerts = self.ingest((0, 500), (2, 580), (3, 700), (5, 720), metric="tds")
+
+        self.assertEqual(alerts, [("firing", 120), ("resolved", 10)])
+
+    def test_out_of_order_measurements_are_skipped(self):
+        AlertRule.objects.create(system=self.system, metric="ph", max_value=7.5)
+
+        self.ingest((10, 7))
+
+        self.assertEqual(self.ingest((5, 9)), [])
+
+    def test_state_survives_reload(self):
+        rule = AlertRule.objects.create(system=self.system, metric="ph", max_value=7.5)
+        self.ingest((0, 8))
+
+        # another process, or a restart
+        get_engine.cache_clear()
+
+        self.assertEqual(self.ingest((1, 9)), [("firing", 8)])
+        self.assertEqual(self.ingest((2, 7)), [("firing", 8), ("resolved", 7)])
+        self.assertFalse(Alert.objects.filter(rule=rule, value=9).exists())
+
+    def test_evaluation_uses_no_queries(self):
+        AlertRule.objects.create(system=self.system, metric="ph", max_value=7.5)
+        engine = get_engine()
+        engine.load({self.system.pk})
+
+        measurements = [
+            Measurement(
+                system=self.system,
+                ph=7 + i % 2,
+                temperature=20,
+                tds=500,
+                timestamp=self.start + timedelta(seconds=i),
+            )
+            for i in range(100)
+        ]
+
+        with self.assertNumQueries(0):
+            alerts = engine.evaluate(measurements)
+
+        self.assertEqual(len(alerts), 99)
+
+    def test_rule_api(self):
+        url = reverse("alert-rule-list")
+        other_system = HydroponicSystem.objects.create(
+            name="System 2", owner=self.other_user, type="NFT"
+        )
+
+        response = self.client.post(
+            url,
+            {"system": "System 1", "metric": "ph", "kind": "sustained", "max_value": 8},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("duration", response.data)
+
+        response = self.client.post(
+            url,
+            {"system": "System 2", "metric": "ph", "max_value": 8},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.client.post(
+            url,
+            {"system": "System 1", "metric": "ph", "max_value": 8},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        detail_url = reverse("alert-rule-detail", args=[response.data["id"]])
+        response = self.client.patch(detail_url, {"min_value": 9}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("max_value", response.data)
+
+        AlertRule.objects.create(system=other_system, metric="ph", max_value=8)
+        self.ingest((0, 9))
+
+        response = self.client.get(reverse("alert-list"), {"system": "System 1"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(response.data["results"][0]["state"], "firing")
+        self.assertEqual(response.data["results"][0]["metric"], "ph")
+
+        response = self.client.delete(
+            reverse("alert-detail", args=[response.data["results"][0]["id"]])
+        )
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class DownsamplingTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.client.force_authenticate(user=self.user)
+
+        self.system = HydroponicSystem.objects.create(
+            name="System 1", owner=self.user, type="NFT"
+        )
+        self.start = timezone.now().replace(microsecond=0) - timedelta(days=1)
+        Measurement.objects.bulk_create(
+            Measurement(
+                system=self.system,
+                ph=7 + math.sin(i / 50),
+                temperature=20 + (i == 700) * 10,
+                tds=500 + i % 7,
+                timestamp=self.start + timedelta(minutes=i),
+            )
+            for i in range(1000)
+        )
+        self.url = reverse("hydroponic-series", args=[self.system.id])
+
+    def reference_lttb(self, x, y, points):
+        # the sequential algorithm, point by point
+        n = len(x)
+        every = (n - 2) / (points - 2)
+        selected, a = [0], 0
+
+        for i in range(points - 2):
+            start, end = int(i * every) + 1, int((i + 1) * every) + 1
+            next_start, next_end = end, min(int((i + 2) * every) + 1, n)
+            if i == points - 3:
+                next_start, next_end = n - 1, n
+            avg_x = sum(x[next_start:next_end]) / (next_end - next_start)
+            avg_y = sum(y[next_start:next_end]) / (next_end - next_start)
+
+            areas = [
+                abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+                for j in range(start, end)
+            ]
+            a = start + areas.index(max(areas))
+            selected.append(a)
+
+        return selected + [n - 1]
+
+    def test_lttb(self):
+        rng = numpy.random.default_rng(0)
+        x = numpy.cumsum(rng.integers(1, 100, 5000))
+        y = rng.normal(size=5000)
+
+        for points in (3, 10, 137, 1000):
+            self.assertEqual(
+                lttb(x, y, points).tolist(),
+                self.reference_lttb((x - x[0]).tolist(), y.tolist(), points),
+            )
+
+        self.assertEqual(lttb(x[:10], y[:10], 100).tolist(), list(range(10)))
+
+    def test_minmax(self):
+        y = numpy.random.default_rng(0).normal(size=5000)
+
+        indices = minmax(y, 100)
+
+        self.assertLessEqual(len(indices), 100)
+        self.assertEqual(indices.tolist(), sorted(set(indices.tolist())))
+        self.assertIn(y.argmin(), indices)
+        self.assertIn(y.argmax(), indices)
+
+    def test_series(self):
+        response = self.client.get(
+            self.url, {"points": 50, "metrics": "ph,temperature"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1000)
+        self.assertEqual(set(response.data["series"]), {"ph", "temperature"})
+
+        temperature = response.data["series"]["temperature"]
+        self.assertEqual(len(temperature["values"]), 50)
+        self.assertEqual(len(temperature["timestamps"]), 50)
+        # the spike survives
+        self.assertIn(30, temperature["values"])
+        self.assertEqual(temperature["timestamps"][0], format_datetime(self.start))
+
+        response = self.client.get(self.url, {"points": 50, "method": "minmax"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(len(response.data["series"]["tds"]["values"]), 50)
+
+    def test_series_datetime_range(self):
+        response = self.client.get(
+            self.url,
+            {
+                "points": 1000,
+                "datetime_from": (self.start + timedelta(minutes=100)).isoformat(),
+                "datetime_to": (self.start + timedelta(minutes=199)).isoformat(),
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 100)
+        self.assertEqual(len(response.data["series"]["ph"]["values"]), 100)
+        self.assertEqual(
+            response.data["series"]["ph"]["timestamps"][0],
+            format_datetime(self.start + timedelta(minutes=100)),
+        )
+
+    def test_series_invalid(self):
+        for params in (
+            {"points": 2},
+            {"points": "many"},
+            {"method": "average"},
+            {"metrics": "ph,humidity"},
+            {"datetime_from": "yesterday"},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ColumnarResponseTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.client.force_authenticate(user=self.user)
+
+        systems = [
+            HydroponicSystem.objects.create(
+                name=f"System {i}", owner=self.user, type="NFT"
+            )
+            for i in range(2)
+        ]
+        start = timezone.now() - timedelta(days=1)
+        Measurement.objects.bulk_create(
+            Measurement(
+                system=systems[i % 2],
+                ph=i % 14,
+                temperature=20 + i / 10,
+                tds=500.5,
+                timestamp=start + timedelta(seconds=10 * i, microseconds=i),
+                description="Ünïcode" if i == 3 else None,
+            )
+            for i in range(30)
+        )
+        self.url = reverse("measurement-list")
+
+    def decode(self, columns):
+        # what a client does with the columnar format
+        rows, pk, timestamp = [], 0, 0
+
+        for i in range(len(columns["id"])):
+            pk += columns["id"][i]
+            timestamp += columns["timestamp"][i]
+            rows.append(
+                {
+                    "id": pk,
+                    "system": columns["systems"][columns["system"][i]],
+                    "ph": columns["ph"][i],
+                    "temperature": columns["temperature"][i],
+                    "tds": columns["tds"][i],
+                    "timestamp": format_datetime(
+                        datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+                        + timedelta(microseconds=timestamp)
+                    ),
+                    "description": columns["description"][i],
+                }
+            )
+
+        return rows
+
+    def test_columnar_json(self):
+        params = {"ordering": "timestamp", "system": "System 1"}
+        expected = self.client.get(self.url, params)
+
+        response = self.client.get(
+            self.url, params, HTTP_ACCEPT=ColumnarJSONRenderer.media_type
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], ColumnarJSONRenderer.media_type)
+        data = json.loads(response.content)
+        self.assertEqual(data["count"], 15)
+        self.assertEqual(data["results"]["systems"], ["System 1"])
+        # deltas after the first value
+        self.assertEqual(set(data["results"]["id"][1:]), {2})
+        self.assertEqual(set(data["results"]["timestamp"][1:]), {20000002})
+        self.assertEqual(self.decode(data["results"]), expected.data["results"])
+        self.assertLess(len(response.content), len(expected.content) / 2)
+
+        # follows the cursor like the JSON list
+        response = self.client.get(
+            data["next"], HTTP_ACCEPT=ColumnarJSONRenderer.media_type
+        )
+        expected = self.client.get(expected.data["next"])
+        self.assertEqual(
+            self.decode(json.loads(response.content)["results"]),
+            expected.data["results"],
+        )
+
+    @skipIf(msgpack is None, "msgpack is not installed")
+    def test_columnar_msgpack(self):
+        expected = self.client.get(self.url)
+
+        response = self.client.get(
+            self.url, HTTP_ACCEPT=ColumnarMessagePackRenderer.media_type
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response["Content-Type"], ColumnarMessagePackRenderer.media_type
+        )
+        data = msgpack.unpackb(response.content)
+        self.assertEqual(data["count"], 30)
+        self.assertEqual(data["results"]["systems"], ["System 1", "System 0"])
+        self.assertEqual(self.decode(data["results"]), expected.data["results"])
+
+    def test_columnar_cached_apart(self):
+        self.client.get(self.url)
+
+        response = self.client.get(
+            self.url, HTTP_ACCEPT=ColumnarJSONRenderer.media_type
+        )
+        self.assertIn("systems", json.loads(response.content)["results"])
+
+        response = self.client.get(self.url)
+        self.assertIsInstance(response.data["results"], list)
+
+    def test_columnar_only_for_lists(self):
+        measurement = Measurement.objects.first()
+
+        response = self.client.get(
+            reverse("measurement-detail", args=[measurement.id]),
+            HTTP_ACCEPT=ColumnarJSONRenderer.media_type,
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+
+
+class CompressionTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.client.force_authenticate(user=self.user)
+
+        self.system = HydroponicSystem.objects.create(
+            name="System 1", owner=self.user, type="NFT"
+        )
+        Measurement.objects.bulk_create(
+            Measurement(
+                system=self.system,
+                ph=7,
+                temperature=20 + i / 10,
+                tds=500,
+                timestamp=timezone.now() - timedelta(minutes=i),
+            )
+            for i in range(100)
+        )
+        self.url = reverse("measurement-list")
+        self.expected = self.client.get(self.url).content
+
+    def test_parse_accept_encoding(self):
+        self.assertEqual(
+            parse_accept_encoding("gzip, br;q=0.5, zstd; q=0, *;q=bad"),
+            {"gzip": 1.0, "br": 0.5, "zstd": 0.0, "*": 0.0},
+        )
+        self.assertEqual(parse_accept_encoding(""), {})
+
+    @override_settings(COMPRESSION_ENCODINGS=["gzip"])
+    def test_gzip(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertEqual(zlib.decompress(response.content, 31), self.expected)
+        self.assertLess(len(response.content), len(self.expected) / 3)
+
+    @skipIf(zstandard is None, "zstandard is not installed")
+    def test_zstd(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip, br, zstd")
+
+        self.assertEqual(response["Content-Encoding"], "zstd")
+        self.assertEqual(
+            zstandard.ZstdDecompressor().decompress(response.content), self.expected
+        )
+
+    @skipIf(brotli is None, "brotli is not installed")
+    def test_brotli(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip, br")
+
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content), self.expected)
+
+    def test_not_compressed(self):
+        for accept_encoding in ("", "identity", "gzip;q=0, zstd;q=0, br;q=0"):
+            response = self.client.get(self.url, HTTP_ACCEPT_ENCODING=accept_encoding)
+            self.assertFalse(response.has_header("Content-Encoding"))
+            self.assertEqual(response.content, self.expected)
+
+        # shorter than COMPRESSION_MIN_SIZE
+        response = self.client.get(
+            reverse("measurement-detail", args=[Measurement.objects.first().id]),
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    @override_settings(COMPRESSION_ENCODINGS=[])
+    def test_disabled(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    @override_settings(COMPRESSION_ENCODINGS=["gzip"])
+    def test_streaming(self):
+        url = reverse("measurement-export")
+        expected = b"".join(self.client.get(url).streaming_content)
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+        chunks = list(response.streaming_content)
+        # every chunk can be decoded as soon as it arrives
+        decompressor = zlib.decompressobj(31)
+        first = decompressor.decompress(chunks[0])
+        self.assertTrue(first)
+        self.assertTrue(expected.startswith(first))
+        self.assertEqual(zlib.decompress(b"".join(chunks), 31), expected)
+
+    @override_settings(COMPRESSION_ENCODINGS=["gzip"])
+    def test_conditional_get(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertTrue(response["ETag"].startswith('W/"'))
+
+        response = self.client.get(
+            self.url,
+            HTTP_ACCEPT_ENCODING="gzip",
+            HTTP_IF_NONE_MATCH=response["ETag"],
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class FastJSONRendererTestCase(BaseTestCase):
+    def test_renders_like_json_renderer(self):
+        data = {
+            "timestamp": timezone.now(),
+            "date": timezone.now().date(),
+            "id": uuid.uuid4(),
+            "values": (1, 1.5, 1e-05, None, True),
+            "text": 'Ünïcode "quoted" \u2028 \u2029 </script>',
+            1: "int key",
+        }
+
+        result = FastJSONRenderer().render(data)
+
+        self.assertEqual(json.loads(result), json.loads(JSONRenderer().render(data)))
+        self.assertNotIn("\u2028".encode(), result)
+        self.assertIn(b"\\u2028", result)
+
+    def test_indent(self):
+        data = {"a": [1, 2]}
+
+        self.assertEqual(
+            FastJSONRenderer().render(data, "application/json; indent=4"),
+            JSONRenderer().render(data, "application/json; indent=4"),
+        )
+
+    def test_api_uses_json_renderer_by_default(self):
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get(reverse("measurement-list"))
+
+        self.assertIs(type(response.accepted_renderer), JSONRenderer)
+
+
+@override_settings(INSTRUMENTATION_SAMPLE_RATE=1)
+class InstrumentationTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}"
+        )
+
+        system = HydroponicSystem.objects.create(
+            name="System 1", owner=self.user, type="NFT"
+        )
+        Measurement.objects.bulk_create(
+            Measurement(system=system, ph=7, temperature=20, tds=500) for _ in range(20)
+        )
+        registry.reset()
+
+    def metric(self, name, **labels):
+        text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+        prefix = f"{name}{{{text}"
+
+        for line in registry.render().splitlines():
+            if line.startswith(prefix):
+                return float(line.rsplit(" ", 1)[1])
+
+        return None
+
+    def test_request_metrics(self):
+        self.client.get(reverse("measurement-list"))
+
+        labels = {"endpoint": "measurement-list", "method": "GET"}
+        self.assertEqual(
+            self.metric("hydro_sys_requests_total", **labels, status=200), 1
+        )
+        self.assertEqual(
+            self.metric("hydro_sys_request_duration_seconds_count", **labels), 1
+        )
+        self.assertEqual(self.metric("hydro_sys_sampled_requests_total", **labels), 1)
+        # user, count, page (and the cache versions, which are not queries)
+        self.assertGreaterEqual(self.metric("hydro_sys_db_queries_total", **labels), 3)
+        self.assertEqual(
+            self.metric("hydro_sys_db_duplicate_queries_total", **labels), 0
+        )
+        for phase in ("auth", "db", "serialize", "render"):
+            self.assertGreater(
+                self.metric(
+                    "hydro_sys_request_phase_seconds_total", **labels, phase=phase
+                ),
+                0,
+            )
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        self.client.get(reverse("measurement-list"))
+
+        labels = {"endpoint": "measurement-list", "method": "GET"}
+        self.assertEqual(
+            self.metric("hydro_sys_requests_total", **labels, status=200), 1
+        )
+        self.assertIsNone(self.metric("hydro_sys_sampled_requests_total", **labels))
+
+    def test_duplicate_queries(self):
+        metrics = RequestMetrics()
+
+        metrics.add_query("SELECT 1 WHERE id = %s", [1], False, 0.001)
+        metrics.add_query("SELECT 1 WHERE id = %s", [2], False, 0.001)
+        metrics.add_query("SELECT 1 WHERE id = %s", [1], False, 0.002)
+        metrics.add_query("INSERT INTO t VALUES (%s)", [[1], [1]], True, 0.001)
+
+        self.assertEqual(metrics.queries, 4)
+        self.assertEqual(metrics.duplicates, 1)
+        self.assertEqual(
+            metrics.top_statements(),
+            [
+                ("SELECT ? WHERE id = ?", [3, 0.004]),
+                ("INSERT INTO t VALUES (...)", [1, 0.001]),
+            ],
+        )
+
+    def test_fingerprint(self):
+        self.assertEqual(
+            fingerprint(
+                """SELECT "a" FROM "t"\n WHERE "b" IN (%s, %s, %s)"""
+                """ AND "c" = 'x''y' LIMIT 21"""
+            ),
+            """SELECT "a" FROM "t" WHERE "b" IN (...) AND "c" = ? LIMIT ?""",
+        )
+
+    @override_settings(INSTRUMENTATION_SLOW_REQUEST_MS=0.001)
+    def test_slow_request_log(self):
+        with self.assertLogs("hydro_sys.instrumentation", "WARNING") as logs:
+            self.client.get(reverse("measurement-list"))
+
+        self.assertIn("Slow request GET /systems/measurements/ (200)", logs.output[0])
+        self.assertIn('FROM "systems_measurement"', logs.output[0])
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse("hydroponic-list"))
+
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn(
+            b'hydro_sys_requests_total{endpoint="hydroponic-list",method="GET",'
+            b'status="200"} 1',
+            response.content,
+        )
+
+        response = self.client.get(reverse("metrics"), REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SyntheticDataTestCase(BaseTestCase):
+    def generate(self, **options):
+        options = {
+            "users": 2,
+            "systems": 2,
+            "measurements": 300,
+            "workers": 1,
+            "batch_size": 100,
+            "end": "2025-01-01T12:00:00Z",
+            "stdout": io.StringIO(),
+            **options,
+        }
+        call_command("generate_synthetic_data", **options)
+
+    def test_generate_command(self):
+        self.generate()
+
+        users = User.objects.filter(username__startswith="synthetic_user_")
+        systems = HydroponicSystem.objects.filter(owner__in=users)
+        measurements = Measurement.objects.filter(system__in=systems)
+
+        self.assertEqual(users.count(), 2)
+        self.assertEqual(systems.count(), 4)
+        self.assertEqual(measurements.count(), 1200)
+        self.assertEqual(
+            measurements.order_by("timestamp").last().timestamp,
+            datetime(2025, 1, 1, 12, tzinfo=dt_timezone.utc),
+        )
+        self.assertEqual(
+            measurements.order_by("timestamp").first().timestamp,
+            datetime(2025, 1, 1, 7, 1, tzinfo=dt_timezone.utc),
+        )
+        self.assertEqual(
+            MeasurementRollup.objects.filter(
+                system__in=systems, resolution="day"
+            ).aggregate(total=Sum("count"))["total"],
+            1200,
+        )
+
+        for measurement in measurements[:50]:
+            measurement.full_clean()
+
+    def test_generate_command_refuses_used_prefix(self):
+        self.generate(users=1, systems=1, measurements=10)
+
+        with self.assertRaises(CommandError):
+            self.generate(users=1, systems=1, measurements=10)
+
+        self.generate(users=1, systems=1, measurements=10, prefix="other")
+        self.assertEqual(Measurement.objects.count(), 20)
+
+    def test_series(self):
+        rng = numpy.random.default_rng(0)
+        system = profile(rng)
+        start = int(datetime(2025, 1, 1, tzinfo=dt_timezone.utc).timestamp())
+        timestamps = (start + numpy.arange(0, 4 * 24 * 3600, 60)) * 10**6
+
+        ph, temperature, tds = series(timestamps, system, rng)
+
+        hour = (timestamps // 10**6 % (24 * 3600)) // 3600
+        self.assertGreater(
+            temperature[hour == 15].mean(), temperature[hour == 3].mean() + 2
+        )
+        self.assertTrue(((ph > 5) & (ph < 7.5)).all())
+        # doses of concentrate are steps up between falling readings
+        steps = numpy.count_nonzero(numpy.diff(tds) > 50)
+        doses = 4 * 24 * 3600 // system["tds_period"]
+        self.assertIn(steps, (doses, doses + 1))
+        self.assertLess(numpy.median(numpy.diff(tds)), 0.5)
+
+
+@override_settings(ANOMALY_WINDOW=20, ANOMALY_THRESHOLD=3)
+class AnomalyTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.client.force_authenticate(user=self.user)
+
+        self.system = HydroponicSystem.objects.create(
+            name="System 1", owner=self.user, type="NFT"
+        )
+        self.start = timezone.now().replace(microsecond=0) - timedelta(days=1)
+        Measurement.objects.bulk_create(
+            Measurement(
+                system=self.system,
+                ph=9 if i == 150 else 6 + i % 3 / 10,
+                temperature=20 + i % 2 / 10,
+                tds=900 if i == 180 else 500 + i % 5,
+                timestamp=self.start + timedelta(minutes=i),
+            )
+            for i in range(200)
+        )
+        self.ph_spike, self.tds_spike = (
+            Measurement.objects.get(system=self.system, ph=9),
+            Measurement.objects.get(system=self.system, tds=900),
+        )
+        self.url = reverse("hydroponic-statistics", args=[self.system.id])
+
+    def test_rolling(self):
+        values = numpy.random.default_rng(0).normal(7, 0.5, 500)
+
+        mean, std = rolling(values, 30)
+
+        self.assertTrue(numpy.isnan(mean[:30]).all())
+        for i in (30, 31, 250, 499):
+            self.assertAlmostEqual(mean[i], values[i - 30 : i].mean())
+            self.assertAlmostEqual(std[i], values[i - 30 : i].std())
+
+    def test_ewm(self):
+        values = numpy.random.default_rng(0).normal(7, 0.5, 3000)
+        alpha = 2 / 31
+        means, deviations = [], []
+        mean, variance = values[0], 0.0
+        for value in values:
+            means.append(mean)
+            deviations.append(math.sqrt(variance))
+            delta = value - mean
+            mean += alpha * delta
+            variance = (1 - alpha) * (variance + alpha * delta * delta)
+
+        mean, std = ewm(values, 30)
+
+        self.assertTrue(numpy.isnan(std[:30]).all())
+        numpy.testing.assert_allclose(mean[30:], means[30:])
+        numpy.testing.assert_allclose(std[30:], deviations[30:])
+
+    def test_scores_match_window_functions(self):
+        rng = numpy.random.default_rng(1)
+        Measurement.objects.bulk_create(
+            Measurement(
+                system=self.system,
+                ph=round(ph, 2),
+                temperature=20,
+                tds=500,
+                timestamp=self.start + timedelta(days=1, minutes=i),
+            )
+            for i, ph in enumerate(rng.standard_t(2, 1000) / 10 + 6)
+        )
+        measurements = Measurement.objects.filter(system=self.system)
+
+        result = describe(measurements, 20, 2.5, limit=10000)
+
+        self.assertGreater(result["anomaly_count"], 10)
+        self.assertEqual(
+            {anomaly["id"] for anomaly in result["anomalies"]},
+            set(anomalous(measurements, 20, 2.5).values_list("pk", flat=True)),
+        )
+
+    def test_statistics(self):
+        response = self.client.get(self.url, {"points": 50})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 200)
+        self.assertEqual(response.data["window"], 20)
+        self.assertEqual(response.data["anomaly_count"], 2)
+        self.assertEqual(
+            [anomaly["id"] for anomaly in response.data["anomalies"]],
+            [self.tds_spike.id, self.ph_spike.id],
+        )
+        self.assertEqual(set(response.data["anomalies"][0]["metrics"]), {"tds"})
+        self.assertEqual(response.data["anomalies"][0]["metrics"]["tds"]["value"], 900)
+        self.assertEqual(
+            response.data["anomalies"][1]["timestamp"],
+            format_datetime(self.ph_spike.timestamp),
+        )
+
+        ph = response.data["statistics"]["ph"]
+        self.assertEqual((ph["min"], ph["max"], ph["anomalies"]), (6, 9, 1))
+        self.assertEqual(ph["percentiles"]["50"], 6.1)
+        self.assertEqual(len(ph["rolling"]["mean"]), 50)
+        self.assertEqual(len(ph["rolling"]["timestamps"]), 50)
+        self.assertAlmostEqual(ph["rolling"]["mean"][0], 6.1, places=1)
+
+        response = self.client.get(self.url, {"method": "ewma", "metrics": "tds"})
+        self.assertEqual(set(response.data["statistics"]), {"tds"})
+        self.assertEqual(
+            [anomaly["id"] for anomaly in response.data["anomalies"]],
+            [self.tds_spike.id],
+        )
+
+    def test_statistics_datetime_range(self):
+        response = self.client.get(
+            self.url,
+            {"datetime_to": (self.start + timedelta(minutes=160)).isoformat()},
+        )
+
+        self.assertEqual(response.data["count"], 161)
+        self.assertEqual(response.data["anomaly_count"], 1)
+
+    def test_statistics_validation(self):
+        for params in (
+            {"window": 1},
+            {"window": "x"},
+            {"threshold": 0},
+            {"method": "median"},
+            {"metrics": "ec"},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(set(response.data), set(params))
+
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_measurement_list_anomaly_filter(self):
+        url = reverse("measurement-list")
+
+        response = self.client.get(url, {"anomaly": "true"})
+        self.assertEqual(
+            [row["id"] for row in response.data["results"]],
+            [self.tds_spike.id, self.ph_spike.id],
+        )
+
+        # the windows still include the readings the other filters leave out
+        response = self.client.get(url, {"anomaly": "true", "ph_min": 8})
+        self.assertEqual(
+            [row["id"] for row in response.data["results"]], [self.ph_spike.id]
+        )
+
+        response = self.client.get(url, {"anomaly": "false", "tds_min": 800})
+        self.assertEqual(response.data["results"], [])
+
+
+class SystemComparisonTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.client.force_authenticate(user=self.user)
+
+        # in the past, so the default ranges hold a known number of readings
+        self.now = timezone.now().replace(second=0, microsecond=0) - timedelta(
+            minutes=1
+        )
+        self.systems = [
+            HydroponicSystem.objects.create(
+                name=f"System {i}", owner=self.user, type="NFT"
+            )
+            for i in range(4)
+        ]
+        for i, system in enumerate(self.systems[:3]):
+            for hours in range(6):
+                Measurement.objects.create(
+                    system=system,
+                    ph=6 + i,
+                    temperature=20 + hours,
+                    tds=500,
+                    timestamp=self.now - timedelta(hours=hours),
+                )
+        # only readings older than the default range of a day
+        Measurement.objects.create(
+            system=self.systems[3],
+            ph=7,
+            temperature=20,
+            tds=500,
+            timestamp=self.now - timedelta(days=3),
+        )
+        self.url = reverse("hydroponic-compare")
+
+    def get(self, systems, **params):
+        return self.client.get(
+            self.url,
+            {"ids": ",".join(str(system.id) for system in systems), **params},
+        )
+
+    def test_compare(self):
+        response = self.get(self.systems[2::-1])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["bucket"], "hour")
+        self.assertEqual(
+            [system["name"] for system in response.data["systems"]],
+            ["System 2", "System 1", "System 0"],
+        )
+
+        system = response.data["systems"][0]
+        self.assertEqual(system["id"], self.systems[2].id)
+        self.assertEqual(system["latest"]["ph"], 8)
+        self.assertEqual(system["latest"]["temperature"], 20)
+        self.assertEqual(system["latest"]["timestamp"], format_datetime(self.now))
+        self.assertEqual(len(system["aggregates"]), 6)
+        self.assertEqual(sum(bucket["count"] for bucket in system["aggregates"]), 6)
+        self.assertEqual(system["aggregates"][0]["temperature"]["avg"], 25)
+
+    def test_compare_datetime_range(self):
+        response = self.get(
+            self.systems,
+            bucket="day",
+            datetime_from=(self.now - timedelta(days=5)).isoformat(),
+            datetime_to=(self.now - timedelta(hours=2)).isoformat(),
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        systems = response.data["systems"]
+        self.assertEqual(systems[0]["latest"]["temperature"], 22)
+        self.assertEqual(sum(row["count"] for row in systems[0]["aggregates"]), 4)
+        self.assertEqual(systems[3]["latest"]["ph"], 7)
+
+        # an hour by default
+        response = self.get(self.systems, bucket="minute")
+        systems = response.data["systems"]
+        self.assertEqual(len(systems[1]["aggregates"]), 1)
+        self.assertIsNone(systems[3]["latest"])
+        self.assertEqual(systems[3]["aggregates"], [])
+
+    def test_compare_query_count(self):
+        counts = []
+
+        for systems in (self.systems[:1], self.systems):
+            with CaptureQueriesContext(connection) as context:
+                response = self.get(systems)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            counts.append(len(context.captured_queries))
+
+        self.assertEqual(counts[0], counts[1])
+        self.assertLessEqual(counts[1], 4)
+
+    def test_compare_validation(self):
+        other = HydroponicSystem.objects.create(
+            name="Other", owner=self.other_user, type="NFT"
+        )
+
+        for params in (
+            {},
+            {"ids": "x"},
+            {"ids": ",".join(map(str, range(1, 102)))},
+            {"ids": f"{self.systems[0].id},{other.id}"},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("ids", response.data)
+
+        response = self.get(self.systems, bucket="week")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("bucket", response.data)
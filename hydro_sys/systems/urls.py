@@ -1,9 +1,50 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import HydroponicSystemViewSet, MeasurementViewSet
+from .async_views import (
+    HydroponicSystemDetailView,
+    HydroponicSystemListView,
+    MeasurementDetailView,
+    MeasurementListView,
+)
+from .streams import measurement_stream
+from .views import (
+    AlertRuleViewSet,
+    AlertViewSet,
+    HydroponicSystemViewSet,
+    MeasurementViewSet,
+)
 
 router = DefaultRouter()
 router.register(r"hydroponic", HydroponicSystemViewSet, basename="hydroponic")
 router.register(r"measurements", MeasurementViewSet, basename="measurement")
+router.register(r"alert-rules", AlertRuleViewSet, basename="alert-rule")
+router.register(r"alerts", AlertViewSet, basename="alert")
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path(
+        "hydroponic/<int:pk>/stream/",
+        measurement_stream,
+        name="hydroponic-stream",
+    ),
+    path(
+        "async/hydroponic/",
+        HydroponicSystemListView.as_view(),
+        name="async-hydroponic-list",
+    ),
+    path(
+        "async/hydroponic/<int:pk>/",
+        HydroponicSystemDetailView.as_view(),
+        name="async-hydroponic-detail",
+    ),
+    path(
+        "async/measurements/",
+        MeasurementListView.as_view(),
+        name="async-measurement-list",
+    ),
+    path(
+        "async/measurements/<int:pk>/",
+        MeasurementDetailView.as_view(),
+        name="async-measurement-detail",
+    ),
+    path("", include(router.urls)),
+]
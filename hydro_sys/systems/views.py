@@ -1,29 +1,114 @@
-from rest_framework import viewsets, permissions
+import copy
+import uuid
+from datetime import timedelta
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.filters import OrderingFilter
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import (
+    NotFound,
+    PermissionDenied,
+    Throttled,
+    UnsupportedMediaType,
+    ValidationError,
+)
+from rest_framework.response import Response
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import HydroponicSystem, Measurement
+from hydro_sys.instrumentation import InstrumentedViewMixin
+from .models import (
+    Alert,
+    AlertRule,
+    HydroponicSystem,
+    Measurement,
+    MeasurementRollup,
+    MeasurementUpload,
+)
 from .serializers import (
+    AlertRuleSerializer,
+    AlertSerializer,
     HydroponicSystemDetailSerializer,
     HydroponicSystemListSerializer,
+    MeasurementAggregateSerializer,
+    MeasurementColumnSerializer,
+    MeasurementRowSerializer,
     MeasurementSerializer,
+    MeasurementUploadSerializer,
+    format_datetime,
+)
+from .filters import (
+    AlertFilter,
+    AlertRuleFilter,
+    MeasurementFilter,
+    MeasurementRangeFilter,
+    HydroponicSystemFilter,
+)
+from .anomalies import METHODS as ANOMALY_METHODS, describe
+from .cache import cache_response, conditional_response, owner_key, system_key
+from .aggregation import (
+    BUCKETS,
+    aggregate_measurements,
+    aggregate_rollups,
+    can_use_rollups,
+    latest_measurements,
 )
-from .filters import MeasurementFilter, HydroponicSystemFilter
+from .downsampling import METHODS, METRICS, downsample
+from .export import CONTENT_TYPES, aiterate, available_formats, export
+from .ingest import FORMATS, MeasurementIngestor
+from .pagination import MeasurementPagination
+from .renderers import columnar_renderers
+from .signals import measurements_changed
+from .writebehind import QueueFull, get_queue
 
 
-class BaseModelViewSet(viewsets.ModelViewSet):
+class BaseModelViewSet(InstrumentedViewMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = (DjangoFilterBackend, OrderingFilter)
     ordering = ["-timestamp"]
 
+    def get_cache_versions(self):
+        return [owner_key(self.request.user.pk)]
+
 
 class HydroponicSystemViewSet(BaseModelViewSet):
     filterset_class = HydroponicSystemFilter
     ordering_fields = ["timestamp", "name", "type"]
+    series_points = 1000
+    series_max_points = 10000
+    statistics_points = 500
+    statistics_max_window = 10000
+    statistics_anomalies = 100
+    compare_max_systems = 100
+    # the range compared when there is no datetime_from
+    compare_ranges = {
+        "minute": timedelta(hours=1),
+        "hour": timedelta(days=1),
+        "day": timedelta(days=30),
+    }
 
     def get_queryset(self):
         return HydroponicSystem.objects.filter(owner=self.request.user)
 
+    def get_cache_versions(self):
+        versions = super().get_cache_versions()
+
+        if self.action in ("retrieve", "series", "statistics"):
+            versions.append(system_key(self.kwargs["pk"]))
+
+        return versions
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_response
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     def get_serializer_class(self):
         if self.action == "retrieve":
             return HydroponicSystemDetailSerializer
@@ -33,21 +118,484 @@ class HydroponicSystemViewSet(BaseModelViewSet):
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
+    @action(detail=True, methods=["get"])
+    @conditional_response
+    @cache_response
+    def series(self, request, pk=None):
+        system = get_object_or_404(self.get_queryset(), pk=pk)
+        method = request.query_params.get("method", "lttb")
+
+        if method not in METHODS:
+            raise ValidationError(
+                {"method": [f"Must be one of: {', '.join(METHODS)}."]}
+            )
+        points = self.get_number(
+            "points", self.series_points, 3, self.series_max_points
+        )
+        metrics = self.get_metrics()
+        count, series = downsample(
+            self.get_measurements(system), points, method, metrics
+        )
+        tz = timezone.get_current_timezone()
+
+        return Response(
+            {
+                "system": system.name,
+                "method": method,
+                "count": count,
+                "series": {
+                    metric: {
+                        "timestamps": [
+                            format_datetime(value, tz) for value in data["timestamps"]
+                        ],
+                        "values": data["values"],
+                    }
+                    for metric, data in series.items()
+                },
+            }
+        )
+
+    @action(detail=True, methods=["get"])
+    @conditional_response
+    @cache_response
+    def statistics(self, request, pk=None):
+        system = get_object_or_404(self.get_queryset(), pk=pk)
+        method = request.query_params.get("method", "zscore")
+
+        if method not in ANOMALY_METHODS:
+            raise ValidationError(
+                {"method": [f"Must be one of: {', '.join(ANOMALY_METHODS)}."]}
+            )
+
+        window = self.get_number(
+            "window", settings.ANOMALY_WINDOW, 2, self.statistics_max_window
+        )
+        threshold = self.get_number(
+            "threshold", settings.ANOMALY_THRESHOLD, 0, None, float
+        )
+        points = self.get_number(
+            "points", self.statistics_points, 1, self.series_max_points
+        )
+        metrics = self.get_metrics()
+
+        result = describe(
+            self.get_measurements(system),
+            window,
+            threshold,
+            method,
+            metrics,
+            points=points,
+            limit=self.statistics_anomalies,
+        )
+        tz = timezone.get_current_timezone()
+
+        for data in result["statistics"].values():
+            data["rolling"]["timestamps"] = [
+                format_datetime(value, tz) for value in data["rolling"]["timestamps"]
+            ]
+        for anomaly in result["anomalies"]:
+            anomaly["timestamp"] = format_datetime(anomaly["timestamp"], tz)
+
+        return Response(
+            {
+                "system": system.name,
+                "method": method,
+                "window": window,
+                "threshold": threshold,
+                **result,
+            }
+        )
+
+    @action(detail=False, methods=["get"])
+    @cache_response
+    def compare(self, request):
+        ids = self.get_ids()
+        bucket = request.query_params.get("bucket", "hour")
+
+        if bucket not in BUCKETS:
+            raise ValidationError(
+                {"bucket": [f"Must be one of: {', '.join(BUCKETS)}."]}
+            )
+
+        systems = {
+            system.pk: system for system in self.get_queryset().filter(pk__in=ids)
+        }
+        missing = [str(pk) for pk in ids if pk not in systems]
+        if missing:
+            raise ValidationError({"ids": [f"Unknown systems: {', '.join(missing)}."]})
+
+        filterset = MeasurementRangeFilter(
+            request.query_params, queryset=Measurement.objects.filter(system_id__in=ids)
+        )
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+
+        end = filterset.form.cleaned_data.get("datetime_to")
+        start = filterset.form.cleaned_data.get("datetime_from") or (
+            (end or timezone.now()) - self.compare_ranges[bucket]
+        )
+        measurements = filterset.qs.filter(timestamp__gte=start)
+
+        latest = {
+            row["system"]: row
+            for row in MeasurementRowSerializer(
+                MeasurementRowSerializer.values(
+                    latest_measurements(
+                        HydroponicSystem.objects.filter(pk__in=ids), measurements
+                    )
+                )
+            ).data
+        }
+
+        if can_use_rollups(bucket, filterset.form.cleaned_data):
+            rows = aggregate_rollups(
+                measurements,
+                MeasurementRollup.objects.filter(system_id__in=ids),
+                bucket,
+                start=start,
+                end=end,
+            )
+        else:
+            rows = aggregate_measurements(measurements, bucket)
+
+        aggregates = {}
+        for row in MeasurementAggregateSerializer(rows, many=True).data:
+            aggregates.setdefault(row["system"], []).append(row)
+
+        return Response(
+            {
+                "bucket": bucket,
+                "datetime_from": format_datetime(start),
+                "datetime_to": format_datetime(end) if end else None,
+                "systems": [
+                    {
+                        **HydroponicSystemListSerializer(systems[pk]).data,
+                        "latest": latest.get(systems[pk].name),
+                        "aggregates": aggregates.get(systems[pk].name, []),
+                    }
+                    for pk in ids
+                ],
+            }
+        )
+
+    def get_ids(self):
+        try:
+            ids = [
+                int(pk)
+                for pk in self.request.query_params.get("ids", "").split(",")
+                if pk.strip()
+            ]
+        except ValueError:
+            ids = []
+
+        ids = list(dict.fromkeys(ids))
+        if not 1 <= len(ids) <= self.compare_max_systems:
+            raise ValidationError(
+                {
+                    "ids": [
+                        "Must be a comma-separated list of 1 to "
+                        f"{self.compare_max_systems} system ids."
+                    ]
+                }
+            )
+
+        return ids
+
+    def get_measurements(self, system):
+        # the datetime range applies to the measurements, not to the system
+        filterset = MeasurementRangeFilter(
+            self.request.query_params, queryset=system.measurements.all()
+        )
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+
+        return filterset.qs
+
+    def get_metrics(self):
+        metrics = self.request.query_params.get("metrics", ",".join(METRICS)).split(",")
+
+        if not set(metrics) <= set(METRICS):
+            raise ValidationError(
+                {"metrics": [f"Must be a list of: {', '.join(METRICS)}."]}
+            )
+
+        return metrics
+
+    def get_number(self, name, default, minimum, maximum, cast=int):
+        try:
+            value = cast(self.request.query_params.get(name, default))
+        except ValueError:
+            value = None
+
+        if maximum is None:
+            if value is None or not value > minimum:
+                raise ValidationError({name: [f"Must be a number above {minimum}."]})
+        elif value is None or not minimum <= value <= maximum:
+            raise ValidationError(
+                {name: [f"Must be a number between {minimum} and {maximum}."]}
+            )
+
+        return value
+
 
 class MeasurementViewSet(BaseModelViewSet):
     serializer_class = MeasurementSerializer
+    pagination_class = MeasurementPagination
     filterset_class = MeasurementFilter
     ordering_fields = ["ph", "tds", "temperature", "timestamp", "system"]
+    bulk_max_rows = 10000
+    bulk_batch_size = 1000
 
     def get_queryset(self):
-        return Measurement.objects.filter(system__owner=self.request.user)
+        return Measurement.objects.filter(
+            system__owner=self.request.user
+        ).select_related("system")
 
-    def perform_create(self, serializer):
-        system = serializer.validated_data["system"]
+    def get_renderers(self):
+        renderers = super().get_renderers()
+
+        if self.action == "list":
+            renderers += [renderer() for renderer in columnar_renderers()]
+
+        return renderers
+
+    def get_row_serializer_class(self):
+        if getattr(self.request.accepted_renderer, "columnar", False):
+            return MeasurementColumnSerializer
+
+        return MeasurementRowSerializer
 
-        if system.owner != self.request.user:
+    @conditional_response
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.get_row_serializer_class()
+        queryset = serializer_class.values(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer_class(page).data)
+
+        return Response(serializer_class(queryset).data)
+
+    def check_system_owner(self, system):
+        if system.owner_id != self.request.user.pk:
             raise PermissionDenied(
                 "You do not have permission to add measurements to this system."
             )
 
+    def create(self, request, *args, **kwargs):
+        if not settings.MEASUREMENT_WRITE_BEHIND:
+            return super().create(request, *args, **kwargs)
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.check_system_owner(serializer.validated_data["system"])
+
+        measurement = self.enqueue(get_queue(), serializer.validated_data)
+
+        return Response(
+            self.get_serializer(measurement).data, status=status.HTTP_202_ACCEPTED
+        )
+
+    def enqueue(self, write_behind, validated_data):
+        measurement = Measurement(**validated_data, timestamp=timezone.now())
+
+        try:
+            write_behind.put(measurement)
+        except QueueFull:
+            raise Throttled(
+                wait=settings.MEASUREMENT_WRITE_BEHIND_FLUSH_INTERVAL,
+                detail="Too many measurements are waiting to be saved.",
+            )
+
+        return measurement
+
+    def perform_create(self, serializer):
+        self.check_system_owner(serializer.validated_data["system"])
         serializer.save()
+
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    def perform_update(self, serializer):
+        previous = copy.copy(serializer.instance)
+        measurement = serializer.save()
+
+        # post_save only reports the new system and time, the rollups and
+        # cached responses of the old ones are stale as well
+        if (previous.system_id, previous.timestamp) != (
+            measurement.system_id,
+            measurement.timestamp,
+        ):
+            measurements_changed.send(sender=Measurement, measurements=[previous])
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        measurements_changed.send(sender=Measurement, measurements=[instance])
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        rows = request.data
+
+        if not isinstance(rows, list) or not rows:
+            raise ValidationError("Expected a non-empty list of measurements.")
+        if len(rows) > self.bulk_max_rows:
+            raise ValidationError(
+                f"Ensure this list has no more than {self.bulk_max_rows} elements."
+            )
+
+        ingestor = MeasurementIngestor(request.user, batch_size=self.bulk_batch_size)
+        created, errors = ingestor.ingest(rows)
+
+        return Response(
+            {"created": created, "errors": errors},
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+        )
+
+    @action(detail=False, methods=["get", "post"])
+    def upload(self, request):
+        upload = self.get_upload(request.query_params.get("upload_id"))
+
+        if request.method == "GET" or upload.finished:
+            return Response(MeasurementUploadSerializer(upload).data)
+
+        fmt = FORMATS.get(request.content_type.split(";")[0].strip())
+        if fmt is None:
+            raise UnsupportedMediaType(request.content_type)
+
+        ingestor = MeasurementIngestor(
+            request.user, batch_size=self.bulk_batch_size, upload=upload, use_copy=True
+        )
+        ingestor.ingest_stream(request.stream or [], fmt)
+
+        return Response(
+            {**MeasurementUploadSerializer(upload).data, "errors": ingestor.errors},
+            status=status.HTTP_201_CREATED,
+        )
+
+    def get_upload(self, upload_id):
+        # the client picks the id up front, so that it can resume an upload
+        # that was interrupted before any response
+        if upload_id is None:
+            raise ValidationError({"upload_id": ["This field is required."]})
+
+        try:
+            upload_id = uuid.UUID(upload_id)
+        except ValueError:
+            raise ValidationError({"upload_id": ["Must be a valid UUID."]})
+
+        upload = MeasurementUpload.objects.filter(pk=upload_id).first()
+
+        if upload is None and self.request.method == "POST":
+            return MeasurementUpload.objects.create(
+                pk=upload_id, owner=self.request.user
+            )
+        if upload is None or upload.owner_id != self.request.user.pk:
+            raise NotFound()
+
+        return upload
+
+    @action(detail=False, methods=["get"])
+    def aggregate(self, request):
+        bucket = request.query_params.get("bucket", "hour")
+
+        if bucket not in BUCKETS:
+            raise ValidationError(
+                {"bucket": [f"Must be one of: {', '.join(BUCKETS)}."]}
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        filterset = self.filterset_class(request.query_params, queryset=queryset)
+        filters = filterset.form.cleaned_data if filterset.is_valid() else {}
+
+        if can_use_rollups(bucket, filters):
+            rollups = MeasurementRollup.objects.filter(system__owner=request.user)
+            if filters.get("system"):
+                rollups = rollups.filter(system__name=filters["system"])
+
+            rows = aggregate_rollups(
+                queryset,
+                rollups,
+                bucket,
+                start=filters.get("datetime_from"),
+                end=filters.get("datetime_to"),
+            )
+        else:
+            rows = aggregate_measurements(queryset, bucket)
+
+        return Response(MeasurementAggregateSerializer(rows, many=True).data)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        # "format" is taken by DRF's format suffixes
+        fmt = request.query_params.get("export_format", "csv")
+
+        if fmt not in available_formats():
+            raise ValidationError(
+                {
+                    "export_format": [
+                        f"Must be one of: {', '.join(available_formats())}."
+                    ]
+                }
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        content = export(queryset, fmt)
+        if isinstance(request._request, ASGIRequest):
+            content = aiterate(content)
+
+        response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[fmt])
+        response["Content-Disposition"] = f'attachment; filename="measurements.{fmt}"'
+
+        return response
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="write-behind",
+        permission_classes=[permissions.IsAdminUser],
+    )
+    def write_behind(self, request):
+        if not settings.MEASUREMENT_WRITE_BEHIND:
+            raise NotFound("Write-behind mode is disabled.")
+
+        return Response(get_queue().metrics())
+
+
+class AlertRuleViewSet(BaseModelViewSet):
+    serializer_class = AlertRuleSerializer
+    filterset_class = AlertRuleFilter
+    ordering_fields = ["timestamp", "metric", "kind"]
+
+    def get_queryset(self):
+        return AlertRule.objects.filter(system__owner=self.request.user).select_related(
+            "system"
+        )
+
+    def check_system_owner(self, system):
+        if system.owner_id != self.request.user.pk:
+            raise PermissionDenied(
+                "You do not have permission to add alert rules to this system."
+            )
+
+    def perform_create(self, serializer):
+        self.check_system_owner(serializer.validated_data["system"])
+        serializer.save()
+
+    def perform_update(self, serializer):
+        if "system" in serializer.validated_data:
+            self.check_system_owner(serializer.validated_data["system"])
+        serializer.save()
+
+
+class AlertViewSet(BaseModelViewSet):
+    serializer_class = AlertSerializer
+    filterset_class = AlertFilter
+    ordering_fields = ["timestamp", "measured_at", "state"]
+    http_method_names = ["get", "head", "options"]
+
+    def get_queryset(self):
+        return Alert.objects.filter(
+            rule__system__owner=self.request.user
+        ).select_related("rule__system")
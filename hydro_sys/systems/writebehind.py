@@ -0,0 +1,348 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from functools import lru_cache
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from .models import HydroponicSystem, Measurement
+from .signals import measurements_created
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("system_id", "ph", "temperature", "tds", "timestamp", "description")
+STOP_RETRIES = 3
+
+
+class QueueFull(Exception):
+    pass
+
+
+def lock(file, blocking=True):
+    """
+    Takes an exclusive lock on ``file``, held until it is closed. Returns
+    False if another process holds it and ``blocking`` is False. Without
+    fcntl (on Windows) files are not locked.
+    """
+    if fcntl is None:
+        return True
+
+    try:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+    except BlockingIOError:
+        return False
+
+    return True
+
+
+class WriteBehindQueue:
+    """
+    Bounded queue of validated measurements written to the database in
+    batches by a background thread, when ``batch_size`` readings are waiting
+    or ``flush_interval`` seconds have passed.
+
+    With a ``spool_path`` every reading is appended to a spool file before it
+    is acknowledged, followed by a watermark once its batch is committed.
+    Every process has its own spool, ``<spool_path>.<pid>``, locked while
+    the process runs. ``recover()`` writes again the readings after the last
+    watermark of the spools no process holds.
+    """
+
+    def __init__(
+        self,
+        batch_size=500,
+        flush_interval=1.0,
+        max_size=10000,
+        spool_path=None,
+        fsync=False,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(max_size)
+        self.pending = []
+        self.spool_path = spool_path
+        self.fsync = fsync
+        self.spool = None
+        self.sequence = 0
+        self.put_lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = None
+        self.stats = {
+            "enqueued": 0,
+            "rejected": 0,
+            "written": 0,
+            "dropped": 0,
+            "batches": 0,
+            "errors": 0,
+            "flush_seconds_total": 0.0,
+            "flush_seconds_last": 0.0,
+            "flush_seconds_max": 0.0,
+        }
+
+    def open_spool(self):
+        while self.spool is None and self.spool_path:
+            spool = open(f"{self.spool_path}.{os.getpid()}", "a", encoding="utf-8")
+            lock(spool)
+
+            if os.fstat(spool.fileno()).st_nlink:
+                self.spool = spool
+            else:
+                # the spool of a dead process with the same pid, recovered
+                # and removed while this one waited for the lock
+                spool.close()
+
+    def append(self, entry):
+        self.spool.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self.spool.flush()
+
+        if self.fsync:
+            os.fsync(self.spool.fileno())
+
+    def put(self, measurement):
+        values = {name: getattr(measurement, name) for name in FIELDS}
+
+        with self.put_lock:
+            if self.queue.full():
+                self.stats["rejected"] += 1
+                raise QueueFull
+
+            self.sequence += 1
+
+            if self.spool_path:
+                self.open_spool()
+                entry = dict(values, seq=self.sequence)
+                entry["timestamp"] = entry["timestamp"].isoformat()
+                self.append(entry)
+
+            self.queue.put_nowait((self.sequence, measurement))
+            self.stats["enqueued"] += 1
+
+        if self.queue.qsize() >= self.batch_size:
+            self.wakeup.set()
+
+    def take(self):
+        batch, self.pending = self.pending, []
+
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def write(self, measurements):
+        try:
+            with transaction.atomic():
+                # readings of systems deleted since they were queued are
+                # dropped; a deletion racing this check fails the commit and
+                # the batch is retried
+                existing = set(
+                    HydroponicSystem.objects.filter(
+                        pk__in={measurement.system_id for measurement in measurements}
+                    ).values_list("id", flat=True)
+                )
+                measurements = [
+                    measurement
+                    for measurement in measurements
+                    if measurement.system_id in existing
+                ]
+
+                Measurement.objects.bulk_create(measurements)
+                measurements_created.send(sender=Measurement, measurements=measurements)
+        except DatabaseError:
+            # ids returned before the rollback must not be reused
+            for measurement in measurements:
+                measurement.pk = None
+            raise
+
+        return measurements
+
+    def flush(self, retries=None):
+        """
+        Write everything queued so far. While the database is failing, the
+        batch is retried until the queue stops, or ``retries`` times. Returns
+        False if it was given up, the batch is then first in line again.
+        """
+        with self.write_lock:
+            while batch := self.take():
+                attempt = 0
+
+                while True:
+                    started = time.monotonic()
+                    try:
+                        written = len(
+                            self.write([measurement for _, measurement in batch])
+                        )
+                        break
+                    except DatabaseError:
+                        self.stats["errors"] += 1
+                        attempt += 1
+                        logger.exception("Failed to write queued measurements.")
+                        close_old_connections()
+
+                        if retries is None:
+                            stopped = self.stopping.wait(self.flush_interval)
+                        else:
+                            stopped = attempt > retries
+                            time.sleep(0 if stopped else self.flush_interval)
+
+                        if stopped:
+                            self.pending = batch
+                            return False
+
+                elapsed = time.monotonic() - started
+                self.stats["written"] += written
+                self.stats["dropped"] += len(batch) - written
+                self.stats["batches"] += 1
+                self.stats["flush_seconds_total"] += elapsed
+                self.stats["flush_seconds_last"] = elapsed
+                self.stats["flush_seconds_max"] = max(
+                    self.stats["flush_seconds_max"], elapsed
+                )
+                self.checkpoint(batch[-1][0])
+
+        return True
+
+    def checkpoint(self, sequence):
+        if not self.spool_path:
+            return
+
+        with self.put_lock:
+            self.open_spool()
+
+            if self.queue.empty() and not self.pending:
+                # nothing is pending, so the spool can start over
+                self.spool.truncate(0)
+            else:
+                self.append({"flushed": sequence})
+
+    def spool_paths(self):
+        paths = glob.glob(f"{glob.escape(self.spool_path)}.*")
+        return [path for path in paths if path.rsplit(".", 1)[1].isdigit()]
+
+    def recover(self):
+        if not self.spool_path:
+            return 0
+
+        recovered = 0
+        for path in self.spool_paths():
+            try:
+                spool = open(path, encoding="utf-8")
+            except FileNotFoundError:
+                continue
+
+            with spool:
+                # a running process holds its spool, and a spool recovered by
+                # another process since it was opened is gone
+                if lock(spool, blocking=False) and os.fstat(spool.fileno()).st_nlink:
+                    recovered += self.replay(spool)
+                    os.unlink(path)
+
+        return recovered
+
+    def replay(self, spool):
+        entries, flushed = [], 0
+        for line in spool:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # a line cut short by a crash was never acknowledged
+                continue
+
+            if "flushed" in entry:
+                flushed = max(flushed, entry["flushed"])
+            else:
+                entries.append(entry)
+
+        measurements = [
+            Measurement(**{name: entry[name] for name in FIELDS})
+            for entry in entries
+            if entry["seq"] > flushed
+        ]
+        written = 0
+        for start in range(0, len(measurements), self.batch_size):
+            written += len(self.write(measurements[start : start + self.batch_size]))
+
+        return written
+
+    def run(self):
+        while True:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+
+            if self.stopping.is_set():
+                # stop() writes what is left
+                return
+
+            self.flush()
+            close_old_connections()
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.run, name="measurement-write-behind", daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+        self.wakeup.set()
+
+        if self.thread is not None:
+            self.thread.join()
+
+        # drain what is left; with a spool, anything that still fails is
+        # written again by recover() on the next start
+        drained = self.flush(retries=STOP_RETRIES)
+
+        if self.spool is not None:
+            if drained:
+                os.unlink(self.spool.name)
+            self.spool.close()
+            self.spool = None
+
+    def metrics(self):
+        stats = dict(self.stats, depth=self.queue.qsize() + len(self.pending))
+        stats["flush_seconds_avg"] = (
+            stats["flush_seconds_total"] / stats["batches"] if stats["batches"] else 0
+        )
+        return stats
+
+
+@lru_cache(maxsize=None)
+def get_queue():
+    write_behind = WriteBehindQueue(
+        batch_size=settings.MEASUREMENT_WRITE_BEHIND_BATCH_SIZE,
+        flush_interval=settings.MEASUREMENT_WRITE_BEHIND_FLUSH_INTERVAL,
+        max_size=settings.MEASUREMENT_WRITE_BEHIND_MAX_SIZE,
+        spool_path=settings.MEASUREMENT_WRITE_BEHIND_SPOOL or None,
+        fsync=settings.MEASUREMENT_WRITE_BEHIND_FSYNC,
+    )
+    write_behind.recover()
+    write_behind.start()
+    atexit.register(write_behind.stop)
+
+    return write_behind
+
+
+def startup():
+    # write what the spools of stopped processes hold before taking requests
+    if settings.MEASUREMENT_WRITE_BEHIND:
+        get_queue()
+
+
+def shutdown():
+    # only drain a queue that was started
+    if get_queue.cache_info().currsize:
+        get_queue().stop()
@@ -1,11 +1,14 @@
 from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 
 User = get_user_model()
 
 
 class BaseTestCase(APITestCase):
     def setUp(self):
+        cache.clear()
+
         self.user = User.objects.create_user(
             username="test_user",
             email="test_email@email.com",
@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+User = get_user_model()
+
+# what requests read from the user, never the password hash
+CACHED_FIELDS = ("id", "username", "email", "is_active", "is_staff", "is_superuser")
+
+
+def user_key(user_id):
+    return f"users:auth:fields:{user_id}"
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication reading the user of a verified token from the cache,
+    for AUTH_USER_CACHE_TIMEOUT seconds. Saving or deleting a user drops its
+    entry, so a deactivated user or a changed password takes effect on the
+    next request; changes made with ``update()`` wait for the timeout.
+
+    Only CACHED_FIELDS and the hash of the password the revoke claim is
+    checked against are cached. A user read from the cache has its other
+    fields deferred, as with ``only()``.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        key = user_key(user_id)
+        cached = cache.get(key)
+
+        if cached is None:
+            try:
+                user = self.user_model.objects.get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+            cached = {name: getattr(user, name) for name in CACHED_FIELDS}
+            cached["password"] = get_md5_hash_password(user.password)
+            cache.set(key, cached, settings.AUTH_USER_CACHE_TIMEOUT)
+        else:
+            user = self.cached_user(cached)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if (
+                validated_token.get(api_settings.REVOKE_TOKEN_CLAIM)
+                != cached["password"]
+            ):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
+
+    def cached_user(self, cached):
+        names = [
+            field.attname
+            for field in self.user_model._meta.concrete_fields
+            if field.attname in CACHED_FIELDS
+        ]
+
+        return self.user_model.from_db(
+            router.db_for_read(self.user_model),
+            names,
+            [cached[name] for name in names],
+        )
+
+
+@receiver(post_save, sender=User, dispatch_uid="users_auth_user_saved")
+@receiver(post_delete, sender=User, dispatch_uid="users_auth_user_deleted")
+def user_receiver(sender, instance, **kwargs):
+    cache.delete(user_key(getattr(instance, api_settings.USER_ID_FIELD)))
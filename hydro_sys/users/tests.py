@@ -1,8 +1,15 @@
+from unittest import mock
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
 from tests.base import BaseTestCase
+from .authentication import CachedJWTAuthentication, user_key
 
 User = get_user_model()
 
@@ -26,3 +33,84 @@ class UserTestCase(BaseTestCase):
         response = self.client.post(self.url, payload, format="json")
 
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class CachedJWTAuthenticationTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+        self.url = reverse("hydroponic-list")
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+
+        table = User._meta.db_table
+        return response, [q for q in context.captured_queries if table in q["sql"]]
+
+    def test_user_cached(self):
+        response, queries = self.user_queries()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+
+        response, queries = self.user_queries()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(queries, [])
+
+    def test_password_not_cached(self):
+        self.user_queries()
+
+        cached = cache.get(user_key(self.user.pk))
+        self.assertNotIn(self.user.password, cached.values())
+
+        user = CachedJWTAuthentication().get_user(AccessToken.for_user(self.user))
+        self.assertEqual(
+            (user.pk, user.username, user.is_active),
+            (self.user.pk, self.user.username, True),
+        )
+        self.assertIn("password", user.get_deferred_fields())
+
+        user.is_staff = True
+        user.save()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_staff)
+        # saving it only writes the loaded fields
+        self.assertTrue(self.user.check_password("test_pass"))
+
+    def test_revoked_token(self):
+        # simplejwt's settings object is read when its modules are imported
+        with mock.patch.object(api_settings, "CHECK_REVOKE_TOKEN", True):
+            self.client.credentials(
+                HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+            )
+            self.assertEqual(self.user_queries()[0].status_code, status.HTTP_200_OK)
+            self.assertEqual(self.user_queries()[0].status_code, status.HTTP_200_OK)
+
+            self.user.set_password("new_pass")
+            self.user.save()
+
+            response, _ = self.user_queries()
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalidated_on_save(self):
+        self.user_queries()
+
+        self.user.set_password("new_pass")
+        self.user.save()
+        self.assertIsNone(cache.get(user_key(self.user.pk)))
+
+        self.user.is_active = False
+        self.user.save()
+        response, _ = self.user_queries()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalidated_on_delete(self):
+        self.user_queries()
+
+        self.user.delete()
+
+        response, _ = self.user_queries()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)